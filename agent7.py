@@ -5,10 +5,11 @@ Uses Claude CLI and/or local LLM for planning, coding, and testing tasks.
 """
 import argparse
 import sys
-from typing import Optional
+from typing import Optional, List
 from database import Database
 from claude_client import ClaudeClient
 from local_llm_client import LocalLLMClient
+from response_cache import ResponseCache
 from task_orchestrator import TaskOrchestrator
 
 
@@ -41,11 +42,15 @@ def list_projects(db: Database):
 
 
 def create_task(db: Database, project_id: int, title: str, 
-                description: str, task_type: str, priority: int = 0):
+                description: str, task_type: str, priority: int = 0,
+                depends_on: Optional[List[int]] = None):
     """Create a new task."""
     try:
-        task_id = db.create_task(project_id, title, description, task_type, priority)
+        task_id = db.create_task(project_id, title, description, task_type, priority,
+                                 depends_on=depends_on)
         print(f"✅ Task created: {title} (ID: {task_id})")
+        if depends_on:
+            print(f"   Depends on: {', '.join(f'#{d}' for d in depends_on)}")
         return task_id
     except Exception as e:
         print(f"❌ Error creating task: {e}")
@@ -127,9 +132,10 @@ def execute_task_cmd(orchestrator: TaskOrchestrator, task_id: int, language: str
     sys.exit(0 if success else 1)
 
 
-def execute_workflow_cmd(orchestrator: TaskOrchestrator, project_id: int, language: str):
+def execute_workflow_cmd(orchestrator: TaskOrchestrator, project_id: int, language: str,
+                         max_concurrency: int = 2, failure_policy: str = 'fail_fast'):
     """Execute a workflow for a project."""
-    results = orchestrator.execute_workflow(project_id, language)
+    results = orchestrator.execute_workflow(project_id, language, max_concurrency, failure_policy)
     sys.exit(0 if results['failed'] == 0 else 1)
 
 
@@ -141,10 +147,10 @@ def check_status(db: Database, claude_client: Optional[ClaudeClient],
     
     # Database
     projects = db.list_projects()
-    tasks = db.list_tasks()
+    task_stats = db.get_task_stats()
     print(f"📊 Database: OK")
     print(f"   Projects: {len(projects)}")
-    print(f"   Tasks: {len(tasks)}")
+    print(f"   Tasks: {task_stats['total']}")
     
     # Claude CLI
     if claude_client:
@@ -178,11 +184,12 @@ Examples:
   # Create tasks
   python agent7.py create-task 1 --type planning --title "Plan architecture" --desc "Design system architecture"
   python agent7.py create-task 1 --type coding --title "Build API" --desc "Create REST API endpoints"
-  python agent7.py create-task 1 --type testing --title "Test API" --desc "Write tests for API"
+  python agent7.py create-task 1 --type testing --title "Test API" --desc "Write tests for API" --depends-on 2
   
   # Execute tasks
   python agent7.py execute-task 1
   python agent7.py execute-workflow 1
+  python agent7.py execute-workflow 1 --max-concurrency 4 --failure-policy continue
   
   # View information
   python agent7.py list-projects
@@ -206,6 +213,8 @@ Examples:
                        help='Disable Claude CLI')
     parser.add_argument('--no-local-llm', action='store_true',
                        help='Disable local LLM')
+    parser.add_argument('--llm-cache', metavar='PATH',
+                       help='Cache deterministic local LLM calls in this SQLite file')
     
     # Task execution options
     parser.add_argument('--language', default='python', help='Programming language')
@@ -217,6 +226,14 @@ Examples:
     parser.add_argument('--status', choices=['pending', 'in_progress', 'completed', 'failed'],
                        help='Filter by status')
     parser.add_argument('--project', type=int, help='Project ID filter')
+    parser.add_argument('--depends-on', type=int, nargs='+', metavar='TASK_ID',
+                       help='Tasks that must complete before this one')
+    
+    # Workflow options
+    parser.add_argument('--max-concurrency', type=int, default=2,
+                       help='Workflow tasks executed at the same time')
+    parser.add_argument('--failure-policy', choices=['fail_fast', 'continue'], default='fail_fast',
+                       help='Stop the workflow on the first failure, or only skip dependent tasks')
     
     args = parser.parse_args()
     
@@ -225,7 +242,8 @@ Examples:
     
     # Initialize clients
     claude_client = None if args.no_claude else ClaudeClient(args.claude_cli)
-    local_llm_client = None if args.no_local_llm else LocalLLMClient(args.local_llm_url)
+    llm_cache = ResponseCache(args.llm_cache) if args.llm_cache else None
+    local_llm_client = None if args.no_local_llm else LocalLLMClient(args.local_llm_url, cache=llm_cache)
     
     # Initialize orchestrator
     orchestrator = TaskOrchestrator(
@@ -254,7 +272,8 @@ Examples:
             print("Usage: create-task <project_id> --type <type> --title <title> --desc <description>")
             sys.exit(1)
         project_id = int(args.args[0])
-        create_task(db, project_id, args.title, args.description or "", args.type, args.priority)
+        create_task(db, project_id, args.title, args.description or "", args.type, args.priority,
+                    args.depends_on)
     
     elif cmd == 'list-tasks':
         list_tasks(db, args.project, args.status)
@@ -278,7 +297,8 @@ Examples:
             print("Usage: execute-workflow <project_id>")
             sys.exit(1)
         project_id = int(args.args[0])
-        execute_workflow_cmd(orchestrator, project_id, args.language)
+        execute_workflow_cmd(orchestrator, project_id, args.language,
+                             args.max_concurrency, args.failure_policy)
     
     elif cmd == 'status':
         check_status(db, claude_client, local_llm_client)
@@ -0,0 +1,357 @@
+"""
+Async local LLM client for LM Studio integration.
+
+Asyncio counterpart to LocalLLMClient: one event loop can drive many
+concurrent chat sessions and task executions without a thread per call.
+"""
+import asyncio
+import inspect
+import json
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
+from local_llm_client import LocalLLMClient
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency, only needed for async execution
+    aiohttp = None
+
+
+class AsyncLocalLLMClient:
+    """Asyncio client for interacting with local LLM via OpenAI-compatible API."""
+    
+    def __init__(self, base_url: str = "http://localhost:1234/v1",
+                 max_concurrency: int = 4,
+                 pool_size: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 300.0):
+        """
+        Initialize async local LLM client.
+        
+        Args:
+            base_url: Base URL for the local LLM API
+            max_concurrency: Maximum number of in-flight completions
+            pool_size: Maximum number of pooled connections to LM Studio
+            connect_timeout: Seconds to wait for a connection to open
+            read_timeout: Seconds to wait for response data
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncLocalLLMClient requires aiohttp. Install it with: pip install aiohttp"
+            )
+        
+        self.base_url = base_url.rstrip('/')
+        self.chat_endpoint = f"{self.base_url}/chat/completions"
+        self.completions_endpoint = f"{self.base_url}/completions"
+        
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        
+        self._session = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Create the pooled session lazily inside the running event loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout
+                )
+            )
+        return self._session
+    
+    async def close(self):
+        """Close all pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+    
+    async def send_message(self, prompt: str,
+                           system_prompt: Optional[str] = None,
+                           model: str = "local-model",
+                           max_tokens: int = 2048,
+                           temperature: float = 0.7,
+                           history: Optional[List[Dict]] = None,
+                           stream_callback: Optional[Callable[[str], Any]] = None,
+                           timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send a message to the local LLM.
+        
+        Cancelling the calling task aborts the request and closes the
+        connection, which makes LM Studio stop generating.
+        
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt
+            model: Model name (for LM Studio, usually doesn't matter)
+            max_tokens: Maximum tokens in response
+            temperature: Temperature for generation
+            history: Optional conversation history
+            stream_callback: Optional callable (or coroutine function)
+                receiving each text delta. Return False to abort.
+            timeout: Optional overall timeout in seconds
+        
+        Returns:
+            Dict with 'response', 'usage', and 'metadata' keys
+        """
+        try:
+            async with self._semaphore:
+                if stream_callback:
+                    coro = self._send_streaming(
+                        prompt, system_prompt, model, max_tokens, temperature,
+                        history, stream_callback
+                    )
+                else:
+                    coro = self._send(
+                        prompt, system_prompt, model, max_tokens, temperature, history
+                    )
+                return await asyncio.wait_for(coro, timeout)
+        
+        except asyncio.TimeoutError:
+            return {
+                'response': None,
+                'error': 'Request timed out',
+                'metadata': {'success': False}
+            }
+        except aiohttp.ClientConnectionError:
+            return {
+                'response': None,
+                'error': 'Could not connect to local LLM. Is LM Studio running?',
+                'metadata': {'success': False}
+            }
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {
+                'response': None,
+                'error': str(e),
+                'metadata': {'success': False}
+            }
+    
+    async def _send(self, prompt: str,
+                    system_prompt: Optional[str],
+                    model: str,
+                    max_tokens: int,
+                    temperature: float,
+                    history: Optional[List[Dict]]) -> Dict[str, Any]:
+        """Run a single non-streaming completion."""
+        payload = {
+            "model": model,
+            "messages": LocalLLMClient.build_messages(prompt, system_prompt, history),
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": False
+        }
+        
+        async with self._get_session().post(self.chat_endpoint, json=payload) as response:
+            if response.status != 200:
+                text = await response.text()
+                return {
+                    'response': None,
+                    'error': f"API error: {response.status} - {text}",
+                    'metadata': {'success': False}
+                }
+            
+            data = await response.json(content_type=None)
+        
+        return {
+            'response': data['choices'][0]['message']['content'],
+            'usage': data.get('usage', {}),
+            'metadata': {
+                'success': True,
+                'model': data.get('model', model),
+                'finish_reason': data['choices'][0].get('finish_reason')
+            }
+        }
+    
+    async def stream_message(self, prompt: str,
+                             system_prompt: Optional[str] = None,
+                             model: str = "local-model",
+                             max_tokens: int = 2048,
+                             temperature: float = 0.7,
+                             history: Optional[List[Dict]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a completion from the local LLM as server-sent events.
+        
+        Yields:
+            Dicts with a 'delta' text chunk, plus 'finish_reason', 'usage'
+            and 'model' when the server sends them
+        """
+        payload = {
+            "model": model,
+            "messages": LocalLLMClient.build_messages(prompt, system_prompt, history),
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        async with self._get_session().post(self.chat_endpoint, json=payload) as response:
+            if response.status != 200:
+                text = await response.text()
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status,
+                    message=f"API error: {response.status} - {text}"
+                )
+            
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                
+                choices = chunk.get('choices') or [{}]
+                yield {
+                    'delta': choices[0].get('delta', {}).get('content') or '',
+                    'finish_reason': choices[0].get('finish_reason'),
+                    'usage': chunk.get('usage'),
+                    'model': chunk.get('model')
+                }
+    
+    async def _send_streaming(self, prompt: str,
+                              system_prompt: Optional[str],
+                              model: str,
+                              max_tokens: int,
+                              temperature: float,
+                              history: Optional[List[Dict]],
+                              stream_callback: Callable[[str], Any]) -> Dict[str, Any]:
+        """Run stream_message and collect the deltas into a send_message result."""
+        parts = []
+        usage = {}
+        finish_reason = None
+        response_model = model
+        
+        stream = self.stream_message(
+            prompt,
+            system_prompt=system_prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            history=history
+        )
+        
+        try:
+            async for chunk in stream:
+                if chunk['usage']:
+                    usage = chunk['usage']
+                if chunk['model']:
+                    response_model = chunk['model']
+                if chunk['finish_reason']:
+                    finish_reason = chunk['finish_reason']
+                
+                if chunk['delta']:
+                    parts.append(chunk['delta'])
+                    keep_going = stream_callback(chunk['delta'])
+                    if inspect.isawaitable(keep_going):
+                        keep_going = await keep_going
+                    if keep_going is False:
+                        finish_reason = 'aborted'
+                        break
+        except aiohttp.ClientResponseError as e:
+            return {
+                'response': None,
+                'error': e.message,
+                'metadata': {'success': False}
+            }
+        finally:
+            await stream.aclose()
+        
+        return {
+            'response': ''.join(parts),
+            'usage': usage,
+            'metadata': {
+                'success': True,
+                'model': response_model,
+                'finish_reason': finish_reason,
+                'streamed': True
+            }
+        }
+    
+    async def simple_prompt(self, prompt: str, **kwargs) -> Optional[str]:
+        """
+        Send a simple prompt and return just the response text.
+        
+        Args:
+            prompt: The prompt to send
+            **kwargs: Additional arguments to pass to send_message
+        
+        Returns:
+            Response text or None if error
+        """
+        result = await self.send_message(prompt, **kwargs)
+        return result.get('response')
+    
+    async def code_generation(self, specification: str, language: str = "python") -> Dict[str, Any]:
+        """
+        Generate code using the local LLM.
+        
+        Args:
+            specification: Code specification
+            language: Programming language
+        
+        Returns:
+            Dict with response and metadata
+        """
+        system_prompt, prompt = LocalLLMClient.build_code_generation_prompt(specification, language)
+        
+        return await self.send_message(
+            prompt,
+            system_prompt=system_prompt,
+            temperature=0.3,
+            max_tokens=4096
+        )
+    
+    async def code_review(self, code: str, context: str = "") -> Dict[str, Any]:
+        """
+        Review code using the local LLM.
+        
+        Args:
+            code: Code to review
+            context: Additional context
+        
+        Returns:
+            Dict with response and metadata
+        """
+        system_prompt, prompt = LocalLLMClient.build_code_review_prompt(code, context)
+        
+        return await self.send_message(
+            prompt,
+            system_prompt=system_prompt,
+            temperature=0.5,
+            max_tokens=2048
+        )
+    
+    async def check_availability(self) -> bool:
+        """
+        Check if the local LLM is available.
+        
+        Returns:
+            True if available, False otherwise
+        """
+        try:
+            session = self._get_session()
+            async with session.get(
+                f"{self.base_url}/models",
+                timeout=aiohttp.ClientTimeout(total=5, sock_connect=self.connect_timeout)
+            ) as response:
+                return response.status == 200
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
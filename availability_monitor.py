@@ -0,0 +1,97 @@
+"""
+Availability Monitor - Background health check with a cached result.
+
+Runs one health check on a fixed interval in a daemon thread and keeps
+the last result, so callers (status endpoints, every open dashboard)
+read a cached value instead of making their own HTTP round trip. A
+callback fires only when availability changes.
+"""
+import threading
+import time
+from typing import Callable, Optional, Dict, Any
+
+
+class AvailabilityMonitor:
+    """Periodically checks a service and caches whether it is available."""
+    
+    def __init__(self, check: Callable[[], bool], interval: float = 15.0,
+                 on_change: Optional[Callable[[bool], None]] = None):
+        """
+        Initialize monitor. Call start() to begin checking.
+        
+        Args:
+            check: Health check returning True if the service is available
+            interval: Seconds between checks
+            on_change: Called with the new availability when it changes
+        """
+        self.check = check
+        self.interval = interval
+        self.on_change = on_change
+        
+        self._available = None
+        self._last_checked = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def available(self) -> bool:
+        """Last known availability (checks once if nothing is cached yet)."""
+        with self._lock:
+            available = self._available
+        if available is None:
+            return self.check_now()
+        return available
+    
+    def check_now(self) -> bool:
+        """
+        Run the health check immediately and update the cached result.
+        
+        Returns:
+            Current availability
+        """
+        try:
+            available = bool(self.check())
+        except Exception:
+            available = False
+        
+        with self._lock:
+            changed = available != self._available
+            self._available = available
+            self._last_checked = time.time()
+        
+        if changed and self.on_change:
+            try:
+                self.on_change(available)
+            except Exception as e:
+                print(f"⚠️  Availability callback failed: {e}")
+        return available
+    
+    def start(self):
+        """Start checking in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_now()
+            self._stop.wait(self.interval)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get the cached availability and when it was last checked."""
+        with self._lock:
+            return {
+                'available': bool(self._available),
+                'last_checked': self._last_checked,
+                'interval': self.interval
+            }
@@ -0,0 +1,420 @@
+"""
+Block Parser - Single-pass, streaming recognizer for blocks in LLM output.
+
+Recognizes, line by line and in one pass:
+- file blocks: a "File: path" style header (or a "# path" first line)
+  followed by a code fence
+- edit blocks: SEARCH/REPLACE blocks and unified diffs, passed on as text
+  for edit_blocks.extract_edit_blocks
+- tool calls: JSON calls, TOOL: markers, natural-language mentions and
+  function-call syntax
+
+Text can be fed in arbitrary chunks as it streams from the model. Each
+block is returned by feed() as soon as its last line is complete, so a
+caller can act on it (e.g. start a tool call) before generation ends.
+"""
+import json
+import re
+from typing import List, Dict, Any, Optional, Iterable
+from edit_blocks import SEARCH_MARKER, REPLACE_MARKER, BARE_PATH, FENCE, looks_like_edit
+
+
+# Markdown heading or list marker a header may start with: "### ", "1. ", "- "
+HEADER_PREFIX = r'^\s*(?:#{1,6}\s*|[-*+]\s+|\d+[.)]\s+)?'
+# "File: app.py", "**Create file: app.py**", "### Edit: app.py"
+HEADER = re.compile(
+    HEADER_PREFIX + r'\*{0,2}(File|Create file|Modify file|Create|Edit|Edit file|Patch):\s*'
+    r'[`"\']?([^\n*`"\']+?\.[\w]+)[`"\']?\*{0,2}\s*$',
+    re.IGNORECASE
+)
+# Create `main.py`:
+QUOTED_HEADER = re.compile(HEADER_PREFIX + r'(?:Create|Update|Modify)\s+[`"\']([^\n`"\']+?\.[\w]+)[`"\']:\s*$',
+                           re.IGNORECASE)
+EDIT_KEYWORDS = ('edit', 'edit file', 'patch')
+# First line of a fence naming its file: "# main.py"
+COMMENT_PATH = re.compile(r'^#\s*([^\n]+?\.[\w]+)\s*$')
+# Lines that continue a unified diff
+DIFF_LINE = re.compile(r'^(?:[ +\-\\]|@@|$)')
+
+JSON_CALL = re.compile(r'\{\s*"name"\s*:')
+TOOL_MARKER = re.compile(r'TOOL:\s*(\w+)\(', re.IGNORECASE)
+NATURAL_LANGUAGE = re.compile(r'(?:I need to use|Let me use|I\'ll use|Using)\s+(\w+)', re.IGNORECASE)
+FUNCTION_CALL = re.compile(r'(\w+)\(')
+# Bare function calls only count once the output contains one of these
+CODE_CONTEXT = ('```', 'TOOL:', 'USE:')
+
+
+def _call_args(line: str, start: int) -> Optional[str]:
+    """Text from start up to the ')' closing the call, if it closes on this line."""
+    depth = 1
+    quote = None
+    escape = False
+    for i in range(start, len(line)):
+        char = line[i]
+        if quote:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+            if depth == 0:
+                return line[start:i]
+    return None
+
+
+class BlockParser:
+    """
+    Incremental state machine over the lines of an LLM response.
+    
+    Emitted blocks are dicts with a 'type':
+    - 'file': 'filepath', 'content' and 'operation' ('create')
+    - 'edit': 'text' holding one SEARCH/REPLACE block or diff, with an
+      "Edit: path" header when the path came from outside the block
+    - 'tool': 'tool', 'pattern' and 'args_dict', 'args_str' or 'context'
+      (the request shape used by ToolExecutor)
+    """
+    
+    def __init__(self, tool_names: Optional[Iterable[str]] = None):
+        """
+        Initialize parser.
+        
+        Args:
+            tool_names: Names of callable tools; calls to other names are
+                ignored (no tool detection if empty)
+        """
+        self.tool_names = set(tool_names or ())
+        self.blocks = []
+        
+        self._buffer = ''
+        self._state = 'text'
+        self._block = None
+        self._held = None           # "--- " line that may start a diff
+        self._file_path = None      # From a header directly above a fence
+        self._edit_path = None      # From the last header, for later edits
+        self._previous = ''         # Last non-blank line outside blocks
+        self._file_paths = set()
+        self._json = None           # Partial JSON tool call spanning lines
+        self._code_context = False
+        self._pending_calls = []    # Function calls waiting for a code context
+        self._closed = False
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Parse the next piece of text.
+        
+        Args:
+            chunk: Text in arrival order; may end mid-line
+        
+        Returns:
+            Blocks completed by this chunk, in order
+        """
+        self._buffer += chunk
+        completed = []
+        while True:
+            newline = self._buffer.find('\n')
+            if newline < 0:
+                break
+            line = self._buffer[:newline]
+            self._buffer = self._buffer[newline + 1:]
+            completed.extend(self._line(line.rstrip('\r')))
+        return completed
+    
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Finish parsing. The last line needs no trailing newline.
+        
+        Returns:
+            Blocks completed by the end of the text
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        completed = []
+        if self._buffer:
+            line, self._buffer = self._buffer, ''
+            completed.extend(self._line(line.rstrip('\r')))
+        
+        if self._state == 'fence':
+            # An unterminated fence still holds a usable file or edit
+            completed.extend(self._finish_fence())
+        elif self._state == 'diff':
+            completed.extend(self._finish_edit())
+        elif self._state == 'maybe_diff':
+            self._state = 'text'
+            completed.extend(self._text_line_body(self._held))
+        self._state = 'text'
+        self._block = None
+        return completed
+    
+    def parse(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Parse a complete response.
+        
+        Args:
+            text: LLM output
+        
+        Returns:
+            All blocks in order of completion
+        """
+        self.feed(text)
+        self.close()
+        return self.blocks
+    
+    def _emit(self, block: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.blocks.append(block)
+        return [block]
+    
+    def _line(self, line: str) -> List[Dict[str, Any]]:
+        if self._state == 'fence':
+            return self._fence_line(line)
+        if self._state == 'search_replace':
+            self._block['lines'].append(line)
+            return self._finish_edit() if REPLACE_MARKER.match(line) else []
+        if self._state == 'diff':
+            if DIFF_LINE.match(line) and not FENCE.match(line):
+                self._block['lines'].append(line)
+                return []
+            return self._finish_edit() + self._line(line)
+        return self._text_line(line)
+    
+    def _text_line(self, line: str) -> List[Dict[str, Any]]:
+        completed = self._tool_calls(line)
+        
+        # A "--- a/x" line starts a diff only if "+++ b/x" follows
+        if self._state == 'maybe_diff':
+            self._state = 'text'
+            if line.startswith('+++ '):
+                self._state = 'diff'
+                self._block = {'lines': [self._held, line]}
+                return completed
+            completed.extend(self._text_line_body(self._held))
+        
+        if line.startswith('--- '):
+            self._state = 'maybe_diff'
+            self._held = line
+            return completed
+        
+        return completed + self._text_line_body(line)
+    
+    def _text_line_body(self, line: str) -> List[Dict[str, Any]]:
+        header = HEADER.match(line) or QUOTED_HEADER.match(line)
+        if header:
+            path = header.group(header.lastindex).strip()
+            keyword = header.group(1).lower() if header.re is HEADER else 'create'
+            self._file_path = None if keyword in EDIT_KEYWORDS else path
+            self._edit_path = path
+            self._previous = line
+            return []
+        
+        if FENCE.match(line):
+            # A path line directly above takes over from an earlier header
+            bare = BARE_PATH.match(self._previous)
+            self._state = 'fence'
+            self._block = {
+                'filepath': self._file_path,
+                'edit_path': (bare.group(1) if bare else None) or self._edit_path,
+                'header': self._file_path is not None,
+                'lines': [],
+                'first': True
+            }
+            self._file_path = None
+            self._previous = ''
+            return []
+        
+        if SEARCH_MARKER.match(line):
+            bare = BARE_PATH.match(self._previous)
+            if bare:
+                self._edit_path = bare.group(1)
+            path = self._edit_path
+            self._previous = ''
+            self._state = 'search_replace'
+            self._block = {'lines': ([f"Edit: {path}"] if path else []) + [line]}
+            return []
+        
+        if line.strip():
+            # A file header must sit directly above its fence
+            self._file_path = None
+            self._previous = line
+        return []
+    
+    def _fence_line(self, line: str) -> List[Dict[str, Any]]:
+        block = self._block
+        if FENCE.match(line):
+            return self._finish_fence()
+        
+        if block['first']:
+            block['first'] = False
+            comment = COMMENT_PATH.match(line)
+            if block['filepath'] is None and comment:
+                block['filepath'] = comment.group(1).strip()
+                return []
+        block['lines'].append(line)
+        
+        if block['filepath'] is None:
+            # Tool calls are often fenced; file contents are never scanned
+            return self._tool_calls(line)
+        return []
+    
+    def _finish_fence(self) -> List[Dict[str, Any]]:
+        block = self._block
+        self._state = 'text'
+        self._block = None
+        content = '\n'.join(block['lines'])
+        
+        if looks_like_edit(content):
+            path = block['edit_path'] or block['filepath']
+            if block['edit_path']:
+                self._edit_path = block['edit_path']
+            return self._emit({'type': 'edit', 'text': f"Edit: {path}\n{content}" if path else content})
+        
+        # A whole-file block ends an edit header's scope
+        if block['edit_path'] == self._edit_path:
+            self._edit_path = None
+        
+        filepath = block['filepath']
+        if not filepath:
+            return []
+        filepath = filepath.strip('`').strip('"').strip("'").strip('*')
+        # Explicit headers always count; "# path" blocks only name a new file
+        if not block['header'] and filepath in self._file_paths:
+            return []
+        self._file_paths.add(filepath)
+        return self._emit({
+            'type': 'file',
+            'filepath': filepath,
+            'content': content.strip(),
+            'operation': 'create'
+        })
+    
+    def _finish_edit(self) -> List[Dict[str, Any]]:
+        block = self._block
+        self._state = 'text'
+        self._block = None
+        return self._emit({'type': 'edit', 'text': '\n'.join(block['lines'])})
+    
+    def _tool_calls(self, line: str) -> List[Dict[str, Any]]:
+        if not self.tool_names:
+            return []
+        completed = []
+        
+        if self._json is not None:
+            completed.extend(self._scan_json(line + '\n'))
+        else:
+            match = JSON_CALL.search(line)
+            if match:
+                completed.extend(self._scan_json(line[match.start():] + '\n'))
+        
+        explicit = set()
+        for match in TOOL_MARKER.finditer(line):
+            args = _call_args(line, match.end())
+            if args is not None and match.group(1) in self.tool_names:
+                explicit.add(match.start(1))
+                completed.extend(self._emit({
+                    'type': 'tool',
+                    'tool': match.group(1),
+                    'args_str': args,
+                    'pattern': 'explicit'
+                }))
+        
+        for match in NATURAL_LANGUAGE.finditer(line):
+            if match.group(1) in self.tool_names:
+                end = line.find('.', match.end())
+                context = line[match.start():end + 1] if end >= 0 else line[match.start():] + '\n'
+                completed.extend(self._emit({
+                    'type': 'tool',
+                    'tool': match.group(1),
+                    'context': context,
+                    'pattern': 'natural_language'
+                }))
+        
+        for match in FUNCTION_CALL.finditer(line):
+            if match.group(1) not in self.tool_names or match.start(1) in explicit:
+                continue
+            args = _call_args(line, match.end())
+            if args is not None:
+                self._pending_calls.append({
+                    'type': 'tool',
+                    'tool': match.group(1),
+                    'args_str': args,
+                    'pattern': 'function_call'
+                })
+        
+        if any(marker in line for marker in CODE_CONTEXT):
+            self._code_context = True
+        if self._code_context and self._pending_calls:
+            for call in self._pending_calls:
+                completed.extend(self._emit(call))
+            self._pending_calls = []
+        return completed
+    
+    def _scan_json(self, text: str) -> List[Dict[str, Any]]:
+        """Feed text to the pending JSON call until its braces balance."""
+        if self._json is None:
+            self._json = {'text': [], 'depth': 0, 'quote': False, 'escape': False}
+        state = self._json
+        for i, char in enumerate(text):
+            state['text'].append(char)
+            if state['quote']:
+                if state['escape']:
+                    state['escape'] = False
+                elif char == '\\':
+                    state['escape'] = True
+                elif char == '"':
+                    state['quote'] = False
+            elif char == '"':
+                state['quote'] = True
+            elif char == '{':
+                state['depth'] += 1
+            elif char == '}':
+                state['depth'] -= 1
+                if state['depth'] == 0:
+                    self._json = None
+                    completed = self._json_call(''.join(state['text']))
+                    # Several calls may share a line: [{...}, {...}]
+                    rest = text[i + 1:]
+                    match = JSON_CALL.search(rest)
+                    if match:
+                        completed.extend(self._scan_json(rest[match.start():]))
+                    return completed
+        return []
+    
+    def _json_call(self, text: str) -> List[Dict[str, Any]]:
+        try:
+            call = json.loads(text)
+        except json.JSONDecodeError:
+            return []
+        arguments = call.get('arguments', {})
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except json.JSONDecodeError:
+                return []
+        if call.get('name') not in self.tool_names or not isinstance(arguments, dict):
+            return []
+        return self._emit({
+            'type': 'tool',
+            'tool': call['name'],
+            'args_dict': arguments,
+            'pattern': 'json'
+        })
+
+
+def parse_blocks(text: str, tool_names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Parse a complete response in one pass.
+    
+    Args:
+        text: LLM output
+        tool_names: Names of callable tools
+    
+    Returns:
+        File, edit and tool blocks in order of completion
+    """
+    return BlockParser(tool_names).parse(text)
@@ -7,27 +7,150 @@ Allows users to chat with LM Studio which can:
 - Execute tasks
 - Provide project status
 """
+import json
 import re
 from typing import Dict, Any, Optional, List
 from local_llm_client import LocalLLMClient
 from database import Database
 
 
+# JSON schema of each action the model may request
+ACTION_SCHEMAS = {
+    'create_task': {
+        'type': 'object',
+        'properties': {
+            'action': {'type': 'string', 'enum': ['create_task']},
+            'title': {'type': 'string'},
+            'type': {'type': 'string', 'enum': ['planning', 'coding', 'testing']},
+            'description': {'type': 'string'},
+            'priority': {'type': 'integer'}
+        },
+        'required': ['action', 'title', 'type', 'description', 'priority'],
+        'additionalProperties': False
+    },
+    'execute_task': {
+        'type': 'object',
+        'properties': {
+            'action': {'type': 'string', 'enum': ['execute_task']},
+            'task_id': {'type': 'integer'}
+        },
+        'required': ['action', 'task_id'],
+        'additionalProperties': False
+    },
+    'list_tasks': {
+        'type': 'object',
+        'properties': {
+            'action': {'type': 'string', 'enum': ['list_tasks']},
+            'filter': {'type': 'string', 'enum': ['all', 'pending', 'in_progress', 'completed', 'failed']}
+        },
+        'required': ['action', 'filter'],
+        'additionalProperties': False
+    }
+}
+
+# Whole reply in structured mode: the text to show plus the actions to run
+REPLY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'reply': {'type': 'string'},
+        'actions': {'type': 'array', 'items': {'anyOf': list(ACTION_SCHEMAS.values())}}
+    },
+    'required': ['reply', 'actions'],
+    'additionalProperties': False
+}
+
+RESPONSE_FORMAT = {
+    'type': 'json_schema',
+    'json_schema': {'name': 'agent7_chat_reply', 'strict': True, 'schema': REPLY_SCHEMA}
+}
+
+STRUCTURED_OUTPUT_PROMPT = """TASK MANAGEMENT COMMANDS:
+Your whole answer is one JSON object: {"reply": "...", "actions": [...]}.
+Put what you say to the user in "reply" (no JSON blocks or command labels
+there) and one object per command in "actions". Use an empty list when no
+action is needed.
+
+CREATE_TASK: {"action": "create_task", "title": "Task title here", "type": "coding", "description": "Detailed description of what to do", "priority": 1}
+EXECUTE_TASK: {"action": "execute_task", "task_id": 123}
+LIST_TASKS: {"action": "list_tasks", "filter": "all"}
+
+EXAMPLES:
+
+User: "I want to create a Pong game"
+You: {"reply": "I'll help you create that! I've set up a planning task. Should I execute it now?", "actions": [{"action": "create_task", "title": "Plan Pong Game", "type": "planning", "description": "Create detailed plan for Pong game with requirements, architecture, and TODO list", "priority": 1}]}
+
+User: "Yes, execute it"
+You: {"reply": "Task execution started! I'll let you know when it's complete.", "actions": [{"action": "execute_task", "task_id": 1}]}
+
+User: "Thanks!"
+You: {"reply": "You're welcome!", "actions": []}"""
+
+JSON_TYPES = {'object': dict, 'array': list, 'string': str, 'integer': int, 'boolean': bool}
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = '$') -> List[str]:
+    """
+    Check a value against the subset of JSON schema used by REPLY_SCHEMA.
+    
+    Args:
+        value: Decoded JSON value
+        schema: Schema with type, enum, properties, required,
+            additionalProperties, items and anyOf
+        path: Location of value, for error messages
+    
+    Returns:
+        Error messages (empty if the value is valid)
+    """
+    if 'anyOf' in schema:
+        for option in schema['anyOf']:
+            if not validate(value, option, path):
+                return []
+        return [f"{path}: matches none of the allowed shapes"]
+    
+    expected = JSON_TYPES.get(schema.get('type'))
+    if expected and (not isinstance(value, expected)
+                     or (expected is int and isinstance(value, bool))):
+        return [f"{path}: expected {schema['type']}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path}: must be one of {schema['enum']}"]
+    
+    errors = []
+    if isinstance(value, dict):
+        properties = schema.get('properties', {})
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{path}.{key}: required")
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(validate(item, properties[key], f"{path}.{key}"))
+            elif schema.get('additionalProperties') is False:
+                errors.append(f"{path}.{key}: unexpected property")
+    elif isinstance(value, list) and 'items' in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema['items'], f"{path}[{i}]"))
+    return errors
+
+
 class ChatAgent:
     """
     Conversational agent that can chat with users and manage tasks.
     """
     
-    def __init__(self, llm_client: LocalLLMClient, db: Database):
+    def __init__(self, llm_client: LocalLLMClient, db: Database,
+                 structured_output: bool = True):
         """
         Initialize chat agent.
         
         Args:
             llm_client: LM Studio client
             db: Database for task management
+            structured_output: Constrain replies to REPLY_SCHEMA with the
+                server's response_format, so actions arrive as validated
+                JSON; text replies are still parsed when it isn't supported
         """
         self.llm = llm_client
         self.db = db
+        self.structured_output = structured_output
         self.conversation_history = []
     
     def get_system_prompt(self) -> str:
@@ -37,16 +160,10 @@ class ChatAgent:
         Returns:
             System prompt string
         """
-        return """You are Agent7's conversational assistant - a helpful AI that manages software development tasks.
-
-Your capabilities:
-1. **Chat**: Have natural conversations with users about their projects
-2. **Create Tasks**: Parse user requests and create tasks
-3. **Execute Tasks**: Trigger task execution when appropriate
-4. **Status**: Provide updates on project status and task progress
-5. **Guidance**: Help users structure their work effectively
-
-TASK MANAGEMENT COMMANDS:
+        if self.structured_output:
+            commands = STRUCTURED_OUTPUT_PROMPT
+        else:
+            commands = """TASK MANAGEMENT COMMANDS:
 When the user wants to create or execute tasks, you MUST respond with special commands.
 
 ⚠️ CRITICAL: You MUST include the full JSON block after the command label. Just saying "CREATE_TASK:" without the JSON will NOT work!
@@ -123,7 +240,18 @@ You: LIST_TASKS:
 }
 ```
 
----
+---"""
+        
+        return """You are Agent7's conversational assistant - a helpful AI that manages software development tasks.
+
+Your capabilities:
+1. **Chat**: Have natural conversations with users about their projects
+2. **Create Tasks**: Parse user requests and create tasks
+3. **Execute Tasks**: Trigger task execution when appropriate
+4. **Status**: Provide updates on project status and task progress
+5. **Guidance**: Help users structure their work effectively
+
+""" + commands + """
 
 Be conversational, helpful, and proactive. When users describe what they want, create appropriate tasks automatically.
 
@@ -162,8 +290,7 @@ Always confirm before executing tasks."""
             context += f"\nCurrent project: {project_directory}"
         
         # Get recent tasks
-        all_tasks = self.db.list_tasks()
-        tasks = all_tasks[:5] if all_tasks else []
+        tasks = self.db.list_tasks(limit=5, columns=['id', 'title', 'status'])
         if tasks:
             context += f"\n\nRecent tasks:"
             for task in tasks:
@@ -179,7 +306,8 @@ Always confirm before executing tasks."""
             system_prompt=self.get_system_prompt(),
             temperature=0.7,
             max_tokens=1024,
-            history=self.conversation_history
+            history=self.conversation_history,
+            response_format=RESPONSE_FORMAT if self.structured_output else None
         )
         
         if not response.get('response'):
@@ -197,11 +325,17 @@ Always confirm before executing tasks."""
             'content': assistant_response
         })
         
-        # Parse actions from response
-        actions = self.parse_actions(assistant_response)
+        # Structured replies carry validated actions; otherwise parse the text
+        structured = self.parse_structured_reply(assistant_response) if self.structured_output else None
+        if structured is not None:
+            assistant_response = structured['reply']
+            actions = structured['actions']
+            used_fallback = False
+        else:
+            actions = self.parse_actions(assistant_response)
         
-        # Check if fallback parsing was used
-        used_fallback = '```json' not in assistant_response and len(actions) > 0
+            # Check if fallback parsing was used
+            used_fallback = '```json' not in assistant_response and len(actions) > 0
         
         # Add project_id to actions if provided
         if project_id:
@@ -228,10 +362,43 @@ Always confirm before executing tasks."""
             'actions': action_results,
             'metadata': {
                 'success': True,
-                'actions_count': len(actions)
+                'actions_count': len(actions),
+                'structured': structured is not None
             }
         }
     
+    def parse_structured_reply(self, response: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse a reply produced under RESPONSE_FORMAT.
+        
+        Args:
+            response: LM Studio's response
+        
+        Returns:
+            Dict with 'reply' and 'actions', or None if the response is not
+            a JSON object of that shape (e.g. the server ignored the format)
+        """
+        try:
+            reply = json.loads(response)
+        except json.JSONDecodeError:
+            return None
+        if (not isinstance(reply, dict) or not isinstance(reply.get('reply'), str)
+                or not isinstance(reply.get('actions'), list)):
+            return None
+        
+        # Validate each action on its own, so one malformed action doesn't
+        # discard the others
+        actions = []
+        for i, action in enumerate(reply['actions']):
+            schema = ACTION_SCHEMAS.get(action.get('action')) if isinstance(action, dict) else None
+            errors = validate(action, schema, f"$.actions[{i}]") if schema else [
+                f"$.actions[{i}]: unknown action"]
+            if errors:
+                actions.append({'action': 'invalid', 'errors': errors})
+            else:
+                actions.append(action)
+        return {'reply': reply['reply'], 'actions': actions}
+    
     def parse_actions(self, response: str) -> List[Dict[str, Any]]:
         """
         Parse action commands from LM Studio's response.
@@ -251,7 +418,6 @@ Always confirm before executing tasks."""
         
         for match in matches:
             try:
-                import json
                 action = json.loads(match)
                 if 'action' in action:
                     actions.append(action)
@@ -275,7 +441,6 @@ Always confirm before executing tasks."""
             List of extracted action dictionaries
         """
         actions = []
-        import json
         
         # Look for "CREATE_TASK:" without JSON
         if 'CREATE_TASK:' in response or 'create a task' in response.lower():
@@ -353,7 +518,13 @@ Always confirm before executing tasks."""
         """
         action_type = action.get('action')
         
-        if action_type == 'create_task':
+        if action_type == 'invalid':
+            return {
+                'success': False,
+                'action': action_type,
+                'error': f"Invalid action: {'; '.join(action['errors'])}"
+            }
+        elif action_type == 'create_task':
             return self.action_create_task(action)
         elif action_type == 'execute_task':
             return self.action_execute_task(action)
@@ -450,14 +621,9 @@ Always confirm before executing tasks."""
         """
         filter_type = action.get('filter', 'all')
         
-        # Get tasks (limited to 20 most recent)
-        all_tasks = self.db.list_tasks()[:20]
-        
-        # Filter if needed
-        if filter_type != 'all':
-            filtered_tasks = [t for t in all_tasks if t['status'] == filter_type]
-        else:
-            filtered_tasks = all_tasks
+        # Get tasks (limited to 20), filtered in SQL if needed
+        status = filter_type if filter_type != 'all' else None
+        filtered_tasks = self.db.list_tasks(status=status, limit=20)
         
         return {
             'success': True,
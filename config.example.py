@@ -23,7 +23,6 @@ DEFAULT_MAX_TOKENS = 4096
 DEFAULT_TEMPERATURE = 0.7
 
 # Task execution settings
-TASK_EXECUTION_DELAY = 1  # seconds between tasks in workflow
 REQUEST_TIMEOUT = 300  # seconds (5 minutes)
 
 # Local LLM specific settings
@@ -32,3 +31,7 @@ LOCAL_LLM_MAX_TOKENS = 2048
 LOCAL_LLM_TEMPERATURE = 0.7
 
 
+# Read by the web server
+LOCAL_LLM_POOL_SIZE = 10  # Pooled keep-alive connections to LM Studio
+LOCAL_LLM_CONNECT_TIMEOUT = 5  # seconds
+LLM_CACHE_PATH = None  # e.g. "llm_cache.db" to cache deterministic (temperature <= 0.2) LLM calls
@@ -0,0 +1,183 @@
+"""
+Context Budget - Keeps LLM conversation history inside a token budget.
+
+The executor resends its whole conversation history on every iteration.
+The budgeter trims that history before each request so prompt processing
+stays bounded and the model context never overflows.
+"""
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+
+# Marker the executor puts at the top of tool result messages
+TOOL_RESULTS_HEADER = "=== Tool Results ==="
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (about 4 characters per token).
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+class ContextBudgeter:
+    """
+    Fits conversation history into a token budget.
+    
+    Trimming is applied in stages, each only while the request is still
+    over budget:
+    1. Drop a trailing tool result message the prompt already repeats
+    2. Shrink stale tool results (all but the most recent ones) to a stub
+    3. Truncate long older messages, keeping their head and tail
+    4. Drop the oldest messages
+    """
+    
+    # Per-message overhead for role and separators
+    MESSAGE_OVERHEAD = 4
+    
+    def __init__(
+        self,
+        max_context_tokens: int = 16384,
+        tokenizer: Optional[Callable[[str], int]] = None,
+        keep_recent_tool_results: int = 1,
+        stale_tool_result_tokens: int = 64,
+        max_message_tokens: int = 2048
+    ):
+        """
+        Initialize context budgeter.
+        
+        Args:
+            max_context_tokens: Model context window size
+            tokenizer: Optional callable returning the token count of a
+                string (defaults to a character-based estimate)
+            keep_recent_tool_results: Tool result messages kept in full
+            stale_tool_result_tokens: Size stale tool results are cut down to
+            max_message_tokens: Size long older messages are cut down to
+        """
+        self.max_context_tokens = max_context_tokens
+        self.tokenizer = tokenizer or estimate_tokens
+        self.keep_recent_tool_results = keep_recent_tool_results
+        self.stale_tool_result_tokens = stale_tool_result_tokens
+        self.max_message_tokens = max_message_tokens
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in a string with the configured tokenizer."""
+        return self.tokenizer(text or '')
+    
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        """Count tokens in a list of chat messages."""
+        return sum(
+            self.count_tokens(m.get('content', '')) + self.MESSAGE_OVERHEAD
+            for m in messages
+        )
+    
+    def _truncate(self, text: str, max_tokens: int, keep_tail: bool = True) -> str:
+        """Cut text down to roughly max_tokens, marking what was removed."""
+        total = self.count_tokens(text)
+        if total <= max_tokens:
+            return text
+        
+        # Scale characters by the observed chars-per-token ratio
+        chars_per_token = len(text) / max(total, 1)
+        keep_chars = max(int(max_tokens * chars_per_token), 1)
+        removed = total - max_tokens
+        
+        if keep_tail:
+            head = text[:keep_chars // 2]
+            tail = text[-(keep_chars // 2):]
+            return f"{head}\n... [{removed} tokens trimmed] ...\n{tail}"
+        
+        return f"{text[:keep_chars]}\n... [{removed} tokens trimmed]"
+    
+    @staticmethod
+    def is_tool_result(message: Dict[str, Any]) -> bool:
+        """Check whether a history message holds tool results."""
+        return (
+            message.get('role') == 'user'
+            and TOOL_RESULTS_HEADER in message.get('content', '')[:200]
+        )
+    
+    def fit(
+        self,
+        history: List[Dict[str, Any]],
+        system_prompt: str = '',
+        prompt: str = '',
+        reserve_tokens: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Trim history so system prompt + history + prompt fit the budget.
+        
+        Args:
+            history: Conversation history (not modified)
+            system_prompt: System prompt sent with the request
+            prompt: New user prompt sent with the request
+            reserve_tokens: Tokens reserved for the response
+        
+        Returns:
+            Tuple of (fitted history, report dict with 'original_tokens',
+            'fitted_tokens', 'saved_tokens', 'budget' and 'actions')
+        """
+        fixed = (
+            self.count_tokens(system_prompt)
+            + self.count_tokens(prompt)
+            + 2 * self.MESSAGE_OVERHEAD
+        )
+        budget = max(self.max_context_tokens - reserve_tokens - fixed, 0)
+        
+        messages = [{'role': m.get('role'), 'content': m.get('content', '')} for m in history]
+        original_tokens = self.count_messages(messages)
+        actions = []
+        
+        def over_budget():
+            return self.count_messages(messages) > budget
+        
+        # 1. The executor sends tool results both as prompt and history entry
+        if messages and self.is_tool_result(messages[-1]) and prompt.startswith(messages[-1]['content']):
+            messages.pop()
+            actions.append('dropped_duplicate_prompt')
+        
+        # 2. Shrink stale tool results
+        if over_budget():
+            tool_indexes = [i for i, m in enumerate(messages) if self.is_tool_result(m)]
+            stale = tool_indexes[:-self.keep_recent_tool_results] if self.keep_recent_tool_results else tool_indexes
+            for i in stale:
+                if not over_budget():
+                    break
+                content = messages[i]['content']
+                shrunk = self._truncate(content, self.stale_tool_result_tokens, keep_tail=False)
+                if shrunk != content:
+                    messages[i]['content'] = shrunk
+                    actions.append('summarized_tool_result')
+        
+        # 3. Truncate long messages, oldest first, never the latest one
+        if over_budget():
+            for i in range(len(messages) - 1):
+                if not over_budget():
+                    break
+                content = messages[i]['content']
+                shrunk = self._truncate(content, self.max_message_tokens)
+                if shrunk != content:
+                    messages[i]['content'] = shrunk
+                    actions.append('truncated_message')
+        
+        # 4. Drop the oldest messages
+        while messages and over_budget():
+            messages.pop(0)
+            actions.append('dropped_message')
+        
+        fitted_tokens = self.count_messages(messages)
+        
+        return messages, {
+            'original_tokens': original_tokens,
+            'fitted_tokens': fitted_tokens,
+            'saved_tokens': original_tokens - fitted_tokens,
+            'budget': budget,
+            'actions': actions
+        }
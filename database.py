@@ -2,24 +2,227 @@
 Database module for tracking tasks, conversations, and results.
 """
 import sqlite3
+import base64
 import json
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from contextlib import contextmanager
 
 
+# Schema migrations as (version, description, statements), applied in order
+# by Database.migrate(). Append new versions; never edit applied ones.
+MIGRATIONS = [
+    (1, "Indexes for per-task history, task lists and checkpoint polling", [
+        "CREATE INDEX IF NOT EXISTS idx_conversations_task ON conversations(task_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_results_task ON results(task_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_file_modifications_task ON file_modifications(task_id, detected_at)",
+        "CREATE INDEX IF NOT EXISTS idx_test_executions_task ON test_executions(task_id, executed_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_status ON tasks(project_id, status, priority DESC, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, priority DESC, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority DESC, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_checkpoints_scheduled ON checkpoints(scheduled_for)",
+        "CREATE INDEX IF NOT EXISTS idx_checkpoints_task ON checkpoints(task_id, created_at)"
+    ]),
+    (2, "Task counters per project, status and type, maintained by triggers", [
+        """CREATE TABLE IF NOT EXISTS task_stats (
+            project_id INTEGER NOT NULL,  -- 0 for tasks without a project
+            status TEXT NOT NULL,
+            task_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (project_id, status, task_type)
+        ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS trg_task_stats_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO task_stats (project_id, status, task_type, count)
+            VALUES (COALESCE(NEW.project_id, 0), COALESCE(NEW.status, ''), NEW.task_type, 1)
+            ON CONFLICT (project_id, status, task_type) DO UPDATE SET count = count + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_task_stats_delete AFTER DELETE ON tasks
+        BEGIN
+            UPDATE task_stats SET count = count - 1
+            WHERE project_id = COALESCE(OLD.project_id, 0)
+              AND status = COALESCE(OLD.status, '') AND task_type = OLD.task_type;
+            DELETE FROM task_stats WHERE count <= 0;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_task_stats_update
+        AFTER UPDATE OF project_id, status, task_type ON tasks
+        WHEN OLD.project_id IS NOT NEW.project_id OR OLD.status IS NOT NEW.status
+          OR OLD.task_type IS NOT NEW.task_type
+        BEGIN
+            UPDATE task_stats SET count = count - 1
+            WHERE project_id = COALESCE(OLD.project_id, 0)
+              AND status = COALESCE(OLD.status, '') AND task_type = OLD.task_type;
+            INSERT INTO task_stats (project_id, status, task_type, count)
+            VALUES (COALESCE(NEW.project_id, 0), COALESCE(NEW.status, ''), NEW.task_type, 1)
+            ON CONFLICT (project_id, status, task_type) DO UPDATE SET count = count + 1;
+            DELETE FROM task_stats WHERE count <= 0;
+        END""",
+        """INSERT INTO task_stats (project_id, status, task_type, count)
+        SELECT COALESCE(project_id, 0), COALESCE(status, ''), task_type, COUNT(*)
+        FROM tasks GROUP BY 1, 2, 3"""
+    ]),
+    (3, "Execution jobs", [
+        """CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            project_directory TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed, cancelled
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            FOREIGN KEY (task_id) REFERENCES tasks(id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_task ON jobs(task_id, status)"
+    ]),
+    (4, "Durable job queue: priority, retries, leases and visibility", [
+        "ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE jobs ADD COLUMN max_attempts INTEGER NOT NULL DEFAULT 3",
+        # Unix times: not claimable before available_at; lease ends at lease_expires_at
+        "ALTER TABLE jobs ADD COLUMN available_at REAL NOT NULL DEFAULT 0",
+        "ALTER TABLE jobs ADD COLUMN lease_owner TEXT",
+        "ALTER TABLE jobs ADD COLUMN lease_expires_at REAL",
+        "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL",
+        "ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, priority DESC, id)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(status, lease_expires_at)"
+    ]),
+    (5, "Task dependencies for workflow scheduling", [
+        """CREATE TABLE IF NOT EXISTS task_dependencies (
+            task_id INTEGER NOT NULL,
+            depends_on_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (task_id, depends_on_id),
+            FOREIGN KEY (task_id) REFERENCES tasks(id),
+            FOREIGN KEY (depends_on_id) REFERENCES tasks(id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies(depends_on_id)"
+    ])
+]
+
+
+# Columns that list queries may project, per table
+TABLE_COLUMNS = {
+    'tasks': ('id', 'project_id', 'title', 'description', 'task_type', 'status',
+              'priority', 'created_at', 'updated_at', 'completed_at'),
+    'conversations': ('id', 'task_id', 'model_type', 'prompt', 'response',
+                      'metadata', 'created_at'),
+    'results': ('id', 'task_id', 'result_type', 'content', 'metadata', 'created_at')
+}
+
+# Sort orders for keyset pagination; the last key must be unique
+TASK_ORDER = (('priority', 'DESC'), ('created_at', 'ASC'), ('id', 'ASC'))
+HISTORY_ORDER = (('created_at', 'ASC'), ('id', 'ASC'))
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key values of the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str, length: int) -> List[Any]:
+    """Decode a pagination cursor, raising ValueError if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values
+
+
 class Database:
     """SQLite database manager for the agent system."""
     
-    def __init__(self, db_path: str = "agent7.db"):
+    def __init__(self, db_path: str = "agent7.db", pool_size: int = 8,
+                 busy_timeout_ms: int = 5000, cache_size_kb: int = 8192,
+                 mmap_size: int = 64 * 1024 * 1024):
+        """
+        Initialize database and its connection pool.
+        
+        Args:
+            db_path: SQLite database file
+            pool_size: Maximum number of idle connections kept open
+            busy_timeout_ms: How long a writer waits for a lock before failing
+            cache_size_kb: Page cache size per connection
+            mmap_size: Bytes of the database file to memory-map per connection
+        """
         self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        
+        # Idle connections; a connection is used by one thread at a time
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        # Connection held by the current thread, for nested get_connection()
+        self._local = threading.local()
+        # Called with (checkpoint_id, scheduled_for) after a checkpoint is saved
+        self._checkpoint_listeners = []
+        
+        self._enable_wal()
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the pool's pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # Handed between threads through the pool
+            cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        # WAL is durable at NORMAL; only the last commits may be lost on power failure
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+    
+    def _enable_wal(self):
+        """Switch the database file to WAL so readers don't block the writer."""
+        conn = self._connect()
+        try:
+            # Persistent setting; in-memory databases stay in 'memory' mode
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._release(conn)
+        except Exception:
+            conn.close()
+            raise
+    
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+    
+    def _release(self, conn: sqlite3.Connection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        Context manager for pooled database connections.
+        
+        Commits on success and rolls back on error. Nested calls on the
+        same thread share the outer connection and transaction, which is
+        committed or rolled back when the outermost block exits.
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
         try:
             yield conn
             conn.commit()
@@ -27,6 +230,20 @@ class Database:
             conn.rollback()
             raise
         finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                # Commit itself failed; don't hand out a half-open transaction
+                conn.close()
+            else:
+                self._release(conn)
+    
+    def close(self):
+        """Close all idle pooled connections."""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
             conn.close()
     
     def init_database(self):
@@ -129,6 +346,55 @@ class Database:
                     FOREIGN KEY (task_id) REFERENCES tasks(id)
                 )
             """)
+            
+            # Applied schema migrations
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+        
+        self.migrate()
+    
+    def get_schema_version(self) -> int:
+        """Get the highest applied migration version (0 if none)."""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+            return row[0] or 0
+    
+    def migrate(self) -> List[int]:
+        """
+        Apply pending schema migrations.
+        
+        Each migration runs in its own write transaction together with its
+        schema_version row, so a failed migration leaves no partial changes
+        and concurrent processes never apply the same version twice.
+        
+        Returns:
+            Versions applied by this call
+        """
+        applied = []
+        for version, description, statements in MIGRATIONS:
+            if version <= self.get_schema_version():
+                continue
+            
+            with self.get_connection() as conn:
+                # Take the write lock before re-checking the version
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+                if (row[0] or 0) >= version:
+                    continue
+                
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description)
+                )
+            applied.append(version)
+        return applied
     
     # Project operations
     def create_project(self, name: str, description: str = "") -> int:
@@ -158,8 +424,9 @@ class Database:
     
     # Task operations
     def create_task(self, project_id: int, title: str, description: str,
-                    task_type: str, priority: int = 0) -> int:
-        """Create a new task."""
+                    task_type: str, priority: int = 0,
+                    depends_on: Optional[List[int]] = None) -> int:
+        """Create a new task, optionally depending on existing tasks."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
@@ -167,7 +434,14 @@ class Database:
                    VALUES (?, ?, ?, ?, ?)""",
                 (project_id, title, description, task_type, priority)
             )
-            return cursor.lastrowid
+            task_id = cursor.lastrowid
+            if depends_on:
+                # A new task has no dependents, so these can't form a cycle
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_id) VALUES (?, ?)",
+                    [(task_id, other) for other in depends_on]
+                )
+            return task_id
     
     def update_task_status(self, task_id: int, status: str):
         """Update task status."""
@@ -188,25 +462,152 @@ class Database:
             row = cursor.fetchone()
             return dict(row) if row else None
     
-    def list_tasks(self, project_id: Optional[int] = None,
-                   status: Optional[str] = None) -> List[Dict]:
-        """List tasks, optionally filtered by project and status."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            query = "SELECT * FROM tasks WHERE 1=1"
-            params = []
+    def _select_page(self, table: str, filters: List[str], params: List[Any],
+                     order: tuple, limit: Optional[int] = None,
+                     cursor: Optional[str] = None,
+                     columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Run a filtered, ordered SELECT with keyset pagination.
+        
+        Args:
+            table: Table name (a TABLE_COLUMNS key)
+            filters: SQL conditions joined with AND
+            params: Parameters for the filters
+            order: Sort keys as (column, 'ASC'|'DESC'); the last must be unique
+            limit: Maximum rows to return
+            cursor: Cursor from a previous page; rows after it are returned
+            columns: Columns to select (sort keys are always included)
             
-            if project_id:
-                query += " AND project_id = ?"
-                params.append(project_id)
+        Returns:
+            List of row dicts
+        """
+        allowed = TABLE_COLUMNS[table]
+        if columns:
+            unknown = [c for c in columns if c not in allowed]
+            if unknown:
+                raise ValueError(f"Unknown {table} columns: {', '.join(unknown)}")
+            selected = list(dict.fromkeys(list(columns) + [c for c, _ in order]))
+        else:
+            selected = list(allowed)
+        
+        filters = list(filters)
+        params = list(params)
+        
+        if cursor:
+            values = _decode_cursor(cursor, len(order))
             
-            if status:
-                query += " AND status = ?"
-                params.append(status)
+            # Bound on the leading key lets the index seek instead of scan
+            first, direction = order[0]
+            filters.append(f"{first} {'<=' if direction == 'DESC' else '>='} ?")
+            params.append(values[0])
             
-            query += " ORDER BY priority DESC, created_at ASC"
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            # (k1, k2, ...) strictly after the cursor, honouring each key's direction
+            alternatives = []
+            for i, (column, direction) in enumerate(order):
+                parts = [f"{c} = ?" for c, _ in order[:i]]
+                parts.append(f"{column} {'<' if direction == 'DESC' else '>'} ?")
+                alternatives.append('(' + ' AND '.join(parts) + ')')
+                params.extend(values[:i + 1])
+            filters.append('(' + ' OR '.join(alternatives) + ')')
+        
+        query = f"SELECT {', '.join(selected)} FROM {table}"
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        query += " ORDER BY " + ", ".join(f"{c} {d}" for c, d in order)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        
+        with self.get_connection() as conn:
+            rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        
+        for row in rows:
+            if row.get('metadata'):
+                row['metadata'] = json.loads(row['metadata'])
+        return rows
+    
+    def _paginate(self, rows: List[Dict], order: tuple, limit: int) -> Dict[str, Any]:
+        """Split a limit+1 fetch into a page and the cursor for the next one."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor([rows[-1][column] for column, _ in order])
+        return {'items': rows, 'next_cursor': next_cursor}
+    
+    def list_tasks(self, project_id: Optional[int] = None,
+                   status: Optional[str] = None, limit: Optional[int] = None,
+                   cursor: Optional[str] = None,
+                   columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        List tasks, optionally filtered by project and status.
+        
+        Tasks are ordered by priority (highest first), then creation time.
+        
+        Args:
+            project_id: Only tasks of this project
+            status: Only tasks with this status
+            limit: Maximum number of tasks
+            cursor: Continue after the page this cursor came from
+            columns: Columns to return (default: all)
+            
+        Returns:
+            List of task dicts
+        """
+        filters = []
+        params = []
+        
+        if project_id:
+            filters.append("project_id = ?")
+            params.append(project_id)
+        
+        if status:
+            filters.append("status = ?")
+            params.append(status)
+        
+        return self._select_page('tasks', filters, params, TASK_ORDER, limit, cursor, columns)
+    
+    def list_tasks_page(self, project_id: Optional[int] = None,
+                        status: Optional[str] = None, limit: int = 50,
+                        cursor: Optional[str] = None,
+                        columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get one page of tasks.
+        
+        Returns:
+            Dict with 'items' and 'next_cursor' (None on the last page)
+        """
+        rows = self.list_tasks(project_id, status, limit + 1, cursor, columns)
+        return self._paginate(rows, TASK_ORDER, limit)
+    
+    def get_task_stats(self, project_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Count tasks by status and by type.
+        
+        Reads the trigger-maintained task_stats counters, so the cost
+        depends on the number of status/type combinations, not tasks.
+        
+        Args:
+            project_id: Only count tasks of this project
+            
+        Returns:
+            Dict with 'total', 'by_status' and 'by_type' counts
+        """
+        query = "SELECT status, task_type, SUM(count) AS count FROM task_stats"
+        params = []
+        if project_id:
+            query += " WHERE project_id = ?"
+            params.append(project_id)
+        query += " GROUP BY status, task_type"
+        
+        with self.get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        stats = {'total': 0, 'by_status': {}, 'by_type': {}}
+        for row in rows:
+            stats['total'] += row['count']
+            stats['by_status'][row['status']] = stats['by_status'].get(row['status'], 0) + row['count']
+            stats['by_type'][row['task_type']] = stats['by_type'].get(row['task_type'], 0) + row['count']
+        return stats
     
     # Conversation operations
     def save_conversation(self, task_id: int, model_type: str,
@@ -223,21 +624,30 @@ class Database:
             )
             return cursor.lastrowid
     
-    def get_conversations(self, task_id: int) -> List[Dict]:
-        """Get all conversations for a task."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM conversations WHERE task_id = ? ORDER BY created_at ASC",
-                (task_id,)
-            )
-            conversations = []
-            for row in cursor.fetchall():
-                conv = dict(row)
-                if conv['metadata']:
-                    conv['metadata'] = json.loads(conv['metadata'])
-                conversations.append(conv)
-            return conversations
+    def get_conversations(self, task_id: int, limit: Optional[int] = None,
+                          cursor: Optional[str] = None,
+                          columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Get conversations for a task, oldest first.
+        
+        Args:
+            task_id: Task ID
+            limit: Maximum number of conversations
+            cursor: Continue after the page this cursor came from
+            columns: Columns to return (default: all)
+            
+        Returns:
+            List of conversation dicts
+        """
+        return self._select_page('conversations', ["task_id = ?"], [task_id],
+                                 HISTORY_ORDER, limit, cursor, columns)
+    
+    def get_conversations_page(self, task_id: int, limit: int = 50,
+                               cursor: Optional[str] = None,
+                               columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get one page of conversations as 'items' and 'next_cursor'."""
+        rows = self.get_conversations(task_id, limit + 1, cursor, columns)
+        return self._paginate(rows, HISTORY_ORDER, limit)
     
     # Results operations
     def save_result(self, task_id: int, result_type: str,
@@ -253,23 +663,47 @@ class Database:
             )
             return cursor.lastrowid
     
-    def get_results(self, task_id: int) -> List[Dict]:
-        """Get all results for a task."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM results WHERE task_id = ? ORDER BY created_at ASC",
-                (task_id,)
-            )
-            results = []
-            for row in cursor.fetchall():
-                result = dict(row)
-                if result['metadata']:
-                    result['metadata'] = json.loads(result['metadata'])
-                results.append(result)
-            return results
+    def get_results(self, task_id: int, limit: Optional[int] = None,
+                    cursor: Optional[str] = None,
+                    columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Get results for a task, oldest first.
+        
+        Args:
+            task_id: Task ID
+            limit: Maximum number of results
+            cursor: Continue after the page this cursor came from
+            columns: Columns to return (default: all)
+            
+        Returns:
+            List of result dicts
+        """
+        return self._select_page('results', ["task_id = ?"], [task_id],
+                                 HISTORY_ORDER, limit, cursor, columns)
+    
+    def get_results_page(self, task_id: int, limit: int = 50,
+                         cursor: Optional[str] = None,
+                         columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get one page of results as 'items' and 'next_cursor'."""
+        rows = self.get_results(task_id, limit + 1, cursor, columns)
+        return self._paginate(rows, HISTORY_ORDER, limit)
     
     # Checkpoint operations
+    def add_checkpoint_listener(self, listener: Callable[[int, datetime], None]):
+        """
+        Register a callable notified after each saved checkpoint (e.g. to
+        wake a scheduler waiting for the next due checkpoint).
+        
+        Args:
+            listener: Callable receiving the checkpoint ID and scheduled time
+        """
+        self._checkpoint_listeners.append(listener)
+    
+    def remove_checkpoint_listener(self, listener: Callable[[int, datetime], None]):
+        """Unregister a checkpoint listener."""
+        if listener in self._checkpoint_listeners:
+            self._checkpoint_listeners.remove(listener)
+    
     def save_checkpoint(self, task_id: int, conversation_id: str,
                        project_directory: str, remaining_prompt: str,
                        scheduled_for: datetime, checkpoint_data: Dict) -> int:
@@ -284,7 +718,34 @@ class Database:
                 (task_id, conversation_id, project_directory, remaining_prompt,
                  scheduled_for, checkpoint_json)
             )
-            return cursor.lastrowid
+            checkpoint_id = cursor.lastrowid
+        
+        # After commit, so listeners can read the checkpoint
+        for listener in list(self._checkpoint_listeners):
+            try:
+                listener(checkpoint_id, scheduled_for)
+            except Exception:
+                pass
+        return checkpoint_id
+    
+    def get_checkpoint(self, checkpoint_id: int) -> Optional[Dict]:
+        """Get a checkpoint by ID."""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT * FROM checkpoints WHERE id = ?", (checkpoint_id,)).fetchone()
+            if not row:
+                return None
+            checkpoint = dict(row)
+            if checkpoint['checkpoint_data']:
+                checkpoint['checkpoint_data'] = json.loads(checkpoint['checkpoint_data'])
+            return checkpoint
+    
+    def get_checkpoint_schedule(self) -> List[tuple]:
+        """Get (id, scheduled_for) of every checkpoint, earliest first."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT id, scheduled_for FROM checkpoints ORDER BY scheduled_for ASC"
+            ).fetchall()
+            return [(row['id'], row['scheduled_for']) for row in rows]
     
     def load_checkpoint(self, task_id: int) -> Optional[Dict]:
         """Load the most recent checkpoint for a task."""
@@ -338,6 +799,23 @@ class Database:
             )
             return cursor.lastrowid
     
+    def save_file_modifications(self, task_id: int, modifications: List[tuple]):
+        """
+        Record several file modifications in one transaction.
+        
+        Args:
+            task_id: Task ID
+            modifications: (filepath, action) pairs
+        """
+        if not modifications:
+            return
+        with self.get_connection() as conn:
+            conn.executemany(
+                """INSERT INTO file_modifications (task_id, filepath, action)
+                   VALUES (?, ?, ?)""",
+                [(task_id, filepath, action) for filepath, action in modifications]
+            )
+    
     def get_file_modifications(self, task_id: int) -> List[Dict]:
         """Get all file modifications for a task."""
         with self.get_connection() as conn:
@@ -374,4 +852,273 @@ class Database:
                 (task_id,)
             )
             return [dict(row) for row in cursor.fetchall()]
+    
+    # Task dependency operations
+    def add_task_dependency(self, task_id: int, depends_on_id: int):
+        """
+        Make a task wait for another task to complete.
+        
+        Args:
+            task_id: Dependent task
+            depends_on_id: Task that must complete first
+        
+        Raises:
+            ValueError: If the dependency would create a cycle
+        """
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if task_id == depends_on_id:
+                raise ValueError(f"Task #{task_id} cannot depend on itself")
+            # Cycle if task_id is already upstream of depends_on_id
+            cycle = conn.execute(
+                """WITH RECURSIVE upstream(id) AS (
+                       SELECT depends_on_id FROM task_dependencies WHERE task_id = ?
+                       UNION
+                       SELECT d.depends_on_id FROM task_dependencies d
+                       JOIN upstream u ON d.task_id = u.id
+                   )
+                   SELECT 1 FROM upstream WHERE id = ? LIMIT 1""",
+                (depends_on_id, task_id)
+            ).fetchone()
+            if cycle:
+                raise ValueError(f"Task #{task_id} depending on #{depends_on_id} would create a cycle")
+            conn.execute(
+                "INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_id) VALUES (?, ?)",
+                (task_id, depends_on_id)
+            )
+    
+    def remove_task_dependency(self, task_id: int, depends_on_id: int):
+        """Remove a dependency between two tasks."""
+        with self.get_connection() as conn:
+            conn.execute(
+                "DELETE FROM task_dependencies WHERE task_id = ? AND depends_on_id = ?",
+                (task_id, depends_on_id)
+            )
+    
+    def get_task_dependencies(self, task_id: int) -> List[int]:
+        """Get the IDs of the tasks a task depends on."""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT depends_on_id FROM task_dependencies WHERE task_id = ? ORDER BY depends_on_id",
+                (task_id,)
+            ).fetchall()
+            return [row['depends_on_id'] for row in rows]
+    
+    def get_dependency_graph(self, task_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        Get the dependencies of several tasks with their current status.
+        
+        Args:
+            task_ids: Dependent tasks
+        
+        Returns:
+            Dict mapping each task ID to a list of {'id', 'status'} of the
+            tasks it depends on
+        """
+        graph = {task_id: [] for task_id in task_ids}
+        if not task_ids:
+            return graph
+        with self.get_connection() as conn:
+            placeholders = ", ".join("?" for _ in task_ids)
+            rows = conn.execute(
+                f"""SELECT d.task_id, d.depends_on_id, t.status FROM task_dependencies d
+                    JOIN tasks t ON t.id = d.depends_on_id
+                    WHERE d.task_id IN ({placeholders})
+                    ORDER BY d.task_id, d.depends_on_id""",
+                list(task_ids)
+            ).fetchall()
+        for row in rows:
+            graph[row['task_id']].append({'id': row['depends_on_id'], 'status': row['status']})
+        return graph
 
+    # Job operations
+    def create_job(self, task_id: int, project_directory: str, priority: int = 0,
+                   max_attempts: int = 3, delay: float = 0) -> int:
+        """
+        Queue an execution job for a task.
+        
+        Args:
+            task_id: Task to execute
+            project_directory: Project root to execute in
+            priority: Higher priorities are claimed first
+            max_attempts: Attempts before the job is failed for good
+            delay: Seconds before the job becomes claimable
+            
+        Returns:
+            Job ID
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """INSERT INTO jobs (task_id, project_directory, priority, max_attempts, available_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (task_id, project_directory, priority, max_attempts, time.time() + delay)
+            )
+            return cursor.lastrowid
+    
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Get a job by ID."""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return dict(row) if row else None
+    
+    def get_active_job(self, task_id: int) -> Optional[Dict]:
+        """Get the queued or running job of a task, if any."""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                """SELECT * FROM jobs WHERE task_id = ? AND status IN ('queued', 'running')
+                   ORDER BY id DESC LIMIT 1""",
+                (task_id,)
+            ).fetchone()
+            return dict(row) if row else None
+    
+    def claim_job(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        """
+        Atomically claim the next runnable job.
+        
+        Queued jobs whose delay has passed are claimed by priority, then
+        age. Running jobs whose lease expired (their worker died) are
+        claimed again, or failed along with their in-progress task once
+        they used up their attempts.
+        
+        Args:
+            worker_id: Identifies the claiming worker
+            lease_seconds: How long the claim lasts without a heartbeat
+            
+        Returns:
+            The claimed job, or None if nothing is runnable
+        """
+        now = time.time()
+        with self.get_connection() as conn:
+            # Write lock first, so no other worker can claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            expired = [r['task_id'] for r in conn.execute(
+                """SELECT task_id FROM jobs
+                   WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts""",
+                (now,)
+            )]
+            conn.execute(
+                """UPDATE jobs SET status = 'failed', error = 'Lease expired on the last attempt',
+                   lease_owner = NULL, finished_at = CURRENT_TIMESTAMP
+                   WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts""",
+                (now,)
+            )
+            # No worker is left to record the outcome on the task
+            conn.executemany(
+                """UPDATE tasks SET status = 'failed', updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ? AND status = 'in_progress'""",
+                [(task_id,) for task_id in expired]
+            )
+            row = conn.execute(
+                """SELECT id FROM jobs
+                   WHERE (status = 'queued' AND available_at <= ?)
+                      OR (status = 'running' AND lease_expires_at < ?)
+                   ORDER BY priority DESC, id ASC LIMIT 1""",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            conn.execute(
+                """UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires_at = ?,
+                   heartbeat_at = ?, attempts = attempts + 1, started_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                (worker_id, now + lease_seconds, now, row['id'])
+            )
+            return dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+    
+    def heartbeat_job(self, job_id: int, worker_id: str, lease_seconds: float) -> Dict[str, bool]:
+        """
+        Extend a claimed job's lease.
+        
+        Returns:
+            Dict with 'owned' (False if the lease was lost to another
+            worker) and 'cancel' (True if cancellation was requested)
+        """
+        now = time.time()
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ?
+                   WHERE id = ? AND status = 'running' AND lease_owner = ?""",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return {
+                'owned': cursor.rowcount == 1,
+                'cancel': bool(row and row['cancel_requested'])
+            }
+    
+    def finish_job(self, job_id: int, worker_id: str, status: str,
+                   error: Optional[str] = None) -> bool:
+        """
+        Record the outcome of a claimed job.
+        
+        Args:
+            job_id: Job ID
+            worker_id: Worker holding the lease
+            status: 'completed', 'failed' or 'cancelled'
+            error: Error message for failed jobs
+            
+        Returns:
+            False if the worker no longer held the lease
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, lease_owner = NULL,
+                   lease_expires_at = NULL, finished_at = CURRENT_TIMESTAMP
+                   WHERE id = ? AND status = 'running' AND lease_owner = ?""",
+                (status, error, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+    
+    def retry_job(self, job_id: int, worker_id: str, error: str, delay: float) -> bool:
+        """
+        Put a failed attempt back in the queue after a delay.
+        
+        Returns:
+            False if the worker no longer held the lease
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = 'queued', error = ?, available_at = ?,
+                   lease_owner = NULL, lease_expires_at = NULL
+                   WHERE id = ? AND status = 'running' AND lease_owner = ?""",
+                (error, time.time() + delay, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+    
+    def cancel_job(self, job_id: int) -> Optional[str]:
+        """
+        Cancel a job.
+        
+        A queued job is cancelled at once. A running job is flagged and
+        stops when its worker sees the flag on the next heartbeat.
+        
+        Returns:
+            'cancelled', 'cancelling', or None if the job is not active
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+                   WHERE id = ? AND status = 'queued'""",
+                (job_id,)
+            )
+            if cursor.rowcount:
+                return 'cancelled'
+            cursor = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,)
+            )
+            return 'cancelling' if cursor.rowcount else None
+    
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """List the most recent jobs, optionally filtered by status."""
+        with self.get_connection() as conn:
+            query = "SELECT * FROM jobs"
+            params = []
+            if status:
+                query += " WHERE status = ?"
+                params.append(status)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(limit)
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
@@ -0,0 +1,362 @@
+"""
+Edit blocks - Parses and applies partial file edits from LLM output.
+
+Two formats are understood, so a model can change a few lines without
+regenerating the whole file:
+
+SEARCH/REPLACE blocks, after an "Edit: path" (or "File: path") header:
+
+    Edit: app.py
+    <<<<<<< SEARCH
+    def greet():
+        print("hi")
+    =======
+    def greet(name):
+        print(f"hi {name}")
+    >>>>>>> REPLACE
+
+Unified diffs, usually in a ```diff fence:
+
+    --- a/app.py
+    +++ b/app.py
+    @@ -1,2 +1,2 @@
+    -def greet():
+    +def greet(name):
+
+Hunks are located exactly first, then ignoring whitespace, then by fuzzy
+similarity, so stale line numbers and small drift in the context still
+apply. Hunks that can't be located are reported as conflicts and the
+file is left unchanged.
+"""
+import difflib
+import re
+from typing import List, Dict, Any, Optional
+
+
+SEARCH_MARKER = re.compile(r'^\s*<{5,9}\s*SEARCH\s*$')
+DIVIDER_MARKER = re.compile(r'^\s*={5,9}\s*$')
+REPLACE_MARKER = re.compile(r'^\s*>{5,9}\s*REPLACE\s*$')
+HEADER = re.compile(
+    r'^\s*\*{0,2}(?:Edit|Edit file|Patch|File|Modify file):\s*`?\s*([^\s`*]+\.[\w]+)\s*`?\*{0,2}\s*$',
+    re.IGNORECASE
+)
+BARE_PATH = re.compile(r'^\s*`?([\w./\\-]+\.[\w]+)`?:?\s*$')
+FENCE = re.compile(r'^\s*```')
+DIFF_OLD = re.compile(r'^--- (?:a/)?(\S+)')
+DIFF_NEW = re.compile(r'^\+\+\+ (?:b/)?(\S+)')
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@|^@@')
+
+# Minimum similarity for a fuzzy hunk match
+FUZZ_THRESHOLD = 0.8
+
+
+def looks_like_edit(content: str) -> bool:
+    """True if a code block holds an edit rather than whole-file content."""
+    if re.search(r'^\s*<{5,9}\s*SEARCH\s*$', content, re.MULTILINE):
+        return True
+    return bool(re.search(r'^--- \S+', content, re.MULTILINE)
+                and re.search(r'^\+\+\+ \S+', content, re.MULTILINE)
+                and re.search(r'^@@', content, re.MULTILINE))
+
+
+def extract_edit_blocks(text: str) -> List[Dict[str, Any]]:
+    """
+    Extract SEARCH/REPLACE blocks and unified diffs from LLM output.
+    
+    Args:
+        text: LLM output
+    
+    Returns:
+        One dict per file in order of first appearance, with 'filepath',
+        'operation' ('edit', 'create' or 'delete'), 'format' and 'hunks'
+        (each with 'old' and 'new' line lists and a 1-based 'hint' line)
+    """
+    lines = text.split('\n')
+    edits = {}
+    order = []
+    
+    def add(filepath, operation, fmt, hunks):
+        filepath = filepath.strip().replace('\\', '/')
+        if filepath not in edits:
+            edits[filepath] = {'filepath': filepath, 'operation': operation,
+                               'format': fmt, 'hunks': []}
+            order.append(filepath)
+        edit = edits[filepath]
+        if operation != 'edit':
+            edit['operation'] = operation
+        edit['hunks'].extend(hunks)
+    
+    current_path = None
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        
+        header = HEADER.match(line)
+        if header:
+            current_path = header.group(1)
+            i += 1
+            continue
+        
+        if SEARCH_MARKER.match(line):
+            # A path line directly above takes over from an earlier header
+            current_path = _preceding_path(lines, i) or current_path
+            path = current_path
+            search, replace, i = _read_search_replace(lines, i + 1)
+            if path is not None and replace is not None:
+                add(path, 'edit', 'search_replace', [{'old': search, 'new': replace, 'hint': None}])
+            continue
+        
+        old_header = DIFF_OLD.match(line)
+        if old_header and i + 1 < len(lines) and DIFF_NEW.match(lines[i + 1]):
+            old_path = old_header.group(1)
+            new_path = DIFF_NEW.match(lines[i + 1]).group(1)
+            hunks, i = _read_hunks(lines, i + 2)
+            if new_path == '/dev/null':
+                add(old_path, 'delete', 'unified_diff', [])
+            elif old_path == '/dev/null':
+                add(new_path, 'create', 'unified_diff', hunks)
+            else:
+                add(new_path, 'edit', 'unified_diff', hunks)
+            continue
+        
+        if FENCE.match(line) and current_path and not _fence_has_edit(lines, i):
+            # A whole-file block ends the header's scope
+            current_path = None
+        i += 1
+    
+    return [edits[path] for path in order]
+
+
+def _preceding_path(lines: List[str], index: int) -> Optional[str]:
+    """Path on the last non-blank, non-fence line before a SEARCH marker."""
+    for line in reversed(lines[max(0, index - 3):index]):
+        if not line.strip() or FENCE.match(line):
+            continue
+        match = BARE_PATH.match(line)
+        return match.group(1) if match else None
+    return None
+
+
+def _fence_has_edit(lines: List[str], index: int) -> bool:
+    """True if the code fence opening at index contains edit markers."""
+    for line in lines[index + 1:]:
+        if FENCE.match(line):
+            return False
+        if SEARCH_MARKER.match(line) or DIFF_OLD.match(line):
+            return True
+    return False
+
+
+def _read_search_replace(lines: List[str], i: int):
+    """Read a SEARCH/REPLACE body starting after the SEARCH marker."""
+    search = []
+    while i < len(lines) and not DIVIDER_MARKER.match(lines[i]):
+        search.append(lines[i])
+        i += 1
+    replace = []
+    i += 1
+    while i < len(lines) and not REPLACE_MARKER.match(lines[i]):
+        replace.append(lines[i])
+        i += 1
+    if i >= len(lines):
+        return search, None, i  # Unterminated block
+    return search, replace, i + 1
+
+
+def _read_hunks(lines: List[str], i: int):
+    """Read the hunks of one file's diff, starting after the +++ line."""
+    hunks = []
+    while i < len(lines):
+        header = HUNK_HEADER.match(lines[i])
+        if not header:
+            break
+        hint = int(header.group(1)) if header.group(1) else None
+        old, new = [], []
+        i += 1
+        while i < len(lines):
+            line = lines[i]
+            if line.startswith('@@') or FENCE.match(line) or (
+                    DIFF_OLD.match(line) and i + 1 < len(lines) and DIFF_NEW.match(lines[i + 1])):
+                break
+            if line.startswith('\\'):
+                pass  # "\ No newline at end of file"
+            elif line.startswith('-'):
+                old.append(line[1:])
+            elif line.startswith('+'):
+                new.append(line[1:])
+            elif line.startswith(' '):
+                old.append(line[1:])
+                new.append(line[1:])
+            elif line == '':
+                old.append('')
+                new.append('')
+            else:
+                break
+            i += 1
+        
+        # Blank lines after the last change belong to the surrounding text
+        while old and new and old[-1] == '' and new[-1] == '':
+            old.pop()
+            new.pop()
+        hunks.append({'old': old, 'new': new, 'hint': hint})
+    return hunks, i
+
+
+def _normalize(line: str) -> str:
+    return ' '.join(line.split())
+
+
+def _changed_lines(old: List[str], new: List[str]) -> List[int]:
+    """Indexes of the old lines a hunk removes or rewrites (the rest is context)."""
+    matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+    return [i for tag, i1, i2, _, _ in matcher.get_opcodes() if tag != 'equal'
+            for i in range(i1, i2)]
+
+
+def _locate(lines: List[str], old: List[str], hint: Optional[int],
+            threshold: float, new: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Find where a hunk's old lines are in the file.
+    
+    Only context may match approximately: a fuzzy candidate must contain
+    every line the hunk changes (ignoring whitespace), so an edit to text
+    that isn't in the file is a conflict rather than a rewrite of a
+    similar line.
+    
+    Returns:
+        Dict with 'index' (or None), 'fuzzy', and for failures 'reason'
+        and the 'closest' candidate
+    """
+    size = len(old)
+    if size == 0:
+        index = len(lines) if hint is None else min(max(hint - 1, 0), len(lines))
+        return {'index': index, 'fuzzy': False}
+    
+    windows = range(len(lines) - size + 1)
+    for normalize in (None, str.rstrip, _normalize):
+        wanted = old if normalize is None else [normalize(line) for line in old]
+        found = [i for i in windows
+                 if (lines[i:i + size] if normalize is None
+                     else [normalize(line) for line in lines[i:i + size]]) == wanted]
+        if len(found) == 1:
+            return {'index': found[0], 'fuzzy': normalize is _normalize}
+        if found:
+            if hint is None:
+                return {'index': None, 'reason': f"Matches {len(found)} places; add more context",
+                        'closest': {'line': found[0] + 1, 'similarity': 1.0}}
+            return {'index': min(found, key=lambda i: abs(i - (hint - 1))),
+                    'fuzzy': normalize is _normalize}
+    
+    # Fuzzy: most similar window of the same length whose changed lines
+    # are all present; the closest window overall is kept for the report
+    changed = _changed_lines(old, new) if new is not None else list(range(size))
+    target = '\n'.join(_normalize(line) for line in old)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    best_index, best_ratio = None, 0.0
+    match_index, match_ratio = None, 0.0
+    for i in windows:
+        window = [_normalize(line) for line in lines[i:i + size]]
+        exact = len(changed) < size and all(window[j] == _normalize(old[j]) for j in changed)
+        floor = min(best_ratio, match_ratio) if exact else best_ratio
+        matcher.set_seq1('\n'.join(window))
+        if matcher.real_quick_ratio() <= floor or matcher.quick_ratio() <= floor:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio or (ratio == best_ratio and hint is not None and best_index is not None
+                                  and abs(i - (hint - 1)) < abs(best_index - (hint - 1))):
+            best_index, best_ratio = i, ratio
+        if exact and (ratio > match_ratio or (ratio == match_ratio and hint is not None
+                                              and match_index is not None
+                                              and abs(i - (hint - 1)) < abs(match_index - (hint - 1)))):
+            match_index, match_ratio = i, ratio
+    
+    if match_index is not None and match_ratio >= threshold:
+        return {'index': match_index, 'fuzzy': True, 'similarity': match_ratio}
+    
+    closest = None
+    if best_index is not None:
+        closest = {
+            'line': best_index + 1,
+            'similarity': round(best_ratio, 2),
+            'text': '\n'.join(lines[best_index:best_index + size])
+        }
+    return {'index': None, 'reason': "Search text not found", 'closest': closest}
+
+
+def apply_hunks(content: str, hunks: List[Dict[str, Any]],
+                threshold: float = FUZZ_THRESHOLD) -> Dict[str, Any]:
+    """
+    Apply edit hunks to file content.
+    
+    All hunks must apply; if any conflicts, the content is returned
+    unchanged.
+    
+    Args:
+        content: Current file content
+        hunks: Hunks from extract_edit_blocks
+        threshold: Minimum similarity for a fuzzy match
+    
+    Returns:
+        Dict with 'success', 'content', 'applied', 'fuzzy' (hunks matched
+        approximately) and 'conflicts' (hunk number, reason, expected text
+        and closest match)
+    """
+    newline = '\r\n' if '\r\n' in content else '\n'
+    trailing = content.endswith(('\n', '\r\n')) or not content
+    lines = content.splitlines()
+    
+    offset = 0
+    fuzzy = 0
+    conflicts = []
+    for number, hunk in enumerate(hunks, 1):
+        hint = hunk['hint'] + offset if hunk.get('hint') else None
+        match = _locate(lines, hunk['old'], hint, threshold, hunk['new'])
+        if match['index'] is None:
+            conflicts.append({
+                'hunk': number,
+                'reason': match['reason'],
+                'expected': '\n'.join(hunk['old']),
+                'closest': match.get('closest')
+            })
+            continue
+        index = match['index']
+        lines[index:index + len(hunk['old'])] = hunk['new']
+        offset += len(hunk['new']) - len(hunk['old'])
+        fuzzy += 1 if match['fuzzy'] else 0
+    
+    if conflicts:
+        return {'success': False, 'content': content, 'applied': 0,
+                'fuzzy': 0, 'conflicts': conflicts}
+    
+    new_content = newline.join(lines)
+    if trailing and lines:
+        new_content += newline
+    return {'success': True, 'content': new_content, 'applied': len(hunks),
+            'fuzzy': fuzzy, 'conflicts': []}
+
+
+def format_conflicts(filepath: str, conflicts: List[Dict[str, Any]]) -> str:
+    """
+    Format edit conflicts as feedback for the model.
+    
+    Args:
+        filepath: File the edit targeted
+        conflicts: Conflicts from apply_hunks
+    
+    Returns:
+        Human-readable report
+    """
+    report = f"❌ {filepath}: {len(conflicts)} edit(s) could not be applied\n"
+    for conflict in conflicts:
+        report += f"\n  Hunk {conflict['hunk']}: {conflict['reason']}\n"
+        expected = conflict['expected'].split('\n')
+        report += "  Expected:\n" + "".join(f"    | {line}\n" for line in expected[:8])
+        if len(expected) > 8:
+            report += f"    | ... ({len(expected) - 8} more lines)\n"
+        closest = conflict.get('closest')
+        if closest and closest.get('text') is not None:
+            report += (f"  Closest match at line {closest['line']} "
+                       f"({closest['similarity']:.0%} similar):\n")
+            report += "".join(f"    | {line}\n" for line in closest['text'].split('\n')[:8])
+    return report
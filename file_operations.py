@@ -2,9 +2,213 @@
 File operations module - Parses Claude's output and creates/modifies files.
 """
 import os
-import re
-from typing import List, Dict, Any, Optional
+import shutil
+import uuid
+from typing import List, Dict, Any, Optional, Callable
 from database import Database
+from edit_blocks import extract_edit_blocks, apply_hunks, format_conflicts
+from block_parser import parse_blocks
+
+
+class WriteBatch:
+    """
+    Stages file writes and deletes, then applies them together.
+    
+    Each write goes to a temporary file next to its target. On commit all
+    staged files are fsynced, renamed over their targets with os.replace
+    (so readers see the old or the new file, never a truncated one), each
+    touched directory is fsynced once, and the modifications are recorded
+    in a single database transaction.
+    """
+    
+    def __init__(self, file_ops: 'FileOperations', project_directory: str,
+                 task_id: Optional[int] = None):
+        """
+        Initialize batch. Use FileOperations.write_batch() to create one.
+        
+        Args:
+            file_ops: Owner, for the database and write listeners
+            project_directory: Root the staged paths are relative to
+            task_id: Optional task ID the modifications are recorded for
+        """
+        self.file_ops = file_ops
+        self.project_directory = project_directory
+        self.task_id = task_id
+        self._entries = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+    
+    def write(self, filepath: str, content: str, operation: str = 'create',
+              record: bool = True) -> Dict[str, Any]:
+        """
+        Stage a file write.
+        
+        Args:
+            filepath: Relative file path
+            content: New file content
+            operation: Operation name reported back ('create' or 'modify')
+            record: Record the change in the database
+        
+        Returns:
+            The operation result; 'success' is final after commit()
+        """
+        full_path = os.path.join(self.project_directory, filepath)
+        existed = os.path.exists(full_path)
+        entry = {
+            'result': {
+                'operation': operation,
+                'filepath': filepath,
+                'success': False,
+                'action': 'modified' if existed else 'created',
+                'bytes_written': len(content),
+                'existed': existed
+            },
+            'full_path': full_path,
+            'temp_path': None,
+            'record': record
+        }
+        self._entries.append(entry)
+        
+        try:
+            dir_path = os.path.dirname(full_path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+            
+            # Same directory as the target, so the rename can't cross filesystems
+            temp_path = os.path.join(
+                dir_path, f".{os.path.basename(full_path)}.{uuid.uuid4().hex[:8]}.tmp"
+            )
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            entry['temp_path'] = temp_path
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            if existed:
+                shutil.copymode(full_path, temp_path)
+        except Exception as e:
+            entry['result']['error'] = str(e)
+            self._discard(entry)
+        return entry['result']
+    
+    def delete(self, filepath: str, record: bool = True) -> Dict[str, Any]:
+        """
+        Stage a file deletion.
+        
+        Args:
+            filepath: Relative file path
+            record: Record the change in the database
+        
+        Returns:
+            The operation result; 'success' is final after commit()
+        """
+        entry = {
+            'result': {
+                'operation': 'delete',
+                'filepath': filepath,
+                'success': False,
+                'action': 'deleted'
+            },
+            'full_path': os.path.join(self.project_directory, filepath),
+            'temp_path': None,
+            'record': record
+        }
+        self._entries.append(entry)
+        return entry['result']
+    
+    def commit(self) -> List[Dict[str, Any]]:
+        """
+        Apply the staged operations.
+        
+        Returns:
+            Operation results in staging order
+        """
+        staged = [entry for entry in self._entries if 'error' not in entry['result']]
+        
+        # Data first: one fsync per file, all before any rename
+        if self.file_ops.fsync:
+            for entry in staged:
+                if entry['temp_path']:
+                    try:
+                        fd = os.open(entry['temp_path'], os.O_RDONLY)
+                        try:
+                            os.fsync(fd)
+                        finally:
+                            os.close(fd)
+                    except OSError as e:
+                        entry['result']['error'] = str(e)
+                        self._discard(entry)
+        
+        directories = set()
+        applied = []
+        for entry in staged:
+            if 'error' in entry['result']:
+                continue
+            try:
+                if entry['temp_path']:
+                    os.replace(entry['temp_path'], entry['full_path'])
+                    entry['temp_path'] = None
+                else:
+                    os.remove(entry['full_path'])
+                entry['result']['success'] = True
+                directories.add(os.path.dirname(entry['full_path']) or '.')
+                applied.append(entry)
+            except Exception as e:
+                entry['result']['error'] = str(e)
+                self._discard(entry)
+        
+        # Make the renames durable, once per directory
+        if self.file_ops.fsync:
+            for directory in directories:
+                _fsync_directory(directory)
+        
+        db = self.file_ops.db
+        if db and self.task_id:
+            db.save_file_modifications(self.task_id, [
+                (entry['result']['filepath'], entry['result']['action'])
+                for entry in applied if entry['record']
+            ])
+        
+        for entry in applied:
+            self.file_ops._notify_write(entry['full_path'])
+        
+        results = [entry['result'] for entry in self._entries]
+        self._entries = []
+        return results
+    
+    def abort(self):
+        """Discard the staged operations and their temporary files."""
+        for entry in self._entries:
+            self._discard(entry)
+        self._entries = []
+    
+    def _discard(self, entry: Dict[str, Any]):
+        if entry['temp_path']:
+            try:
+                os.remove(entry['temp_path'])
+            except OSError:
+                pass
+            entry['temp_path'] = None
+
+
+def _fsync_directory(directory: str):
+    """Flush a directory entry to disk (not supported on Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 
 class FileOperations:
@@ -13,14 +217,48 @@ class FileOperations:
     Parses code blocks and file suggestions from Claude's responses.
     """
     
-    def __init__(self, db: Optional[Database] = None):
+    def __init__(self, db: Optional[Database] = None, fsync: bool = True):
         """
         Initialize file operations handler.
         
         Args:
             db: Optional database for tracking changes
+            fsync: Flush written files and their directories to disk
         """
         self.db = db
+        self.fsync = fsync
+        self._write_listeners = []
+    
+    def add_write_listener(self, listener: Callable[[str], None]):
+        """
+        Register a callable notified with the absolute path of every file
+        written or deleted (e.g. to keep a project index up to date).
+        
+        Args:
+            listener: Callable receiving the changed file's path
+        """
+        self._write_listeners.append(listener)
+    
+    def write_batch(self, project_directory: str, task_id: Optional[int] = None) -> WriteBatch:
+        """
+        Start a batch of file operations that are applied together.
+        
+        Use as a context manager to commit on success and discard the
+        staged files on error.
+        
+        Args:
+            project_directory: Root the staged paths are relative to
+            task_id: Optional task ID for tracking
+        """
+        return WriteBatch(self, project_directory, task_id)
+    
+    def _notify_write(self, full_path: str):
+        """Tell write listeners that a file changed."""
+        for listener in self._write_listeners:
+            try:
+                listener(os.path.abspath(full_path))
+            except Exception:
+                pass
     
     def parse_and_execute(
         self, 
@@ -41,77 +279,120 @@ class FileOperations:
         Returns:
             List of operations performed
         """
-        operations = []
+        # Parse file and edit blocks from Claude's output in one pass
+        blocks = parse_blocks(claude_output)
+        file_blocks = self._file_blocks(blocks)
+        edit_text = '\n'.join(block['text'] for block in blocks if block['type'] == 'edit')
         
-        # Parse file operations from Claude's output
-        file_blocks = self.extract_file_blocks(claude_output)
+        # Validation pass: apply every edit in memory before touching disk
+        pending = {block['filepath']: block['content'] for block in file_blocks
+                   if block['operation'] in ('create', 'modify')}
+        edits = self.plan_edits(extract_edit_blocks(edit_text), project_directory, pending)
         
+        if dry_run:
+            return [{
+                'operation': file_block['operation'],
+                'filepath': file_block['filepath'],
+                'success': True,
+                'dry_run': True
+            } for file_block in file_blocks] + [
+                dict({k: v for k, v in edit.items() if k != 'content'}, dry_run=True)
+                for edit in edits
+            ]
+        
+        # Stage every block, then rename them into place together
+        batch = self.write_batch(project_directory, task_id)
         for file_block in file_blocks:
             filepath = file_block['filepath']
-            content = file_block['content']
             operation = file_block['operation']  # create, modify, delete
             
-            full_path = os.path.join(project_directory, filepath)
+            if operation == 'create' or operation == 'modify':
+                batch.write(filepath, file_block['content'], operation)
+            elif operation == 'delete':
+                if os.path.exists(os.path.join(project_directory, filepath)):
+                    batch.delete(filepath)
+        
+        rejected = []
+        for edit in edits:
+            if not edit['success']:
+                rejected.append(edit)
+            elif edit['operation'] == 'delete':
+                batch.delete(edit['filepath'])
+            else:
+                result = batch.write(edit['filepath'], edit['content'], 'edit')
+                result['hunks'] = edit['hunks']
+                result['fuzzy'] = edit['fuzzy']
+        
+        return batch.commit() + rejected
+    
+    def plan_edits(
+        self,
+        edit_blocks: List[Dict[str, Any]],
+        project_directory: str,
+        pending: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply edit blocks in memory without writing anything.
+        
+        Args:
+            edit_blocks: Blocks from edit_blocks.extract_edit_blocks
+            project_directory: Project directory
+            pending: Content of files written earlier in the same response,
+                by relative path; edits apply on top of it
             
-            if dry_run:
-                operations.append({
-                    'operation': operation,
-                    'filepath': filepath,
-                    'success': True,
-                    'dry_run': True
-                })
-                continue
+        Returns:
+            One result per edited file with 'success', the new 'content',
+            'hunks' and 'fuzzy' counts, or 'error' and 'conflicts'
+        """
+        pending = dict(pending or {})
+        plans = []
+        
+        for edit in edit_blocks:
+            filepath = edit['filepath']
+            full_path = os.path.join(project_directory, filepath)
+            plan = {
+                'operation': 'delete' if edit['operation'] == 'delete' else 'edit',
+                'filepath': filepath,
+                'success': False,
+                'hunks': len(edit['hunks']),
+                'fuzzy': 0
+            }
+            plans.append(plan)
             
             try:
-                if operation == 'create' or operation == 'modify':
-                    # Check if file already exists
-                    file_existed = os.path.exists(full_path)
-                    action_taken = 'modified' if file_existed else 'created'
-                    
-                    # Create directories if needed
-                    dir_path = os.path.dirname(full_path)
-                    if dir_path:
-                        os.makedirs(dir_path, exist_ok=True)
-                    
-                    # Write file (overwrites if exists)
-                    with open(full_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                    
-                    # Track in database
-                    if self.db and task_id:
-                        self.db.save_file_modification(task_id, filepath, action_taken)
-                    
-                    operations.append({
-                        'operation': operation,
-                        'filepath': filepath,
-                        'success': True,
-                        'action': action_taken,
-                        'bytes_written': len(content),
-                        'existed': file_existed
-                    })
-                
-                elif operation == 'delete':
-                    if os.path.exists(full_path):
-                        os.remove(full_path)
-                        
-                        if self.db and task_id:
-                            self.db.save_file_modification(task_id, filepath, 'deleted')
-                        
-                        operations.append({
-                            'operation': 'delete',
-                            'filepath': filepath,
-                            'success': True
-                        })
-                
+                if filepath in pending:
+                    current = pending[filepath]
+                elif os.path.exists(full_path):
+                    with open(full_path, 'r', encoding='utf-8') as f:
+                        current = f.read()
+                else:
+                    current = None
             except Exception as e:
-                operations.append({
-                    'operation': operation,
-                    'filepath': filepath,
-                    'success': False,
-                    'error': str(e)
-                })
-        
-        return operations
+                plan['error'] = str(e)
+                continue
+            plan['existed'] = current is not None
+            
+            if edit['operation'] == 'delete':
+                plan['success'] = current is not None
+                if current is None:
+                    plan['error'] = 'File does not exist'
+                continue
+            
+            if current is None and any(hunk['old'] for hunk in edit['hunks']):
+                plan['error'] = 'File does not exist'
+                continue
+            
+            result = apply_hunks(current or '', edit['hunks'])
+            if result['success']:
+                plan['success'] = True
+                plan['content'] = result['content']
+                plan['fuzzy'] = result['fuzzy']
+                pending[filepath] = result['content']
+            else:
+                plan['error'] = f"{len(result['conflicts'])} of {len(edit['hunks'])} hunk(s) conflict"
+                plan['conflicts'] = result['conflicts']
+        
+        return plans
     
     def extract_file_blocks(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -129,69 +410,12 @@ class FileOperations:
         Returns:
             List of file blocks with filepath, content, and operation
         """
-        file_blocks = []
-        
-        # Pattern 1: Explicit file markers with code blocks
-        # "File: example.py" or "**File: example.py**" followed by code block
-        # Handles markdown bold/italic syntax
-        pattern1 = r'\*{0,2}(?:File|Create file|Modify file):\s*([^\n*]+?\.[\w]+)\*{0,2}\s*\n```(?:\w+)?\n(.*?)```'
-        matches1 = re.findall(pattern1, text, re.DOTALL | re.IGNORECASE)
-        
-        for filepath, content in matches1:
-            filepath = filepath.strip().strip('`').strip('"').strip("'").strip('*')
-            file_blocks.append({
-                'filepath': filepath,
-                'content': content.strip(),
-                'operation': 'create'
-            })
-        
-        # Pattern 2: Code blocks with filename in first comment
-        # ```python
-        # filename.py
-        pattern2 = r'```(?:\w+)?\n#\s*([^\n]+?\.[\w]+)\n(.*?)```'
-        matches2 = re.findall(pattern2, text, re.DOTALL)
-        
-        for filepath, content in matches2:
-            filepath = filepath.strip()
-            # Check if this isn't already captured
-            if not any(fb['filepath'] == filepath for fb in file_blocks):
-                file_blocks.append({
-                    'filepath': filepath,
-                    'content': content.strip(),
-                    'operation': 'create'
-                })
-        
-        # Pattern 3: Explicit structure like:
-        # Create `main.py`:
-        # ```python
-        # code
-        # ```
-        pattern3 = r'(?:Create|Update|Modify)\s+[`"\']([^\n`"\']+?\.[\w]+)[`"\']:\s*\n```(?:\w+)?\n(.*?)```'
-        matches3 = re.findall(pattern3, text, re.DOTALL | re.IGNORECASE)
-        
-        for filepath, content in matches3:
-            filepath = filepath.strip()
-            if not any(fb['filepath'] == filepath for fb in file_blocks):
-                file_blocks.append({
-                    'filepath': filepath,
-                    'content': content.strip(),
-                    'operation': 'create'
-                })
-        
-        # Pattern 4: HTML/CSS/JS files with explicit markers (with markdown support)
-        pattern4 = r'\*{0,2}(?:File|Create):\s*([^\n*]+?\.(?:html|css|js|json|txt|md))\*{0,2}\s*\n```(?:\w+)?\n(.*?)```'
-        matches4 = re.findall(pattern4, text, re.DOTALL | re.IGNORECASE)
-        
-        for filepath, content in matches4:
-            filepath = filepath.strip().strip('`').strip('"').strip("'").strip('*')
-            if not any(fb['filepath'] == filepath for fb in file_blocks):
-                file_blocks.append({
-                    'filepath': filepath,
-                    'content': content.strip(),
-                    'operation': 'create'
-                })
-        
-        return file_blocks
+        return self._file_blocks(parse_blocks(text))
+    
+    def _file_blocks(self, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """File blocks from BlockParser output, in the shape parse_and_execute uses."""
+        return [{key: block[key] for key in ('filepath', 'content', 'operation')}
+                for block in blocks if block['type'] == 'file']
     
     def create_file(
         self, 
@@ -212,31 +436,21 @@ class FileOperations:
         Returns:
             Result dict
         """
-        full_path = os.path.join(project_directory, filepath)
+        batch = self.write_batch(project_directory, task_id)
+        batch.write(filepath, content)
+        result = batch.commit()[0]
         
-        try:
-            # Create directories
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            
-            # Write file
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Track in database
-            if self.db and task_id:
-                self.db.save_file_modification(task_id, filepath, 'created')
-            
-            return {
-                'success': True,
-                'filepath': filepath,
-                'bytes_written': len(content)
-            }
-        except Exception as e:
+        if not result['success']:
             return {
                 'success': False,
                 'filepath': filepath,
-                'error': str(e)
+                'error': result.get('error', 'Unknown error')
             }
+        return {
+            'success': True,
+            'filepath': filepath,
+            'bytes_written': len(content)
+        }
     
     def modify_file(
         self, 
@@ -260,34 +474,35 @@ class FileOperations:
         full_path = os.path.join(project_directory, filepath)
         
         try:
-            # Backup existing file
-            if os.path.exists(full_path):
-                backup_path = full_path + '.bak'
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    backup_content = f.read()
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(backup_content)
+            batch = self.write_batch(project_directory, task_id)
             
-            # Write new content
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Track in database
-            if self.db and task_id:
-                self.db.save_file_modification(task_id, filepath, 'modified')
+            # Backup existing file, renamed into place before the new content
+            backed_up = os.path.exists(full_path)
+            if backed_up:
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    batch.write(filepath + '.bak', f.read(), record=False)
             
+            result = batch.write(filepath, content, 'modify')
+            batch.commit()
+        except Exception as e:
             return {
-                'success': True,
+                'success': False,
                 'filepath': filepath,
-                'bytes_written': len(content),
-                'backed_up': True
+                'error': str(e)
             }
-        except Exception as e:
+        
+        if not result['success']:
             return {
                 'success': False,
                 'filepath': filepath,
-                'error': str(e)
+                'error': result.get('error', 'Unknown error')
             }
+        return {
+            'success': True,
+            'filepath': filepath,
+            'bytes_written': len(content),
+            'backed_up': backed_up
+        }
     
     def delete_file(
         self, 
@@ -308,30 +523,27 @@ class FileOperations:
         """
         full_path = os.path.join(project_directory, filepath)
         
-        try:
-            if os.path.exists(full_path):
-                os.remove(full_path)
-                
-                # Track in database
-                if self.db and task_id:
-                    self.db.save_file_modification(task_id, filepath, 'deleted')
-                
-                return {
-                    'success': True,
-                    'filepath': filepath
-                }
-            else:
-                return {
-                    'success': False,
-                    'filepath': filepath,
-                    'error': 'File does not exist'
-                }
-        except Exception as e:
+        if not os.path.exists(full_path):
             return {
                 'success': False,
                 'filepath': filepath,
-                'error': str(e)
+                'error': 'File does not exist'
+            }
+        
+        batch = self.write_batch(project_directory, task_id)
+        batch.delete(filepath)
+        result = batch.commit()[0]
+        
+        if not result['success']:
+            return {
+                'success': False,
+                'filepath': filepath,
+                'error': result.get('error', 'Unknown error')
             }
+        return {
+            'success': True,
+            'filepath': filepath
+        }
     
     def format_operations_summary(self, operations: List[Dict[str, Any]]) -> str:
         """
@@ -372,6 +584,9 @@ class FileOperations:
                     filepath = op['filepath']
                     if op.get('dry_run'):
                         summary += f"  [DRY RUN] {filepath}\n"
+                    elif op.get('operation') == 'edit':
+                        fuzzy = f", {op['fuzzy']} fuzzy" if op.get('fuzzy') else ""
+                        summary += f"  ✏️  {filepath} (edit: {op.get('hunks', 0)} hunk(s){fuzzy})\n"
                     else:
                         bytes_written = op.get('bytes_written', 0)
                         summary += f"  🔄 {filepath} ({bytes_written} bytes)\n"
@@ -379,7 +594,10 @@ class FileOperations:
         if failed:
             summary += "\nFailed:\n"
             for op in failed:
-                summary += f"  ❌ {op['filepath']}: {op.get('error', 'Unknown error')}\n"
+                if op.get('conflicts'):
+                    summary += format_conflicts(op['filepath'], op['conflicts'])
+                else:
+                    summary += f"  ❌ {op['filepath']}: {op.get('error', 'Unknown error')}\n"
         
         return summary
 
@@ -0,0 +1,424 @@
+"""
+Job Manager - Runs task executions from a durable SQLite job queue.
+
+Every execution is a row in the jobs table, so queued work survives a
+restart. Workers claim jobs atomically (highest task priority first),
+hold them under a lease that a heartbeat keeps extending, and retry
+failed attempts with exponential backoff. A job whose worker died
+becomes claimable again once its lease expires. Workers can be threads
+of the web server, separate processes started with
+
+    python job_manager.py --workers 2
+
+or both, all sharing one database.
+
+Each job gets its own LMStudioExecutor so conversations don't mix.
+Executors of the same project share one ProjectTools, and with it the
+file, search and symbol indexes.
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, Callable, List
+
+from database import Database
+from local_llm_client import LocalLLMClient
+from lm_studio_executor import LMStudioExecutor
+from project_tools import ProjectTools
+
+
+# Task status after an execution, by executor result status
+TASK_STATUS = {
+    'COMPLETED': 'completed',
+    'NEEDS_REVISION': 'pending',
+    'CANCELLED': 'pending'
+}
+
+
+def execute_job_task(
+    db: Database,
+    job: Dict[str, Any],
+    executor: LMStudioExecutor,
+    cancel_event: threading.Event,
+    callback: Optional[callable] = None,
+    test_runner=None
+) -> Dict[str, Any]:
+    """
+    Execute the task of a job and record the outcome on the task.
+    
+    Args:
+        db: Database
+        job: Claimed job row
+        executor: Executor for the job's project
+        cancel_event: Stops the execution when set
+        callback: Receives executor progress updates, plus 'testing' and
+            'test_results' updates when tests run
+        test_runner: Optional TestRunner for coding and testing tasks
+    
+    Returns:
+        Executor result with 'files_modified' and the new 'task_status'
+    """
+    task_id = job['task_id']
+    project_dir = job['project_directory']
+    task = db.get_task(task_id)
+    if task is None:
+        raise ValueError(f"Task #{task_id} not found")
+    
+    db.update_task_status(task_id, 'in_progress')
+    
+    try:
+        result = executor.execute_task(
+            task_id=task_id,
+            task_description=task['description'],
+            task_type=task['task_type'],
+            max_iterations=3,
+            callback=callback,
+            stream=callback is not None,
+            cancel_event=cancel_event,
+            speculative_tools=True
+        )
+    except Exception as e:
+        db.update_task_status(task_id, 'failed')
+        db.save_result(task_id, 'error', str(e))
+        raise
+    
+    status = result.get('status', 'UNKNOWN')
+    file_operations = result.get('file_operations', [])
+    files_modified = [op['filepath'] for op in file_operations if op.get('success')]
+    
+    # Save conversation
+    db.save_conversation(
+        task_id,
+        'lm_studio',
+        result.get('response', ''),
+        result.get('response', ''),
+        {'iterations': result.get('iterations', 1)}
+    )
+    
+    # Execute tests if applicable
+    if test_runner and task['task_type'] in ['coding', 'testing'] and files_modified and status != 'CANCELLED':
+        if callback:
+            callback({'status': 'testing', 'message': 'Running tests...'})
+        test_results = test_runner.execute_pytest(project_dir)
+        if callback:
+            callback({
+                'status': 'test_results',
+                'message': 'Tests finished',
+                'summary': test_runner.format_results_summary(test_results)
+            })
+    
+    # Save result
+    db.save_result(
+        task_id,
+        task['task_type'],
+        result.get('response', ''),
+        {
+            'status': status,
+            'files_modified': files_modified,
+            'iterations': result.get('iterations', 1),
+            'tool_results': len(result.get('tool_results', [])),
+            'job_id': job['id'],
+            'attempt': job.get('attempts', 1)
+        }
+    )
+    
+    task_status = TASK_STATUS.get(status, 'failed')
+    db.update_task_status(task_id, task_status)
+    
+    result['files_modified'] = files_modified
+    result['task_status'] = task_status
+    return result
+
+
+class JobManager:
+    """Claims jobs from the queue and runs them on worker threads."""
+    
+    def __init__(
+        self,
+        db: Database,
+        llm_client: LocalLLMClient,
+        run_job: Callable[[Dict[str, Any], LMStudioExecutor, threading.Event], Any],
+        max_workers: int = 2,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 2.0,
+        retry_delay: float = 5.0,
+        max_attempts: int = 3,
+        start: bool = True
+    ):
+        """
+        Initialize job manager.
+        
+        Args:
+            db: Database holding the jobs table
+            llm_client: LM Studio client shared by all executors
+            run_job: Runs one job on a worker thread, given the job row, a
+                fresh executor for its project and the job's cancel event.
+                Raising marks the attempt as failed.
+            max_workers: Jobs this process runs at the same time
+            on_change: Called with the job row after every status change
+            lease_seconds: Claim lifetime; heartbeats renew it every third
+            poll_interval: Seconds idle workers wait before checking the
+                queue for jobs queued by other processes
+            retry_delay: Backoff before the first retry; doubles per attempt
+            max_attempts: Attempts per job before it is failed
+            start: Start the worker threads immediately
+        """
+        self.db = db
+        self.llm = llm_client
+        self.run_job = run_job
+        self.max_workers = max_workers
+        self.on_change = on_change
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        
+        self._lock = threading.Lock()
+        self._cancel_events = {}
+        self._owners = {}
+        self._project_tools = {}
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        
+        if start:
+            self.start()
+    
+    def start(self):
+        """Start the worker and heartbeat threads."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.max_workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(f"{self.worker_prefix}:{index}",),
+                name=f"agent7-job-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="agent7-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+    
+    def _tools_for(self, project_directory: str) -> ProjectTools:
+        key = os.path.abspath(project_directory)
+        with self._lock:
+            tools = self._project_tools.get(key)
+            if tools is None:
+                tools = ProjectTools(project_directory)
+                self._project_tools[key] = tools
+            return tools
+    
+    def create_executor(self, project_directory: str) -> LMStudioExecutor:
+        """Create an executor that shares the project's ProjectTools."""
+        return LMStudioExecutor(
+            self.llm,
+            self.db,
+            project_directory,
+            project_tools=self._tools_for(project_directory)
+        )
+    
+    def _notify(self, job_id: int):
+        if self.on_change:
+            try:
+                self.on_change(self.db.get_job(job_id))
+            except Exception as e:
+                print(f"⚠️  Job change callback failed: {e}")
+    
+    def submit(self, task_id: int, project_directory: str) -> Dict[str, Any]:
+        """
+        Queue a task for execution, prioritised by the task's priority.
+        
+        Args:
+            task_id: Task to execute
+            project_directory: Project root to execute in
+        
+        Returns:
+            Dict with 'success' and 'job_id', or 'error' if the task
+            already has a queued or running job
+        """
+        with self._lock:
+            active = self.db.get_active_job(task_id)
+            if active:
+                return {
+                    'success': False,
+                    'error': f"Task #{task_id} is already {active['status']} (job #{active['id']})",
+                    'job_id': active['id']
+                }
+            
+            task = self.db.get_task(task_id)
+            job_id = self.db.create_job(
+                task_id,
+                project_directory,
+                priority=task['priority'] if task else 0,
+                max_attempts=self.max_attempts
+            )
+        
+        with self._wakeup:
+            self._wakeup.notify()
+        self._notify(job_id)
+        return {'success': True, 'job_id': job_id}
+    
+    def cancel(self, job_id: int) -> Dict[str, Any]:
+        """
+        Cancel a queued or running job.
+        
+        A queued job is cancelled immediately. A running one stops at the
+        executor's next check (at once if it runs in this process,
+        otherwise after its worker's next heartbeat).
+        
+        Returns:
+            Dict with 'success' and the job 'status', or 'error'
+        """
+        status = self.db.cancel_job(job_id)
+        if status is None:
+            return {'success': False, 'error': f"Job #{job_id} is not active"}
+        
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        
+        self._notify(job_id)
+        return {'success': True, 'job_id': job_id, 'status': status}
+    
+    def cancel_task(self, task_id: int) -> Dict[str, Any]:
+        """Cancel the active job of a task."""
+        active = self.db.get_active_job(task_id)
+        if not active:
+            return {'success': False, 'error': f"Task #{task_id} is not executing"}
+        return self.cancel(active['id'])
+    
+    def active_job_ids(self) -> List[int]:
+        """Get the IDs of jobs running in this process."""
+        with self._lock:
+            return sorted(self._cancel_events)
+    
+    def _worker_loop(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                job = self.db.claim_job(worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"⚠️  Job claim failed: {e}")
+                job = None
+            
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            
+            self._run(job, worker_id)
+    
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                running = list(self._owners.items())
+            for job_id, worker_id in running:
+                try:
+                    beat = self.db.heartbeat_job(job_id, worker_id, self.lease_seconds)
+                except Exception as e:
+                    print(f"⚠️  Job heartbeat failed: {e}")
+                    continue
+                if beat['cancel'] or not beat['owned']:
+                    # Cancelled from another process, or the job was reclaimed
+                    with self._lock:
+                        event = self._cancel_events.get(job_id)
+                    if event is not None:
+                        event.set()
+    
+    def _run(self, job: Dict[str, Any], worker_id: str):
+        """Run one claimed job and record its outcome."""
+        job_id = job['id']
+        event = threading.Event()
+        if job['cancel_requested']:
+            event.set()
+        with self._lock:
+            self._cancel_events[job_id] = event
+            self._owners[job_id] = worker_id
+        self._notify(job_id)
+        
+        executor = None
+        try:
+            executor = self.create_executor(job['project_directory'])
+            self.run_job(job, executor, event)
+            self.db.finish_job(job_id, worker_id, 'cancelled' if event.is_set() else 'completed')
+        except Exception as e:
+            if event.is_set():
+                self.db.finish_job(job_id, worker_id, 'cancelled', str(e))
+            elif job['attempts'] < job['max_attempts']:
+                delay = self.retry_delay * (2 ** (job['attempts'] - 1))
+                self.db.retry_job(job_id, worker_id, str(e), delay)
+            else:
+                self.db.finish_job(job_id, worker_id, 'failed', str(e))
+        finally:
+            if executor is not None:
+                # The project's ProjectTools outlive the job; its executor doesn't
+                executor.close()
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+                self._owners.pop(job_id, None)
+            self._notify(job_id)
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the workers. Running jobs are cancelled; queued jobs stay in
+        the queue for the next start.
+        """
+        self._stop.set()
+        with self._lock:
+            events = list(self._cancel_events.values())
+        for event in events:
+            event.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+
+def main():
+    """Run standalone queue workers."""
+    parser = argparse.ArgumentParser(description="Agent7 job queue worker")
+    parser.add_argument('--db', default='agent7.db', help='Database path')
+    parser.add_argument('--llm-url', default='http://localhost:1234/v1', help='LM Studio URL')
+    parser.add_argument('--workers', type=int, default=1, help='Jobs to run at the same time')
+    parser.add_argument('--lease', type=float, default=60.0, help='Lease seconds per claim')
+    args = parser.parse_args()
+    
+    db = Database(args.db)
+    
+    def run_job(job, executor, cancel_event):
+        def progress(update):
+            if update.get('status') != 'token' and update.get('message'):
+                print(f"[job {job['id']}] {update['message']}")
+        
+        result = execute_job_task(db, job, executor, cancel_event, callback=progress)
+        print(f"[job {job['id']}] Task #{job['task_id']}: {result['task_status']}")
+    
+    manager = JobManager(
+        db,
+        LocalLLMClient(args.llm_url),
+        run_job,
+        max_workers=args.workers,
+        lease_seconds=args.lease
+    )
+    print(f"🚀 {args.workers} worker(s) polling {args.db} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping workers...")
+        manager.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,15 @@ LM Studio Executor - Main execution engine using local LLM.
 This replaces Claude CLI integration, making Agent7 work entirely with LM Studio.
 """
 import os
-from typing import Dict, Any, Optional, List
+import threading
+from typing import Dict, Any, Optional, List, Tuple
 from local_llm_client import LocalLLMClient
 from project_tools import ProjectTools
 from tool_executor import ToolExecutor
 from file_operations import FileOperations
+from edit_blocks import format_conflicts
 from database import Database
+from context_budget import ContextBudgeter
 
 
 class LMStudioExecutor:
@@ -27,7 +30,10 @@ class LMStudioExecutor:
         self,
         llm_client: LocalLLMClient,
         db: Database,
-        project_directory: str
+        project_directory: str,
+        context_budget: Optional[ContextBudgeter] = None,
+        project_tools: Optional[ProjectTools] = None,
+        native_tools: bool = True
     ):
         """
         Initialize LM Studio executor.
@@ -36,18 +42,133 @@ class LMStudioExecutor:
             llm_client: LM Studio client
             db: Database for tracking
             project_directory: Project root directory
+            context_budget: Optional budgeter that trims conversation history
+                to fit the model context (defaults to ContextBudgeter())
+            project_tools: Optional ProjectTools to share with other executors
+                of the same project, so they share one file index
+            native_tools: Offer the tools as JSON-schema function definitions
+                so the model can return structured tool calls; text tool
+                requests are still parsed when it doesn't
         """
         self.llm = llm_client
         self.db = db
         self.project_directory = project_directory
         
         # Initialize tool chain
-        self.project_tools = ProjectTools(project_directory)
-        self.tool_executor = ToolExecutor(project_directory)
+        self.project_tools = project_tools or ProjectTools(project_directory)
+        self.tool_executor = ToolExecutor(project_directory, project_tools=self.project_tools)
         self.file_ops = FileOperations(db)
+        self.native_tools = native_tools
+        
+        # Keep the shared file index current as files are written
+        self.file_ops.add_write_listener(self.project_tools.notify_file_changed)
         
         # Conversation history for context
         self.conversation_history = []
+        self.context_budget = context_budget or ContextBudgeter()
+        self.context_tokens_saved = 0
+    
+    def close(self):
+        """Release the tool executor's index listener and worker threads."""
+        self.tool_executor.close()
+    
+    def _fit_history(
+        self,
+        system_prompt: str,
+        prompt: str,
+        max_tokens: int,
+        callback: Optional[callable] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Trim conversation history to the context budget for one request.
+        
+        Args:
+            system_prompt: System prompt of the request
+            prompt: User prompt of the request
+            max_tokens: Tokens reserved for the response
+            callback: Optional callback for progress updates
+            
+        Returns:
+            History to send with the request
+        """
+        history, report = self.context_budget.fit(
+            self.conversation_history,
+            system_prompt=system_prompt,
+            prompt=prompt,
+            reserve_tokens=max_tokens
+        )
+        
+        self.context_tokens_saved += report['saved_tokens']
+        
+        if callback and report['saved_tokens'] > 0:
+            callback({
+                'status': 'context',
+                'message': f"Trimmed history: saved {report['saved_tokens']} prompt tokens "
+                           f"({report['original_tokens']} -> {report['fitted_tokens']})",
+                'saved_tokens': report['saved_tokens'],
+                'total_saved_tokens': self.context_tokens_saved,
+                'actions': report['actions']
+            })
+        
+        return history
+    
+    def _fit_with_references(
+        self,
+        system_prompt: str,
+        prompt: str,
+        max_tokens: int,
+        references: List[Tuple[str, str]],
+        callback: Optional[callable] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Fit history for a prompt whose tool results may point at earlier ones.
+        
+        An "unchanged since" notice only helps while the result it refers
+        to is still intact in the history being sent. Notices whose result
+        the budgeter shrank or dropped are replaced by the full result, in
+        the prompt and in the stored history.
+        
+        Args:
+            system_prompt: System prompt of the request
+            prompt: User prompt of the request
+            max_tokens: Tokens reserved for the response
+            references: (notice, full result) pairs used in the prompt
+            callback: Optional callback for progress updates
+        
+        Returns:
+            Tuple of (prompt to send, history to send)
+        """
+        references = list(references)
+        while references:
+            history, _ = self.context_budget.fit(
+                self.conversation_history,
+                system_prompt=system_prompt,
+                prompt=prompt,
+                reserve_tokens=max_tokens
+            )
+            missing = [
+                (notice, full) for notice, full in references
+                if not any(full in message['content'] for message in history)
+            ]
+            if not missing:
+                break
+            
+            for notice, full in missing:
+                prompt = prompt.replace(notice, full)
+                if self.conversation_history and notice in self.conversation_history[-1]['content']:
+                    last = self.conversation_history[-1]
+                    last['content'] = last['content'].replace(notice, full)
+                references.remove((notice, full))
+        
+        return prompt, self._fit_history(system_prompt, prompt, max_tokens, callback)
+    
+    @staticmethod
+    def _describe_tool_call(call: Dict[str, Any]) -> str:
+        """Render a native tool call in the TOOL: text format."""
+        if call.get('arguments') is None:
+            return f"TOOL: {call['name']}({call.get('raw_arguments', '')})"
+        args = ', '.join(f"{key}={value!r}" for key, value in call['arguments'].items())
+        return f"TOOL: {call['name']}({args})"
     
     def create_system_prompt(self) -> str:
         """
@@ -74,33 +195,50 @@ You have access to these tools to explore the project:
 - find_definitions(name, type) - Find Python functions/classes
 - get_project_structure(max_depth) - Get directory tree
 - get_file_info(filepath) - Get file metadata
+- find_references(name) - Find where a function/class/variable is used
+- get_file_outline(filepath) - List classes/functions in a Python file
 
 To use a tool, request it explicitly (use EXACT parameter names):
 TOOL: list_files(relative_path="src", extensions=[".py"])
 TOOL: read_file(filepath="main.py")
 TOOL: search_in_files(pattern="class.*Database", extensions=[".py"])
 
-FILE CREATION/MODIFICATION FORMAT:
-When creating OR modifying files, use this EXACT format:
+FILE CREATION FORMAT:
+When creating a file (or rewriting a small one), use this EXACT format:
 
 File: path/to/filename.ext
 ```language
 complete file content here
 ```
 
-🚨 FOR CODING TASKS: You MUST output File: blocks! Don't just explain - DO IT!
+FILE EDIT FORMAT:
+To change part of an existing file, output only the change as SEARCH/REPLACE blocks:
+
+Edit: path/to/filename.ext
+<<<<<<< SEARCH
+exact lines currently in the file
+=======
+the lines that replace them
+>>>>>>> REPLACE
+
+- SEARCH must copy the current lines exactly (read the file first) and be unique in the file
+- Use several blocks for several changes; keep each block small with a few lines of context
+- Unified diffs (```diff with --- a/file, +++ b/file and @@ hunks) are also accepted
+- If an edit doesn't match, that file is left unchanged and the conflict is reported back to you; your other changes are still saved
+
+🚨 FOR CODING TASKS: You MUST output File: or Edit: blocks! Don't just explain - DO IT!
 
 ⚠️ CRITICAL RULES:
 1. **Use EXACT file paths** from exploration results (e.g., if file is at "paddle.py", use "paddle.py" NOT "src/paddle.py")
 2. **Read existing files FIRST** if modifying them (use read_file tool)
-3. **Include COMPLETE file content** - this will overwrite the entire file
+3. **File: blocks overwrite the entire file** - include COMPLETE content, or use Edit: blocks for changes
 4. **Verify paths** - if get_project_structure shows "main.py" at root, use "main.py" not "src/main.py"
 5. **ALWAYS OUTPUT FILES** for coding tasks - explaining what to do is NOT enough!
 
 WORKFLOW FOR EXISTING PROJECTS:
 1. **EXPLORE FIRST**: Use get_project_structure() to see actual file locations
 2. **READ EXISTING FILES**: Use read_file() to see current content
-3. **OUTPUT FILE BLOCKS**: Create File: blocks with complete updated content
+3. **OUTPUT CHANGES**: Edit: blocks for changes to existing files, File: blocks for new files
 4. **DON'T JUST TALK ABOUT IT**: Actually output the files!
 
 WRONG ❌ (just explaining):
@@ -151,25 +289,27 @@ Project Directory: {self.project_directory}
 Instructions:
 1. Explore project: TOOL: get_project_structure()
 2. Read existing code: TOOL: read_file(filepath="...")
-3. ⚠️ MANDATORY: Output fixed files using File: format!
+3. ⚠️ MANDATORY: Output your changes as Edit: or File: blocks!
 
 ⚠️⚠️⚠️ CRITICAL FOR CODING TASKS ⚠️⚠️⚠️
-You MUST output files in this format:
+Change existing files with SEARCH/REPLACE blocks:
+
+Edit: main.py
+<<<<<<< SEARCH
+paddle = Paddle(10, 20)
+=======
+paddle = Paddle(10, 20, 100, 10, WHITE)
+>>>>>>> REPLACE
+
+Create new files with complete content:
 
 File: filename.py
 ```python
 complete file content here
 ```
 
-Example:
-File: main.py
-```python
-import pygame
-# ... rest of file ...
-```
-
-DO NOT just say "update line X" - OUTPUT THE COMPLETE FILE!
-Without File: blocks, your code changes will NOT be saved!
+DO NOT just say "update line X" - OUTPUT THE EDIT!
+Without Edit: or File: blocks, your code changes will NOT be saved!
 """
         elif task_type == 'planning':
             prompt += """
@@ -233,7 +373,10 @@ Instructions:
         task_description: str,
         task_type: str = 'coding',
         max_iterations: int = 3,
-        callback: Optional[callable] = None
+        callback: Optional[callable] = None,
+        stream: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+        speculative_tools: bool = False
     ) -> Dict[str, Any]:
         """
         Execute a task with LM Studio.
@@ -244,27 +387,72 @@ Instructions:
             task_type: Type of task
             max_iterations: Max tool-execute cycles
             callback: Optional callback for progress updates
+            stream: Stream response tokens to the callback as 'token' updates
+            cancel_event: Set to stop the task; checked between steps and
+                aborts a streaming response
+            speculative_tools: Stream each response and start TOOL: and JSON
+                tool calls as soon as they are complete, while the model is
+                still generating; results are used in the next turn
             
         Returns:
-            Execution result with files created and status
+            Execution result with files created and status ('CANCELLED' if stopped)
         """
         if callback:
             callback({'status': 'starting', 'message': 'Initializing LM Studio executor...'})
         
         # Reset conversation
         self.conversation_history = []
+        self.context_tokens_saved = 0
+        
+        # Repeated tool calls within this task get a short "unchanged" notice
+        self.tool_executor.reset_memo()
         
         # Create initial prompt
         task_prompt = self.create_task_prompt(task_description, task_type)
         
         all_file_operations = []
         all_tool_results = []
+        references = []  # "unchanged since" notices in the next prompt
         nudge_used = False  # Track if we used the nudge
         
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+        
+        def cancelled_result():
+            if callback:
+                callback({'status': 'cancelled', 'message': 'Task cancelled'})
+            return {
+                'success': False,
+                'task_id': task_id,
+                'response': self.conversation_history[-1]['content'] if self.conversation_history else '',
+                'file_operations': all_file_operations,
+                'tool_results': all_tool_results,
+                'status': 'CANCELLED',
+                'iterations': len([m for m in self.conversation_history if m['role'] == 'assistant']),
+                'context_tokens_saved': self.context_tokens_saved,
+                'message': 'Task cancelled'
+            }
+        
+        tool_stream = None
+        stream_callback = None
+        if (stream and callback) or speculative_tools:
+            def stream_callback(delta):
+                if cancelled():
+                    return False  # Abort the generation
+                if tool_stream is not None:
+                    tool_stream.feed(delta)
+                if stream and callback:
+                    return callback({'status': 'token', 'delta': delta})
+        
         # Iterative execution with tool support
         # Allow one extra iteration if nudge is needed
         max_iter = max_iterations
         for iteration in range(max_iter + 1):  # +1 to allow nudge iteration
+            self.tool_executor.set_iteration(iteration + 1)
+            
+            if cancelled():
+                return cancelled_result()
+            
             if callback:
                 callback({
                     'status': 'executing',
@@ -272,46 +460,77 @@ Instructions:
                     'iteration': iteration + 1
                 })
             
+            if speculative_tools:
+                tool_stream = self.tool_executor.tool_stream()
+            
             # Send to LM Studio
+            system_prompt = self.create_system_prompt()
+            task_prompt, history = self._fit_with_references(
+                system_prompt, task_prompt, 4096, references, callback
+            )
+            references = []
             response = self.llm.send_message(
                 task_prompt,
-                system_prompt=self.create_system_prompt(),
+                system_prompt=system_prompt,
                 temperature=0.3,
                 max_tokens=4096,
-                history=self.conversation_history
+                history=history,
+                stream_callback=stream_callback,
+                tools=self.tool_executor.tool_definitions() if self.native_tools else None
             )
+            tool_calls = response.get('tool_calls') or []
+            
+            if cancelled():
+                if tool_stream is not None:
+                    tool_stream.cancel()
+                return cancelled_result()
             
-            if not response.get('response'):
+            if not response.get('response') and not tool_calls:
+                if tool_stream is not None:
+                    tool_stream.cancel()
                 return {
                     'success': False,
                     'error': 'No response from LM Studio',
                     'task_id': task_id
                 }
             
-            llm_response = response['response']
+            llm_response = response['response'] or ''
             
-            # Add to conversation history
+            # Add to conversation history, with native calls written out as text
+            described = [self._describe_tool_call(call) for call in tool_calls]
             self.conversation_history.append({
                 'role': 'assistant',
-                'content': llm_response
+                'content': '\n'.join(part for part in [llm_response] + described if part)
             })
             
             if callback:
                 callback({
                     'status': 'response',
                     'message': 'LM Studio responded',
-                    'response': llm_response
+                    'response': llm_response,
+                    'streamed': bool(stream and callback)
                 })
             
-            # Check for tool requests
-            tool_results = self.tool_executor.parse_and_execute(llm_response)
+            # Check for tool requests: structured calls first, then the text
+            # (already running if speculative)
+            if tool_calls:
+                if tool_stream is not None:
+                    tool_stream.cancel()
+                tool_results = self.tool_executor.execute_requests(
+                    self.tool_executor.requests_from_tool_calls(tool_calls)
+                )
+            elif tool_stream is not None:
+                tool_results = tool_stream.finish(llm_response)
+            else:
+                tool_results = self.tool_executor.parse_and_execute(llm_response)
             
             if tool_results:
                 if callback:
                     callback({
                         'status': 'tools',
                         'message': f'Executing {len(tool_results)} tool(s)...',
-                        'tool_count': len(tool_results)
+                        'tool_count': len(tool_results),
+                        'speculative': tool_stream.dispatched if tool_stream is not None else 0
                     })
                 
                 all_tool_results.extend(tool_results)
@@ -321,6 +540,11 @@ Instructions:
                 for tool_result in tool_results:
                     formatted = self.tool_executor.format_tool_result(tool_result)
                     tool_output += formatted + "\n\n"
+                    if 'earlier_result' in tool_result:
+                        references.append((
+                            formatted,
+                            self.tool_executor.format_tool_result(tool_result['earlier_result'])
+                        ))
                 
                 if callback:
                     callback({
@@ -373,6 +597,18 @@ Instructions:
                 
                 all_file_operations.extend(file_operations)
                 
+                # Edits that didn't apply go back to the model before validation
+                conflicts = [op for op in file_operations if op.get('conflicts')]
+                if conflicts:
+                    report = "\n".join(format_conflicts(op['filepath'], op['conflicts']) for op in conflicts)
+                    task_prompt = (
+                        "Some of your edits could not be applied; those files were NOT changed:\n\n" +
+                        report +
+                        "\nRead the current content with read_file and resend only these edits, " +
+                        "copying the SEARCH lines exactly."
+                    )
+                    continue
+                
                 # If files were created, we're likely done
                 # But ask LM Studio to validate
                 files_created = [op['filepath'] for op in file_operations if op['success']]
@@ -391,18 +627,27 @@ Instructions:
                         "NOTES: [your assessment]"
                     )
                     
+                    # Fitted before the prompt joins the history, so it isn't sent twice
+                    validation_system_prompt = "You are validating code quality. Be thorough but fair."
+                    validation_history = self._fit_history(
+                        validation_system_prompt, validation_prompt, 1024, callback
+                    )
                     self.conversation_history.append({
                         'role': 'user',
                         'content': validation_prompt
                     })
                     
+                    if cancelled():
+                        return cancelled_result()
+                    
                     # Get validation response
                     validation = self.llm.send_message(
                         validation_prompt,
-                        system_prompt="You are validating code quality. Be thorough but fair.",
+                        system_prompt=validation_system_prompt,
                         temperature=0.2,
                         max_tokens=1024,
-                        history=self.conversation_history
+                        history=validation_history,
+                        use_cache=True
                     )
                     
                     validation_text = validation.get('response', '')
@@ -424,7 +669,8 @@ Instructions:
                             'tool_results': all_tool_results,
                             'validation': validation_text,
                             'status': 'COMPLETED',
-                            'iterations': iteration + 1
+                            'iterations': iteration + 1,
+                            'context_tokens_saved': self.context_tokens_saved
                         }
                     else:
                         # Continue to next iteration for improvements
@@ -447,7 +693,7 @@ Instructions:
                 
                 task_prompt = f"""⚠️⚠️⚠️ CRITICAL: You read files but didn't output any modifications! ⚠️⚠️⚠️
 
-You MUST output the modified files using the File: format!
+You MUST output your changes as Edit: (SEARCH/REPLACE) or File: blocks!
 
 DO NOT output JSON like [] or [{...}]
 DO NOT just explain what you would do
@@ -455,14 +701,15 @@ ACTUALLY OUTPUT THE FILE CONTENT!
 
 Example - THIS IS WHAT YOU MUST DO:
 
-File: main.py
-```python
-import pygame
+Edit: main.py
+<<<<<<< SEARCH
 from paddle import Paddle
-# ... rest of the file with your fixes ...
-```
+=======
+from paddle import Paddle
+from ball import Ball
+>>>>>>> REPLACE
 
-Now output the COMPLETE fixed file(s) in this exact format!"""
+Now output your changes in this exact format!"""
                 
                 # If we're on the last normal iteration, allow one more
                 if iteration >= max_iter - 1:
@@ -508,6 +755,7 @@ Now output the COMPLETE fixed file(s) in this exact format!"""
             'tool_results': all_tool_results,
             'status': final_status,
             'iterations': iteration + 1 if 'iteration' in locals() else 0,  # Actual iterations completed
+            'context_tokens_saved': self.context_tokens_saved,
             'message': f'Completed {iteration + 1 if "iteration" in locals() else 0} iterations'
         }
     
@@ -550,7 +798,8 @@ Now output the COMPLETE fixed file(s) in this exact format!"""
             validation_prompt,
             system_prompt="You are a code reviewer. Be thorough but fair.",
             temperature=0.2,
-            max_tokens=1024
+            max_tokens=1024,
+            use_cache=True
         )
         
         validation_text = response.get('response', '')
@@ -1,30 +1,150 @@
 """
 Local LLM client for LM Studio integration.
 """
+import json
+import threading
 import requests
-from typing import Optional, Dict, Any, List
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+from response_cache import ResponseCache
+
+
+# Hotter calls sample a different answer each time, so a cached one would
+# hide that variety
+CACHE_MAX_TEMPERATURE = 0.2
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts how many TCP connections it actually opens."""
+    
+    def __init__(self, *args, **kwargs):
+        self.connections_opened = 0
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+    
+    def _connection_opened(self):
+        with self._count_lock:
+            self.connections_opened += 1
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+        
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                adapter._connection_opened()
+                super().connect()
+        
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                adapter._connection_opened()
+                super().connect()
+        
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = CountingHTTPConnection
+        
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = CountingHTTPSConnection
+        
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
 
 
 class LocalLLMClient:
     """Client for interacting with local LLM via OpenAI-compatible API."""
     
-    def __init__(self, base_url: str = "http://localhost:1234/v1"):
+    def __init__(self, base_url: str = "http://localhost:1234/v1",
+                 pool_size: int = 10,
+                 keep_alive: bool = True,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 300.0,
+                 cache: Optional[ResponseCache] = None):
         """
         Initialize local LLM client.
         
         Args:
             base_url: Base URL for the local LLM API
+            pool_size: Maximum number of pooled connections to LM Studio
+            keep_alive: Reuse connections between requests
+            connect_timeout: Seconds to wait for a connection to open
+            read_timeout: Seconds to wait for response data
+            cache: Optional response cache for calls made with use_cache=True
+                at a temperature of at most CACHE_MAX_TEMPERATURE
         """
         self.base_url = base_url.rstrip('/')
         self.chat_endpoint = f"{self.base_url}/chat/completions"
         self.completions_endpoint = f"{self.base_url}/completions"
+        
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keep_alive = keep_alive
+        self.cache = cache
+        
+        # Shared, thread-safe connection pool for all requests
+        self._adapter = _CountingHTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        
+        self._stats_lock = threading.Lock()
+        self._requests_sent = 0
+        
+        # Cleared when the server rejects a request carrying tool definitions
+        # or a response_format
+        self.tools_supported = True
+        self.response_format_supported = True
+    
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """POST through the pooled session."""
+        with self._stats_lock:
+            self._requests_sent += 1
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        return self.session.post(url, **kwargs)
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the pooled session."""
+        with self._stats_lock:
+            self._requests_sent += 1
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        return self.session.get(url, **kwargs)
+    
+    def get_connection_stats(self) -> Dict[str, int]:
+        """
+        Get connection pool statistics.
+        
+        Returns:
+            Dict with 'requests', 'connections_opened' and 'connections_reused'
+        """
+        with self._stats_lock:
+            sent = self._requests_sent
+        opened = self._adapter.connections_opened
+        
+        return {
+            'requests': sent,
+            'connections_opened': opened,
+            'connections_reused': max(sent - opened, 0)
+        }
+    
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
     
     def send_message(self, prompt: str,
                     system_prompt: Optional[str] = None,
                     model: str = "local-model",
                     max_tokens: int = 2048,
                     temperature: float = 0.7,
-                    history: Optional[List[Dict]] = None) -> Dict[str, Any]:
+                    history: Optional[List[Dict]] = None,
+                    stream_callback: Optional[Callable[[str], Any]] = None,
+                    use_cache: bool = False,
+                    tools: Optional[List[Dict[str, Any]]] = None,
+                    response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Send a message to the local LLM.
         
@@ -35,21 +155,84 @@ class LocalLLMClient:
             max_tokens: Maximum tokens in response
             temperature: Temperature for generation
             history: Optional conversation history
+            stream_callback: Optional callable receiving each text delta as it
+                is generated. Return False from it to abort the generation.
+            use_cache: Serve/store this call through the client's response
+                cache (ignored when the client has no cache or the
+                temperature is above CACHE_MAX_TEMPERATURE)
+            tools: Optional OpenAI-style function definitions. If the server
+                rejects them (a 400 or 422 naming tools or tool_choice), the
+                request is retried without tools, and when that succeeds
+                later calls stop sending them (see tools_supported).
+            response_format: Optional OpenAI-style response format, e.g. a
+                {"type": "json_schema", ...} that constrains the output to a
+                schema. Falls back like tools when the server names
+                response_format or json_schema in its rejection (see
+                response_format_supported).
             
         Returns:
-            Dict with 'response', 'usage', and 'metadata' keys
+            Dict with 'response', 'usage', and 'metadata' keys, plus
+            'tool_calls' (each with 'id', 'name' and 'arguments') when the
+            model called tools natively
         """
+        messages = self.build_messages(prompt, system_prompt, history)
+        if not self.tools_supported:
+            tools = None
+        if not self.response_format_supported:
+            response_format = None
+        
+        cache_key = None
+        if use_cache and self.cache is not None and temperature <= CACHE_MAX_TEMPERATURE:
+            cache_key = ResponseCache.make_key(model, messages, temperature, max_tokens,
+                                               tools, response_format)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached['metadata']['cached'] = True
+                if stream_callback and cached.get('response'):
+                    stream_callback(cached['response'])
+                return cached
+        
+        def send(tools, response_format):
+            if stream_callback:
+                return self._send_streaming(
+                    prompt, system_prompt, model, max_tokens, temperature,
+                    history, stream_callback, tools, response_format
+                )
+            return self._send(messages, model, max_tokens, temperature, tools, response_format)
+        
+        result = send(tools, response_format)
+        rejected_tools = bool(tools) and self._rejected(result, ('tools', 'tool_choice'))
+        rejected_format = bool(response_format) and self._rejected(result, ('response_format', 'json_schema'))
+        if rejected_tools or rejected_format:
+            # Server without function calling or structured output: plain text
+            retry = send(None if rejected_tools else tools, None if rejected_format else response_format)
+            if retry['metadata'].get('success'):
+                if rejected_tools:
+                    self.tools_supported = False
+                if rejected_format:
+                    self.response_format_supported = False
+                result = retry
+        
+        if (cache_key and result['metadata'].get('success')
+                and result['metadata'].get('finish_reason') != 'aborted'):
+            self.cache.set(cache_key, result)
+        
+        return result
+    
+    @staticmethod
+    def _rejected(result: Dict[str, Any], fields: Tuple[str, ...]) -> bool:
+        """Check whether a failed request was refused over one of the given payload fields."""
+        if result['metadata'].get('status_code') not in (400, 422):
+            return False
+        error = result.get('error') or ''
+        return any(field in error for field in fields)
+    
+    def _send(self, messages: List[Dict], model: str,
+              max_tokens: int, temperature: float,
+              tools: Optional[List[Dict[str, Any]]] = None,
+              response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a single non-streaming completion."""
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            
-            if history:
-                messages.extend(history)
-            
-            messages.append({"role": "user", "content": prompt})
-            
             payload = {
                 "model": model,
                 "messages": messages,
@@ -57,24 +240,27 @@ class LocalLLMClient:
                 "temperature": temperature,
                 "stream": False
             }
+            if tools:
+                payload["tools"] = tools
+                payload["tool_choice"] = "auto"
+            if response_format:
+                payload["response_format"] = response_format
             
-            response = requests.post(
-                self.chat_endpoint,
-                json=payload,
-                timeout=300  # 5 minute timeout
-            )
+            response = self._post(self.chat_endpoint, json=payload)
             
             if response.status_code != 200:
                 return {
                     'response': None,
                     'error': f"API error: {response.status_code} - {response.text}",
-                    'metadata': {'success': False}
+                    'metadata': {'success': False, 'status_code': response.status_code}
                 }
             
             data = response.json()
+            message = data['choices'][0]['message']
+            tool_calls = self.parse_tool_calls(message.get('tool_calls'))
             
-            return {
-                'response': data['choices'][0]['message']['content'],
+            result = {
+                'response': message.get('content') or ('' if tool_calls else None),
                 'usage': data.get('usage', {}),
                 'metadata': {
                     'success': True,
@@ -82,7 +268,196 @@ class LocalLLMClient:
                     'finish_reason': data['choices'][0].get('finish_reason')
                 }
             }
+            if tool_calls:
+                result['tool_calls'] = tool_calls
+            return result
+            
+        except requests.exceptions.Timeout:
+            return {
+                'response': None,
+                'error': 'Request timed out',
+                'metadata': {'success': False}
+            }
+        except requests.exceptions.ConnectionError:
+            return {
+                'response': None,
+                'error': 'Could not connect to local LLM. Is LM Studio running?',
+                'metadata': {'success': False}
+            }
+        except Exception as e:
+            return {
+                'response': None,
+                'error': str(e),
+                'metadata': {'success': False}
+            }
+    
+    @staticmethod
+    def build_messages(prompt: str,
+                       system_prompt: Optional[str] = None,
+                       history: Optional[List[Dict]] = None) -> List[Dict]:
+        """Build the chat messages list for a request."""
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        if history:
+            messages.extend(history)
+        
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def stream_message(self, prompt: str,
+                       system_prompt: Optional[str] = None,
+                       model: str = "local-model",
+                       max_tokens: int = 2048,
+                       temperature: float = 0.7,
+                       history: Optional[List[Dict]] = None,
+                       tools: Optional[List[Dict[str, Any]]] = None,
+                       response_format: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a completion from the local LLM as server-sent events.
+        
+        Closing the generator early closes the HTTP response, which makes
+        LM Studio stop generating.
+        
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt
+            model: Model name (for LM Studio, usually doesn't matter)
+            max_tokens: Maximum tokens in response
+            temperature: Temperature for generation
+            history: Optional conversation history
+            tools: Optional OpenAI-style function definitions
+            response_format: Optional OpenAI-style response format
+        
+        Yields:
+            Dicts with a 'delta' text chunk, 'tool_calls' fragments (each
+            with an 'index' and partial 'function' name/arguments), plus
+            'finish_reason', 'usage' and 'model' when the server sends them
+        """
+        payload = {
+            "model": model,
+            "messages": self.build_messages(prompt, system_prompt, history),
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        if tools:
+            payload["tools"] = tools
+            payload["tool_choice"] = "auto"
+        if response_format:
+            payload["response_format"] = response_format
+        
+        response = self._post(self.chat_endpoint, json=payload, stream=True)
+        
+        try:
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(
+                    f"API error: {response.status_code} - {response.text}",
+                    response=response
+                )
             
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                
+                choices = chunk.get('choices') or [{}]
+                delta = choices[0].get('delta') or {}
+                yield {
+                    'delta': delta.get('content') or '',
+                    'tool_calls': delta.get('tool_calls') or [],
+                    'finish_reason': choices[0].get('finish_reason'),
+                    'usage': chunk.get('usage'),
+                    'model': chunk.get('model')
+                }
+        finally:
+            response.close()
+    
+    def _send_streaming(self, prompt: str,
+                        system_prompt: Optional[str],
+                        model: str,
+                        max_tokens: int,
+                        temperature: float,
+                        history: Optional[List[Dict]],
+                        stream_callback: Callable[[str], Any],
+                        tools: Optional[List[Dict[str, Any]]] = None,
+                        response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run stream_message and collect the deltas into a send_message result."""
+        parts = []
+        calls = {}  # Tool call index -> accumulated call
+        usage = {}
+        finish_reason = None
+        response_model = model
+        
+        try:
+            stream = self.stream_message(
+                prompt,
+                system_prompt=system_prompt,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                history=history,
+                tools=tools,
+                response_format=response_format
+            )
+            
+            for chunk in stream:
+                for fragment in chunk['tool_calls']:
+                    call = calls.setdefault(fragment.get('index', len(calls)),
+                                            {'id': None, 'function': {'name': '', 'arguments': ''}})
+                    call['id'] = fragment.get('id') or call['id']
+                    function = fragment.get('function') or {}
+                    call['function']['name'] += function.get('name') or ''
+                    call['function']['arguments'] += function.get('arguments') or ''
+                
+                if chunk['usage']:
+                    usage = chunk['usage']
+                if chunk['model']:
+                    response_model = chunk['model']
+                if chunk['finish_reason']:
+                    finish_reason = chunk['finish_reason']
+                
+                if chunk['delta']:
+                    parts.append(chunk['delta'])
+                    if stream_callback(chunk['delta']) is False:
+                        stream.close()
+                        finish_reason = 'aborted'
+                        break
+            
+            result = {
+                'response': ''.join(parts),
+                'usage': usage,
+                'metadata': {
+                    'success': True,
+                    'model': response_model,
+                    'finish_reason': finish_reason,
+                    'streamed': True
+                }
+            }
+            tool_calls = self.parse_tool_calls([calls[index] for index in sorted(calls)])
+            if tool_calls:
+                result['tool_calls'] = tool_calls
+            return result
+        
+        except requests.exceptions.HTTPError as e:
+            metadata = {'success': False}
+            if e.response is not None:
+                metadata['status_code'] = e.response.status_code
+            return {
+                'response': None,
+                'error': str(e),
+                'metadata': metadata
+            }
         except requests.exceptions.Timeout:
             return {
                 'response': None,
@@ -102,6 +477,36 @@ class LocalLLMClient:
                 'metadata': {'success': False}
             }
     
+    @staticmethod
+    def parse_tool_calls(raw_calls: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Normalize OpenAI-style tool calls from a response message.
+        
+        Args:
+            raw_calls: The message's 'tool_calls' list
+        
+        Returns:
+            Calls with 'id', 'name' and 'arguments' (a dict, or None with the
+            text kept in 'raw_arguments' if it is not a JSON object)
+        """
+        tool_calls = []
+        for raw in raw_calls or []:
+            function = raw.get('function') or {}
+            if not function.get('name'):
+                continue
+            raw_arguments = function.get('arguments') or '{}'
+            try:
+                arguments = (raw_arguments if isinstance(raw_arguments, dict)
+                             else json.loads(raw_arguments))
+            except json.JSONDecodeError:
+                arguments = None
+            call = {'id': raw.get('id'), 'name': function['name'],
+                    'arguments': arguments if isinstance(arguments, dict) else None}
+            if call['arguments'] is None:
+                call['raw_arguments'] = raw_arguments
+            tool_calls.append(call)
+        return tool_calls
+    
     def simple_prompt(self, prompt: str, **kwargs) -> Optional[str]:
         """
         Send a simple prompt and return just the response text.
@@ -116,6 +521,33 @@ class LocalLLMClient:
         result = self.send_message(prompt, **kwargs)
         return result.get('response')
     
+    @staticmethod
+    def build_code_generation_prompt(specification: str, language: str = "python") -> tuple:
+        """Build the (system_prompt, prompt) pair for code generation."""
+        system_prompt = f"You are an expert {language} programmer. Generate clean, efficient, and well-documented code."
+        prompt = f"Generate {language} code for:\n\n{specification}\n\nProvide only the code with comments."
+        return system_prompt, prompt
+    
+    @staticmethod
+    def build_code_review_prompt(code: str, context: str = "") -> tuple:
+        """Build the (system_prompt, prompt) pair for code review."""
+        system_prompt = "You are a code review expert. Provide constructive, specific feedback."
+        prompt = f"""Review this code:
+
+Context: {context}
+
+Code:
+```
+{code}
+```
+
+Provide feedback on:
+- Code quality
+- Potential issues
+- Improvements
+- Best practices"""
+        return system_prompt, prompt
+    
     def code_generation(self, specification: str, language: str = "python") -> Dict[str, Any]:
         """
         Generate code using the local LLM.
@@ -127,8 +559,7 @@ class LocalLLMClient:
         Returns:
             Dict with response and metadata
         """
-        system_prompt = f"You are an expert {language} programmer. Generate clean, efficient, and well-documented code."
-        prompt = f"Generate {language} code for:\n\n{specification}\n\nProvide only the code with comments."
+        system_prompt, prompt = self.build_code_generation_prompt(specification, language)
         
         return self.send_message(
             prompt,
@@ -148,21 +579,7 @@ class LocalLLMClient:
         Returns:
             Dict with response and metadata
         """
-        system_prompt = "You are a code review expert. Provide constructive, specific feedback."
-        prompt = f"""Review this code:
-
-Context: {context}
-
-Code:
-```
-{code}
-```
-
-Provide feedback on:
-- Code quality
-- Potential issues
-- Improvements
-- Best practices"""
+        system_prompt, prompt = self.build_code_review_prompt(code, context)
 
         return self.send_message(
             prompt,
@@ -179,9 +596,9 @@ Provide feedback on:
             True if available, False otherwise
         """
         try:
-            response = requests.get(
+            response = self._get(
                 f"{self.base_url}/models",
-                timeout=5
+                timeout=(self.connect_timeout, 5)
             )
             return response.status_code == 200
         except:
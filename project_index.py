@@ -0,0 +1,397 @@
+"""
+Project Index - Incrementally maintained file index for ProjectTools.
+
+Keeps the project's file list with stat metadata and extension buckets in
+memory so tool calls don't walk the whole tree every time. The index is
+refreshed by checking directory mtimes (only changed directories are
+re-listed), by explicit write notifications from FileOperations, and by
+a periodic full re-stat that catches in-place edits.
+"""
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Callable
+
+
+ROOT = '.'
+
+
+class ProjectIndex:
+    """In-memory index of the files in a project directory."""
+    
+    def __init__(
+        self,
+        project_directory: str,
+        ignore_patterns: List[str],
+        refresh_interval: float = 0.5,
+        verify_interval: float = 30.0
+    ):
+        """
+        Initialize project index. The tree is scanned on first use.
+        
+        Args:
+            project_directory: Root directory of the project
+            ignore_patterns: Name substrings excluded from the index
+            refresh_interval: Minimum seconds between directory mtime checks
+            verify_interval: Seconds between full re-stats of every file
+        """
+        self.project_directory = os.path.abspath(project_directory)
+        self.ignore_patterns = ignore_patterns
+        self.refresh_interval = refresh_interval
+        self.verify_interval = verify_interval
+        
+        self._lock = threading.RLock()
+        self._ignored_cache = {}
+        self._files = {}
+        self._dirs = {}
+        self._by_extension = {}
+        self._change_listeners = []
+        self._built = False
+        self._last_refresh = 0.0
+        self._last_verify = 0.0
+    
+    # ------------------------------------------------------------------
+    # Path helpers
+    # ------------------------------------------------------------------
+    
+    def is_ignored(self, name: str) -> bool:
+        """Check a single path component against ignore_patterns (memoized)."""
+        ignored = self._ignored_cache.get(name)
+        if ignored is None:
+            ignored = any(pattern in name for pattern in self.ignore_patterns)
+            self._ignored_cache[name] = ignored
+        return ignored
+    
+    @staticmethod
+    def _join(rel_dir: str, name: str) -> str:
+        return name if rel_dir == ROOT else os.path.join(rel_dir, name)
+    
+    def full_path(self, rel_path: str) -> str:
+        """Get the absolute path of an index key."""
+        return self.project_directory if rel_path == ROOT else os.path.join(self.project_directory, rel_path)
+    
+    def to_relative(self, path: str) -> Optional[str]:
+        """
+        Normalize a path to an index key.
+        
+        Args:
+            path: Absolute path or path relative to the project root
+        
+        Returns:
+            Normalized relative path, or None if outside the project
+        """
+        if os.path.isabs(path):
+            path = os.path.relpath(os.path.abspath(path), self.project_directory)
+        rel_path = os.path.normpath(path)
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return None
+        return rel_path
+    
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """
+        Register a callable notified with the relative path of every file
+        that is added, changed or removed in the index.
+        
+        Args:
+            listener: Callable receiving the changed file's relative path
+        """
+        self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: Callable[[str], None]):
+        """
+        Unregister a listener added with add_change_listener.
+        
+        Args:
+            listener: The registered callable
+        """
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _notify_change(self, rel_path: str):
+        for listener in list(self._change_listeners):
+            listener(rel_path)
+    
+    def refresh(self, force: bool = False):
+        """
+        Bring the index up to date with the filesystem.
+        
+        Args:
+            force: Check directory mtimes even inside refresh_interval
+        """
+        with self._lock:
+            now = time.monotonic()
+            
+            if not self._built:
+                self._scan_dir(ROOT)
+                self._built = True
+                self._last_refresh = self._last_verify = now
+                return
+            
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+            
+            for rel_dir in list(self._dirs):
+                entry = self._dirs.get(rel_dir)
+                if entry is None:
+                    continue  # Removed along with a parent during this pass
+                try:
+                    mtime = os.stat(self.full_path(rel_dir)).st_mtime_ns
+                except OSError:
+                    self._remove_dir(rel_dir)
+                    continue
+                if mtime != entry['mtime']:
+                    self._scan_dir(rel_dir)
+            
+            if now - self._last_verify >= self.verify_interval:
+                self._last_verify = now
+                for rel_path in list(self._files):
+                    self._stat_file(rel_path)
+    
+    def verify_files(self, paths: Optional[Iterable[str]] = None):
+        """
+        Re-stat indexed files now, notifying listeners of any that changed.
+        
+        Edits in place don't change directory mtimes, so refresh only
+        catches them every verify_interval.
+        
+        Args:
+            paths: Relative paths to check (defaults to every indexed file)
+        """
+        with self._lock:
+            for rel_path in list(self._files if paths is None else paths):
+                if rel_path in self._files:
+                    self._stat_file(rel_path)
+    
+    def _scan_dir(self, rel_dir: str):
+        """List one directory and sync its entries, recursing into new subdirectories."""
+        abs_dir = self.full_path(rel_dir)
+        try:
+            mtime = os.stat(abs_dir).st_mtime_ns
+            entries = list(os.scandir(abs_dir))
+        except OSError:
+            self._remove_dir(rel_dir)
+            return
+        
+        entry = self._dirs.setdefault(rel_dir, {'mtime': None, 'files': set(), 'subdirs': set()})
+        entry['mtime'] = mtime
+        
+        seen_files = {}
+        seen_dirs = set()
+        for item in entries:
+            try:
+                if item.is_dir(follow_symlinks=False):
+                    if not self.is_ignored(item.name):
+                        seen_dirs.add(item.name)
+                elif item.is_file():
+                    seen_files[item.name] = item.stat()
+            except OSError:
+                continue
+        
+        for name in entry['files'] - set(seen_files):
+            self._drop_file(self._join(rel_dir, name))
+        for name, stat in seen_files.items():
+            self._put_file(rel_dir, name, stat)
+        entry['files'] = set(seen_files)
+        
+        for name in entry['subdirs'] - seen_dirs:
+            self._remove_dir(self._join(rel_dir, name))
+        new_dirs = seen_dirs - entry['subdirs']
+        entry['subdirs'] = seen_dirs
+        for name in new_dirs:
+            self._scan_dir(self._join(rel_dir, name))
+    
+    def _remove_dir(self, rel_dir: str):
+        """Forget a directory and everything below it."""
+        entry = self._dirs.pop(rel_dir, None)
+        if entry is None:
+            return
+        for name in entry['files']:
+            self._drop_file(self._join(rel_dir, name))
+        for name in entry['subdirs']:
+            self._remove_dir(self._join(rel_dir, name))
+        
+        parent = self._dirs.get(os.path.dirname(rel_dir) or ROOT)
+        if parent is not None and rel_dir != ROOT:
+            parent['subdirs'].discard(os.path.basename(rel_dir))
+    
+    def _put_file(self, rel_dir: str, name: str, stat: os.stat_result):
+        rel_path = self._join(rel_dir, name)
+        extension = os.path.splitext(name)[1]
+        
+        previous = self._files.get(rel_path)
+        if previous is None:
+            self._by_extension.setdefault(extension, set()).add(rel_path)
+        elif previous['size'] == stat.st_size and previous['modified'] == stat.st_mtime:
+            return  # Unchanged
+        
+        self._notify_change(rel_path)
+        self._files[rel_path] = {
+            'name': name,
+            'path': rel_path,
+            'dir': rel_dir,
+            'size': stat.st_size,
+            'modified': stat.st_mtime,
+            'extension': extension,
+            'ignored': self.is_ignored(name)
+        }
+    
+    def _drop_file(self, rel_path: str):
+        entry = self._files.pop(rel_path, None)
+        if entry is not None:
+            bucket = self._by_extension.get(entry['extension'])
+            if bucket is not None:
+                bucket.discard(rel_path)
+            self._notify_change(rel_path)
+    
+    def _stat_file(self, rel_path: str):
+        """Re-stat one indexed file, dropping it if it disappeared."""
+        entry = self._files.get(rel_path)
+        try:
+            stat = os.stat(self.full_path(rel_path))
+        except OSError:
+            if entry is not None:
+                self._drop_file(rel_path)
+                parent = self._dirs.get(entry['dir'])
+                if parent is not None:
+                    parent['files'].discard(entry['name'])
+            return
+        if entry is not None and (entry['size'], entry['modified']) != (stat.st_size, stat.st_mtime):
+            entry['size'] = stat.st_size
+            entry['modified'] = stat.st_mtime
+            self._notify_change(rel_path)
+    
+    def notify_write(self, path: str):
+        """
+        Update the index after a file was created, modified or deleted.
+        
+        Args:
+            path: Absolute or project-relative path of the changed file
+        """
+        with self._lock:
+            rel_path = self.to_relative(path)
+            if rel_path is None or rel_path == ROOT:
+                return
+            
+            parts = rel_path.split(os.sep)
+            if not self._built or any(self.is_ignored(part) for part in parts[:-1]):
+                # Nothing cached for this path, but listeners may still care
+                self._notify_change(rel_path)
+                return
+            
+            # Make sure every parent directory is indexed
+            rel_dir = ROOT
+            for part in parts[:-1]:
+                child = self._join(rel_dir, part)
+                if child not in self._dirs:
+                    self._scan_dir(rel_dir)
+                    break
+                rel_dir = child
+            
+            rel_dir = os.path.dirname(rel_path) or ROOT
+            name = os.path.basename(rel_path)
+            parent = self._dirs.get(rel_dir)
+            if parent is None:
+                return
+            
+            try:
+                stat = os.stat(self.full_path(rel_path))
+            except OSError:
+                self._drop_file(rel_path)
+                parent['files'].discard(name)
+                return
+            
+            if os.path.isfile(self.full_path(rel_path)):
+                self._put_file(rel_dir, name, stat)
+                parent['files'].add(name)
+                # A rewrite can keep size and mtime, so always tell listeners
+                self._notify_change(rel_path)
+    
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    
+    def has_dir(self, rel_dir: str) -> bool:
+        """Check whether a directory is indexed (refreshes first)."""
+        self.refresh()
+        with self._lock:
+            return rel_dir in self._dirs
+    
+    def get_file(self, rel_path: str, refresh: bool = True) -> Optional[Dict[str, Any]]:
+        """Get the index entry for a file (refreshes first unless told not to)."""
+        if refresh:
+            self.refresh()
+        with self._lock:
+            entry = self._files.get(rel_path)
+            return dict(entry) if entry else None
+    
+    def list_dir(self, rel_dir: str = ROOT) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        List one indexed directory.
+        
+        Args:
+            rel_dir: Directory relative to the project root
+        
+        Returns:
+            Tuple of (file entries, subdirectory names), sorted by name
+        """
+        self.refresh()
+        with self._lock:
+            entry = self._dirs.get(rel_dir)
+            if entry is None:
+                return [], []
+            files = [dict(self._files[self._join(rel_dir, name)]) for name in sorted(entry['files'])]
+            return files, sorted(entry['subdirs'])
+    
+    def iter_files(
+        self,
+        extensions: Optional[List[str]] = None,
+        include_ignored: bool = True,
+        paths: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over indexed files in path order.
+        
+        Args:
+            extensions: Only files whose name ends with one of these
+            include_ignored: Include files whose name matches ignore_patterns
+            paths: Only these relative paths (e.g. search candidates)
+        
+        Yields:
+            File entries with 'name', 'path', 'size', 'modified', 'extension'
+        """
+        self.refresh()
+        with self._lock:
+            if paths is not None:
+                selected = [p for p in paths if p in self._files]
+                if extensions:
+                    selected = [p for p in selected if any(p.endswith(ext) for ext in extensions)]
+            elif extensions and all(ext.startswith('.') and ext.count('.') == 1 for ext in extensions):
+                # Simple extensions map straight to buckets
+                selected = set()
+                for ext in extensions:
+                    selected.update(self._by_extension.get(ext, ()))
+            else:
+                selected = self._files.keys()
+                if extensions:
+                    selected = [p for p in selected if any(p.endswith(ext) for ext in extensions)]
+            
+            entries = [
+                dict(self._files[path]) for path in sorted(selected)
+                if include_ignored or not self._files[path]['ignored']
+            ]
+        
+        return iter(entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size counters."""
+        with self._lock:
+            return {
+                'files': len(self._files),
+                'directories': len(self._dirs),
+                'extensions': len([b for b in self._by_extension.values() if b])
+            }
@@ -12,6 +12,9 @@ import os
 import re
 from typing import List, Dict, Any, Optional
 from pathlib import Path
+from project_index import ProjectIndex, ROOT
+from search_index import TrigramIndex
+from symbol_index import SymbolIndex
 
 
 class ProjectTools:
@@ -43,6 +46,20 @@ class ProjectTools:
             '.DS_Store',
             'Thumbs.db'
         ]
+        
+        # Persistent file index shared by all tools
+        self.index = ProjectIndex(project_directory, self.ignore_patterns)
+        self.search_index = TrigramIndex(self.index)
+        self.symbol_index = SymbolIndex(self.index)
+    
+    def notify_file_changed(self, path: str):
+        """
+        Update the file index after a file was written or deleted.
+        
+        Args:
+            path: Absolute or project-relative path of the changed file
+        """
+        self.index.notify_write(path)
     
     def list_files(
         self, 
@@ -71,6 +88,64 @@ class ProjectTools:
                 'error': f"Path not found: {relative_path}"
             }
         
+        rel_dir = self.index.to_relative(full_path)
+        
+        if rel_dir is None or not self.index.has_dir(rel_dir):
+            # Not indexed (e.g. an ignored directory) - list it from disk
+            return self._list_files_from_disk(full_path, extensions, include_hidden)
+        
+        files = []
+        directories = []
+        
+        try:
+            indexed_files, subdirs = self.index.list_dir(rel_dir)
+            
+            for entry in indexed_files:
+                # Skip ignored and hidden files
+                if entry['ignored']:
+                    continue
+                if not include_hidden and entry['name'].startswith('.'):
+                    continue
+                if extensions and not any(entry['name'].endswith(ext) for ext in extensions):
+                    continue
+                
+                files.append({
+                    'name': entry['name'],
+                    'path': entry['path'],
+                    'size': entry['size'],
+                    'extension': entry['extension']
+                })
+            
+            for name in subdirs:
+                if not include_hidden and name.startswith('.'):
+                    continue
+                
+                directories.append({
+                    'name': name,
+                    'path': name if rel_dir == ROOT else os.path.join(rel_dir, name)
+                })
+            
+            return {
+                'success': True,
+                'files': files,
+                'directories': directories,
+                'total_files': len(files),
+                'total_directories': len(directories)
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _list_files_from_disk(
+        self,
+        full_path: str,
+        extensions: Optional[List[str]],
+        include_hidden: bool
+    ) -> Dict[str, Any]:
+        """List a directory that is not covered by the index."""
         files = []
         directories = []
         
@@ -183,16 +258,22 @@ class ProjectTools:
         pattern: str,
         extensions: Optional[List[str]] = None,
         case_sensitive: bool = False,
-        max_results: int = 50
+        max_results: int = 50,
+        rank: bool = False
     ) -> Dict[str, Any]:
         """
         Search for a pattern in project files (grep-like).
         
+        Candidate files are narrowed with the trigram index before the
+        regex is run over them.
+        
         Args:
             pattern: Text or regex pattern to search for
             extensions: File extensions to search (e.g., ['.py'])
             case_sensitive: Case-sensitive search
             max_results: Maximum number of matches to return
+            rank: Order matches by file relevance (matching lines, plus a
+                bonus when the file name matches) instead of path order
             
         Returns:
             Dict with 'matches' list containing file, line number, and content
@@ -209,44 +290,38 @@ class ProjectTools:
             }
         
         try:
-            for root, dirs, files in os.walk(self.project_directory):
-                # Remove ignored directories
-                dirs[:] = [d for d in dirs if not any(pattern in d for pattern in self.ignore_patterns)]
+            candidates = self.search_index.candidates(pattern, flags)
+            entries = self.index.iter_files(extensions, include_ignored=False, paths=candidates)
+            
+            if rank:
+                return self._ranked_search(regex, entries, max_results)
+            
+            for entry in entries:
+                relative_path = entry['path']
+                filepath = os.path.join(self.project_directory, relative_path)
                 
-                for file in files:
-                    # Skip ignored files
-                    if any(pattern in file for pattern in self.ignore_patterns):
-                        continue
-                    
-                    # Filter by extension
-                    if extensions and not any(file.endswith(ext) for ext in extensions):
-                        continue
-                    
-                    filepath = os.path.join(root, file)
-                    relative_path = os.path.relpath(filepath, self.project_directory)
-                    
-                    try:
-                        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                            for line_num, line in enumerate(f, 1):
-                                if regex.search(line):
-                                    matches.append({
-                                        'file': relative_path,
-                                        'line': line_num,
-                                        'content': line.rstrip(),
-                                        'match': regex.search(line).group(0)
-                                    })
-                                    
-                                    if len(matches) >= max_results:
-                                        return {
-                                            'success': True,
-                                            'matches': matches,
-                                            'total': len(matches),
-                                            'truncated': True,
-                                            'message': f"Results limited to {max_results}"
-                                        }
-                    except:
-                        # Skip files that can't be read
-                        continue
+                try:
+                    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                        for line_num, line in enumerate(f, 1):
+                            if regex.search(line):
+                                matches.append({
+                                    'file': relative_path,
+                                    'line': line_num,
+                                    'content': line.rstrip(),
+                                    'match': regex.search(line).group(0)
+                                })
+                                
+                                if len(matches) >= max_results:
+                                    return {
+                                        'success': True,
+                                        'matches': matches,
+                                        'total': len(matches),
+                                        'truncated': True,
+                                        'message': f"Results limited to {max_results}"
+                                    }
+                except:
+                    # Skip files that can't be read
+                    continue
             
             return {
                 'success': True,
@@ -261,6 +336,48 @@ class ProjectTools:
                 'error': str(e)
             }
     
+    def _ranked_search(self, regex, entries, max_results: int) -> Dict[str, Any]:
+        """Search every candidate file and order matches by file score."""
+        scored = []
+        
+        for entry in entries:
+            file_matches = []
+            try:
+                filepath = os.path.join(self.project_directory, entry['path'])
+                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                    for line_num, line in enumerate(f, 1):
+                        found = regex.search(line)
+                        if found:
+                            file_matches.append({
+                                'file': entry['path'],
+                                'line': line_num,
+                                'content': line.rstrip(),
+                                'match': found.group(0)
+                            })
+            except:
+                continue
+            
+            if file_matches:
+                score = len(file_matches) + (5 if regex.search(entry['name']) else 0)
+                for match in file_matches:
+                    match['score'] = score
+                scored.append((score, entry['path'], file_matches))
+        
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        matches = [match for _, _, file_matches in scored for match in file_matches]
+        truncated = len(matches) > max_results
+        
+        result = {
+            'success': True,
+            'matches': matches[:max_results],
+            'total': min(len(matches), max_results),
+            'truncated': truncated,
+            'ranked': True
+        }
+        if truncated:
+            result['message'] = f"Results limited to {max_results}"
+        return result
+    
     def find_files(
         self,
         name_pattern: str,
@@ -294,20 +411,13 @@ class ProjectTools:
         matches = []
         
         try:
-            for root, dirs, files in os.walk(self.project_directory):
-                # Remove ignored directories
-                dirs[:] = [d for d in dirs if not any(pattern in d for pattern in self.ignore_patterns)]
-                
-                for file in files:
-                    if regex.search(file):
-                        filepath = os.path.join(root, file)
-                        relative_path = os.path.relpath(filepath, self.project_directory)
-                        
-                        matches.append({
-                            'name': file,
-                            'path': relative_path,
-                            'size': os.path.getsize(filepath)
-                        })
+            for entry in self.index.iter_files():
+                if regex.search(entry['name']):
+                    matches.append({
+                        'name': entry['name'],
+                        'path': entry['path'],
+                        'size': entry['size']
+                    })
             
             return {
                 'success': True,
@@ -336,49 +446,53 @@ class ProjectTools:
         Returns:
             Dict with nested structure
         """
-        def build_tree(path: str, depth: int = 0) -> Dict[str, Any]:
+        def build_file(entry: Dict[str, Any], depth: int) -> Optional[Dict[str, Any]]:
+            if depth > max_depth or entry['ignored']:
+                return None
+            
+            # Filter by extension
+            if extensions and not any(entry['name'].endswith(ext) for ext in extensions):
+                return None
+            
+            return {
+                'type': 'file',
+                'name': entry['name'],
+                'path': entry['path'],
+                'size': entry['size']
+            }
+        
+        def build_tree(rel_dir: str, depth: int = 0) -> Optional[Dict[str, Any]]:
             if depth > max_depth:
                 return None
             
-            relative_path = os.path.relpath(path, self.project_directory)
-            name = os.path.basename(path)
+            name = os.path.basename(self.project_directory) if rel_dir == ROOT else os.path.basename(rel_dir)
             
             # Skip ignored patterns
-            if any(pattern in name for pattern in self.ignore_patterns):
+            if self.index.is_ignored(name):
                 return None
             
-            if os.path.isfile(path):
-                # Filter by extension
-                if extensions and not any(name.endswith(ext) for ext in extensions):
-                    return None
-                
-                return {
-                    'type': 'file',
-                    'name': name,
-                    'path': relative_path,
-                    'size': os.path.getsize(path)
-                }
+            files, subdirs = self.index.list_dir(rel_dir)
+            items = [(entry['name'], entry) for entry in files] + [(subdir, None) for subdir in subdirs]
             
-            elif os.path.isdir(path):
-                children = []
-                try:
-                    for item in sorted(os.listdir(path)):
-                        item_path = os.path.join(path, item)
-                        child = build_tree(item_path, depth + 1)
-                        if child:
-                            children.append(child)
-                except PermissionError:
-                    pass
-                
-                return {
-                    'type': 'directory',
-                    'name': name,
-                    'path': relative_path,
-                    'children': children
-                }
+            children = []
+            for item_name, entry in sorted(items, key=lambda item: item[0]):
+                if entry is None:
+                    child_dir = item_name if rel_dir == ROOT else os.path.join(rel_dir, item_name)
+                    child = build_tree(child_dir, depth + 1)
+                else:
+                    child = build_file(entry, depth + 1)
+                if child:
+                    children.append(child)
+            
+            return {
+                'type': 'directory',
+                'name': name,
+                'path': rel_dir,
+                'children': children
+            }
         
         try:
-            tree = build_tree(self.project_directory)
+            tree = build_tree(ROOT)
             return {
                 'success': True,
                 'structure': tree
@@ -392,59 +506,153 @@ class ProjectTools:
     def find_definitions(
         self,
         name: str,
-        definition_type: str = 'any'
+        definition_type: str = 'any',
+        match: str = 'exact'
     ) -> Dict[str, Any]:
         """
         Find function/class definitions in Python files.
         
         Args:
-            name: Name of function/class to find
+            name: Name of function/class to find (or a qualname like "Game.update")
             definition_type: 'function', 'class', or 'any'
+            match: 'exact', 'prefix' or 'fuzzy' name matching
             
         Returns:
             Dict with matching definitions
         """
-        matches = []
+        try:
+            definitions = self.symbol_index.find_definitions(name, match=match)
+            
+            matches = [
+                {
+                    'file': d['file'],
+                    'line': d['line'],
+                    'content': d['content'],
+                    'type': d['type'],
+                    'qualname': d['qualname']
+                }
+                for d in definitions
+                if definition_type == 'any' or d['type'] == definition_type
+            ]
+            
+            result = {
+                'success': True,
+                'matches': matches,
+                'total': len(matches)
+            }
+            
+            if not matches and match == 'exact':
+                result['suggestions'] = self.symbol_index.suggest(name)
+            
+            return result
         
-        # Regex patterns for Python definitions
-        patterns = []
-        if definition_type in ['function', 'any']:
-            patterns.append(rf'^\s*def\s+{re.escape(name)}\s*\(')
-        if definition_type in ['class', 'any']:
-            patterns.append(rf'^\s*class\s+{re.escape(name)}\s*[\(:]')
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def find_references(
+        self,
+        name: str,
+        max_results: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Find references to a name in Python files.
         
+        Args:
+            name: Name of function/class/variable to find uses of
+            max_results: Maximum number of references to return
+            
+        Returns:
+            Dict with 'matches' list containing file, line, kind and content
+        """
         try:
-            for root, dirs, files in os.walk(self.project_directory):
-                # Remove ignored directories
-                dirs[:] = [d for d in dirs if not any(pattern in d for pattern in self.ignore_patterns)]
-                
-                for file in files:
-                    if not file.endswith('.py'):
-                        continue
-                    
-                    filepath = os.path.join(root, file)
-                    relative_path = os.path.relpath(filepath, self.project_directory)
-                    
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            for line_num, line in enumerate(f, 1):
-                                for pattern in patterns:
-                                    if re.search(pattern, line):
-                                        matches.append({
-                                            'file': relative_path,
-                                            'line': line_num,
-                                            'content': line.rstrip(),
-                                            'type': 'function' if 'def' in line else 'class'
-                                        })
-                    except:
-                        continue
+            references = self.symbol_index.find_references(name)
+            
+            matches = [
+                {
+                    'file': r['file'],
+                    'line': r['line'],
+                    'column': r['column'],
+                    'kind': r['kind'],
+                    'content': r['content']
+                }
+                for r in references[:max_results]
+            ]
             
             return {
                 'success': True,
+                'name': name,
                 'matches': matches,
-                'total': len(matches)
+                'total': len(matches),
+                'truncated': len(references) > max_results
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def get_file_outline(self, filepath: str) -> Dict[str, Any]:
+        """
+        Get the classes, functions and imports defined in a Python file.
+        
+        Args:
+            filepath: Path relative to project root
+            
+        Returns:
+            Dict with 'symbols' (nested by 'depth') and 'imports'
+        """
+        rel_path = self.index.to_relative(os.path.join(self.project_directory, filepath))
+        
+        if rel_path is None or not os.path.isfile(os.path.join(self.project_directory, filepath)):
+            return {
+                'success': False,
+                'error': f"File not found: {filepath}"
             }
         
+        if not filepath.endswith('.py'):
+            return {
+                'success': False,
+                'error': f"Outline is only available for Python files: {filepath}"
+            }
+        
+        try:
+            outline = self.symbol_index.get_outline(rel_path)
+            if outline is None:
+                return {
+                    'success': False,
+                    'error': f"File is not indexed: {filepath}"
+                }
+            
+            symbols = [
+                {
+                    'name': d['name'],
+                    'qualname': d['qualname'],
+                    'type': 'method' if d['method'] else d['type'],
+                    'async': d['async'],
+                    'line': d['line'],
+                    'end_line': d['end_line'],
+                    'depth': d['depth']
+                }
+                for d in outline['definitions']
+            ]
+            
+            result = {
+                'success': True,
+                'filepath': filepath,
+                'symbols': symbols,
+                'imports': outline['imports'],
+                'total': len(symbols)
+            }
+            
+            if outline['error']:
+                result['parse_error'] = outline['error']
+            
+            return result
+        
         except Exception as e:
             return {
                 'success': False,
@@ -519,16 +727,18 @@ You have access to these tools to explore and understand the project:
    - Example: read_file("main.py", start_line=1, end_line=50)
    - Returns: File content
 
-3. **search_in_files(pattern, extensions)** - Search for text/regex
+3. **search_in_files(pattern, extensions, rank)** - Search for text/regex
    - Example: search_in_files("def main", extensions=[".py"])
+   - Use rank=True to list the most relevant files first
    - Returns: Matches with file, line number, content
 
 4. **find_files(name_pattern)** - Find files by name
    - Example: find_files("*.json")
    - Returns: List of matching files
 
-5. **find_definitions(name, type)** - Find function/class definitions
+5. **find_definitions(name, type, match)** - Find function/class definitions
    - Example: find_definitions("MyClass", type="class")
+   - Use match="prefix" or match="fuzzy" when unsure of the exact name
    - Returns: Definitions with locations
 
 6. **get_project_structure(max_depth)** - Get directory tree
@@ -539,6 +749,14 @@ You have access to these tools to explore and understand the project:
    - Example: get_file_info("app.py")
    - Returns: Size, lines, extension, etc.
 
+8. **find_references(name)** - Find where a name is used
+   - Example: find_references("update_score")
+   - Returns: Uses, assignments and imports with locations
+
+9. **get_file_outline(filepath)** - Outline a Python file
+   - Example: get_file_outline("game.py")
+   - Returns: Classes, methods and functions with line numbers, plus imports
+
 **How to use**: When you need project information, request a tool like:
 "I need to use list_files on the 'src' directory with extensions ['.py']"
 
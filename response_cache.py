@@ -0,0 +1,243 @@
+"""
+Response cache for deterministic LLM calls.
+
+Caches completions keyed on a hash of (model, messages, temperature,
+max_tokens) in an in-memory LRU tier backed by a persistent SQLite tier.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) cache for LLM responses."""
+    
+    def __init__(self, db_path: Optional[str] = "llm_cache.db",
+                 max_memory_entries: int = 256,
+                 max_disk_entries: int = 5000,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        """
+        Initialize response cache.
+        
+        Args:
+            db_path: SQLite file for the persistent tier (None for memory only)
+            max_memory_entries: Maximum entries kept in the in-memory LRU
+            max_disk_entries: Maximum entries kept in SQLite
+            ttl_seconds: Entry lifetime in seconds (None never expires)
+        """
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+        
+        if self.db_path:
+            self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+    
+    def _init_db(self):
+        """Create the persistent cache table."""
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)")
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float,
+                 max_tokens: int, tools: Optional[List[Dict]] = None,
+                 response_format: Optional[Dict] = None) -> str:
+        """
+        Build a content-addressed cache key for a request.
+        
+        Args:
+            model: Model name
+            messages: Chat messages sent to the model
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            tools: Tool definitions offered to the model, if any
+            response_format: Output format constraint, if any
+        
+        Returns:
+            Hex SHA-256 digest of the canonical request
+        """
+        request = {
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        if tools:
+            request['tools'] = tools
+        if response_format:
+            request['response_format'] = response_format
+        canonical = json.dumps(
+            request,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Cached send_message result, or None on a miss
+        """
+        now = time.time()
+        
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if self._is_expired(created_at, now):
+                    del self._memory[key]
+                    self.stats['expired'] += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return json.loads(value)
+        
+        if self.db_path:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    value, created_at = row
+                    if self._is_expired(created_at, now):
+                        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        conn.commit()
+                        with self._lock:
+                            self.stats['expired'] += 1
+                    else:
+                        conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                        with self._lock:
+                            self._remember(key, created_at, value)
+                            self.stats['disk_hits'] += 1
+                        return json.loads(value)
+            finally:
+                conn.close()
+        
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+    
+    def set(self, key: str, result: Dict[str, Any]):
+        """
+        Store a successful send_message result.
+        
+        Args:
+            key: Cache key from make_key
+            result: Result dict to cache
+        """
+        now = time.time()
+        value = json.dumps(result)
+        
+        with self._lock:
+            self._remember(key, now, value)
+            self.stats['stores'] += 1
+        
+        if self.db_path:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    """INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used)
+                       VALUES (?, ?, ?, ?)""",
+                    (key, value, now, now)
+                )
+                self._evict_disk(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+    
+    def _remember(self, key: str, created_at: float, value: str):
+        """Insert into the memory LRU, evicting the least recently used entries."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+    
+    def _evict_disk(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows and trim the table to max_disk_entries."""
+        if self.ttl_seconds is not None:
+            cursor = conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            with self._lock:
+                self.stats['expired'] += max(cursor.rowcount, 0)
+        
+        cursor = conn.execute(
+            """DELETE FROM llm_cache WHERE key IN (
+                   SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+               )""",
+            (self.max_disk_entries,)
+        )
+        with self._lock:
+            self.stats['evictions'] += max(cursor.rowcount, 0)
+    
+    def clear(self):
+        """Remove all cached entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        
+        if self.db_path:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+            finally:
+                conn.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit/miss metrics.
+        
+        Returns:
+            Dict with hit, miss, store and eviction counters plus hit_rate
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        stats['hits'] = hits
+        stats['hit_rate'] = hits / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,213 @@
+"""
+Scheduler Core - Fires checkpoints at their scheduled time.
+
+Keeps the due times of all checkpoints in a min-heap and sleeps on a
+condition until the earliest one, instead of polling the database on a
+fixed interval. Checkpoints saved through the same Database wake the
+scheduler immediately. Checkpoints written by other processes are picked
+up when the heap is reloaded from the checkpoints table, every
+resync_interval seconds.
+
+Run standalone (any platform) with:
+
+    python scheduler_core.py --db agent7.db
+"""
+import argparse
+import heapq
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional, Union
+
+from database import Database
+
+
+def _timestamp(value: Union[datetime, str, float]) -> float:
+    """Convert a stored scheduled_for value to a Unix timestamp."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+class CheckpointScheduler:
+    """Calls back with each checkpoint when it becomes due, then deletes it."""
+    
+    def __init__(self, db: Database, on_due: Callable[[Dict[str, Any]], None],
+                 resync_interval: float = 60.0,
+                 log: Callable[[str], None] = print):
+        """
+        Initialize scheduler. Call run() or start() to begin firing.
+        
+        Args:
+            db: Database holding the checkpoints
+            on_due: Called with the checkpoint dict when it is due
+            resync_interval: Seconds between reloads of the checkpoints table,
+                to see checkpoints saved by other processes
+            log: Receives progress messages
+        """
+        self.db = db
+        self.on_due = on_due
+        self.resync_interval = resync_interval
+        self.log = log
+        
+        self._heap = []
+        # Checkpoints notified while a resync reads the table
+        self._notified_during_resync = None
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+    
+    def notify(self, checkpoint_id: int, scheduled_for: Union[datetime, str, float]):
+        """
+        Add a checkpoint to the schedule and wake the scheduler.
+        
+        Registered as a checkpoint listener on the database, so callers only
+        need this for checkpoints saved through another Database instance.
+        """
+        entry = (_timestamp(scheduled_for), checkpoint_id)
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._notified_during_resync is not None:
+                self._notified_during_resync.add(entry)
+            self._cond.notify()
+    
+    def resync(self):
+        """
+        Reload the schedule from the checkpoints table.
+        
+        Checkpoints notified while the table is being read are kept, even
+        if the read missed them.
+        """
+        with self._cond:
+            self._notified_during_resync = set()
+        try:
+            entries = {(_timestamp(scheduled_for), checkpoint_id)
+                       for checkpoint_id, scheduled_for in self.db.get_checkpoint_schedule()}
+        except Exception:
+            with self._cond:
+                self._notified_during_resync = None
+            raise
+        with self._cond:
+            heap = list(entries | self._notified_during_resync)
+            self._notified_during_resync = None
+            heapq.heapify(heap)
+            self._heap = heap
+            self._cond.notify()
+    
+    def next_due(self) -> Optional[float]:
+        """Unix time of the earliest scheduled checkpoint, if any."""
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+    
+    def pending_count(self) -> int:
+        """Number of scheduled checkpoints (including cancelled ones not yet skipped)."""
+        with self._cond:
+            return len(self._heap)
+    
+    def run(self):
+        """Fire checkpoints until stop() is called. Blocks."""
+        self.db.add_checkpoint_listener(self.notify)
+        next_resync = 0.0
+        
+        try:
+            while True:
+                if time.monotonic() >= next_resync:
+                    try:
+                        self.resync()
+                    except Exception as e:
+                        self.log(f"⚠️  Scheduler resync failed: {e}")
+                    next_resync = time.monotonic() + self.resync_interval
+                
+                with self._cond:
+                    due = self._wait_for_due(next_resync)
+                    if self._stopping:
+                        return
+                
+                for checkpoint_id in due:
+                    self._fire(checkpoint_id)
+        finally:
+            self.db.remove_checkpoint_listener(self.notify)
+    
+    def _wait_for_due(self, next_resync: float) -> list:
+        """
+        Sleep until a checkpoint is due, the next resync, or stop().
+        Must hold the condition.
+        
+        Returns:
+            IDs of the checkpoints that are due, earliest first
+        """
+        while not self._stopping:
+            remaining = next_resync - time.monotonic()
+            if remaining <= 0:
+                break
+            if self._heap:
+                until_due = self._heap[0][0] - time.time()
+                if until_due <= 0:
+                    break
+                remaining = min(remaining, until_due)
+            self._cond.wait(remaining)
+        
+        due = []
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+    
+    def _fire(self, checkpoint_id: int):
+        """Run the callback for a due checkpoint and delete it."""
+        try:
+            checkpoint = self.db.get_checkpoint(checkpoint_id)
+        except Exception as e:
+            self.log(f"⚠️  Could not load checkpoint {checkpoint_id}: {e}")
+            return
+        if checkpoint is None:
+            return  # Cancelled or already processed
+        
+        task_id = checkpoint['task_id']
+        self.log(f"⏰ Time to resume task {task_id}")
+        try:
+            self.on_due(checkpoint)
+        except Exception as e:
+            self.log(f"❌ Error resuming task {task_id}: {e}")
+        
+        try:
+            self.db.delete_checkpoint(checkpoint_id)
+        except Exception as e:
+            self.log(f"⚠️  Could not delete checkpoint {checkpoint_id}: {e}")
+    
+    def start(self):
+        """Run the scheduler in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._cond:
+            self._stopping = False
+        self._thread = threading.Thread(target=self.run, name="agent7-scheduler", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the scheduler and wait for its thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main():
+    """Run the checkpoint scheduler as a foreground daemon."""
+    parser = argparse.ArgumentParser(description="Agent7 checkpoint scheduler")
+    parser.add_argument('--db', default='agent7.db', help='Database path')
+    parser.add_argument('--resync', type=float, default=60.0,
+                        help='Seconds between reloads of checkpoints saved by other processes')
+    args = parser.parse_args()
+    
+    from session_manager import SchedulerDaemon
+    
+    SchedulerDaemon(args.db, args.resync).start()
+
+
+if __name__ == '__main__':
+    main()
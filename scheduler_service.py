@@ -21,6 +21,10 @@ import time
 import traceback
 
 
+# Seconds between reloads of checkpoints saved by other processes
+RESYNC_INTERVAL = 30
+
+
 class Agent7SchedulerService(win32serviceutil.ServiceFramework):
     """Windows service for Agent7 scheduler."""
     
@@ -33,6 +37,7 @@ class Agent7SchedulerService(win32serviceutil.ServiceFramework):
         win32serviceutil.ServiceFramework.__init__(self, args)
         self.stop_event = win32event.CreateEvent(None, 0, 0, None)
         self.running = True
+        self.scheduler = None
         
         # Get service directory
         if getattr(sys, 'frozen', False):
@@ -60,6 +65,8 @@ class Agent7SchedulerService(win32serviceutil.ServiceFramework):
         self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
         win32event.SetEvent(self.stop_event)
         self.running = False
+        if self.scheduler:
+            self.scheduler.stop()
         self.log("Service stopped")
     
     def SvcDoRun(self):
@@ -94,6 +101,7 @@ class Agent7SchedulerService(win32serviceutil.ServiceFramework):
             from database import Database
             self.log("Importing session_manager module...")
             from session_manager import SessionManager
+            from scheduler_core import CheckpointScheduler
             
             self.log("Creating database instance...")
             db = Database(self.db_path)
@@ -112,46 +120,15 @@ class Agent7SchedulerService(win32serviceutil.ServiceFramework):
             self.log("Scheduler initialized successfully")
             self.log("Starting scheduler loop...")
             
-            # Run scheduler with shorter check interval for service
-            check_interval = 30  # Check every 30 seconds
-            
-            while self.running:
-                try:
-                    # Check for scheduled tasks
-                    from datetime import datetime
-                    current_time = datetime.now()
-                    scheduled_checkpoints = db.get_scheduled_checkpoints(current_time)
-                    
-                    for checkpoint in scheduled_checkpoints:
-                        task_id = checkpoint['task_id']
-                        self.log(f"Task {task_id} ready to resume")
-                        
-                        # Call resume callback
-                        if session_manager.resume_callback:
-                            try:
-                                session_manager.resume_callback(checkpoint)
-                                self.log(f"Task {task_id} resume callback completed")
-                            except Exception as e:
-                                self.log(f"Error in resume callback for task {task_id}: {e}")
-                        
-                        # Mark checkpoint as processed
-                        db.delete_checkpoint(checkpoint['id'])
-                        self.log(f"Checkpoint for task {task_id} processed")
-                    
-                    # Wait for check interval or stop event
-                    result = win32event.WaitForSingleObject(
-                        self.stop_event,
-                        check_interval * 1000  # milliseconds
-                    )
-                    
-                    if result == win32event.WAIT_OBJECT_0:
-                        # Stop event was signaled
-                        break
-                        
-                except Exception as e:
-                    self.log(f"Error in scheduler loop: {e}")
-                    self.log(traceback.format_exc())
-                    time.sleep(check_interval)
+            # Sleeps until the next checkpoint is due; SvcStop wakes it
+            self.scheduler = CheckpointScheduler(
+                db,
+                session_manager.resume_callback,
+                resync_interval=RESYNC_INTERVAL,
+                log=self.log
+            )
+            if self.running:
+                self.scheduler.run()
             
             self.log("Scheduler loop ended")
             
@@ -284,7 +261,7 @@ if __name__ == '__main__':
                 
                 from database import Database
                 from session_manager import SessionManager
-                from datetime import datetime
+                from scheduler_core import CheckpointScheduler
                 
                 db = Database(debug_svc.db_path)
                 session_manager = SessionManager(db)
@@ -295,43 +272,19 @@ if __name__ == '__main__':
                 session_manager.set_resume_callback(resume_callback)
                 
                 debug_svc.log("Scheduler initialized successfully")
-                debug_svc.log("Starting scheduler loop (checking every 30 seconds)...")
-                debug_svc.log("This will check for scheduled tasks and trigger resume callbacks")
-                
-                check_interval = 30
+                debug_svc.log(f"Starting scheduler (reloading checkpoints every {RESYNC_INTERVAL} seconds)...")
+                debug_svc.log("This will trigger resume callbacks when scheduled tasks are due")
                 
-                while debug_svc.running:
-                    try:
-                        current_time = datetime.now()
-                        scheduled_checkpoints = db.get_scheduled_checkpoints(current_time)
-                        
-                        if scheduled_checkpoints:
-                            debug_svc.log(f"Found {len(scheduled_checkpoints)} scheduled checkpoint(s)")
-                        
-                        for checkpoint in scheduled_checkpoints:
-                            task_id = checkpoint['task_id']
-                            debug_svc.log(f"Task {task_id} ready to resume")
-                            
-                            if session_manager.resume_callback:
-                                try:
-                                    session_manager.resume_callback(checkpoint)
-                                    debug_svc.log(f"Task {task_id} resume callback completed")
-                                except Exception as e:
-                                    debug_svc.log(f"Error in resume callback for task {task_id}: {e}")
-                            
-                            db.delete_checkpoint(checkpoint['id'])
-                            debug_svc.log(f"Checkpoint for task {task_id} processed")
-                        
-                        time.sleep(check_interval)
-                        
-                    except KeyboardInterrupt:
-                        debug_svc.log("Stopped by user")
-                        break
-                    except Exception as e:
-                        debug_svc.log(f"Error in scheduler loop: {e}")
-                        import traceback
-                        debug_svc.log(traceback.format_exc())
-                        time.sleep(check_interval)
+                scheduler = CheckpointScheduler(
+                    db,
+                    session_manager.resume_callback,
+                    resync_interval=RESYNC_INTERVAL,
+                    log=debug_svc.log
+                )
+                try:
+                    scheduler.run()
+                except KeyboardInterrupt:
+                    debug_svc.log("Stopped by user")
                 
                 debug_svc.log("Scheduler stopped")
                 
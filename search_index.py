@@ -0,0 +1,202 @@
+"""
+Search Index - Trigram inverted index for full-text search.
+
+Narrows search_in_files to the files that contain every trigram of the
+literal text a regex requires, so only those files are opened and
+confirmed with the regex. The index follows ProjectIndex change
+notifications, so writes made through FileOperations are picked up on
+the next search.
+"""
+import threading
+from typing import List, Dict, Optional, Set
+
+from project_index import ProjectIndex
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+def _collect_literals(parsed, literals: List[str]):
+    """Collect literal runs that every match of a parsed regex must contain."""
+    run = []
+    
+    def flush():
+        if run:
+            literals.append(''.join(run))
+            run.clear()
+    
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        
+        flush()
+        
+        if op is sre_parse.SUBPATTERN:
+            _collect_literals(av[-1], literals)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) or op is getattr(sre_parse, 'POSSESSIVE_REPEAT', None):
+            minimum, _maximum, sub = av
+            if minimum >= 1:
+                _collect_literals(sub, literals)
+        elif op is getattr(sre_parse, 'ATOMIC_GROUP', None):
+            _collect_literals(av, literals)
+        # Alternations, classes, anchors etc. guarantee no literal text
+    
+    flush()
+
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Extract literal strings that must appear in any text the pattern matches.
+    
+    Args:
+        pattern: Regex pattern
+        flags: Regex flags
+    
+    Returns:
+        List of required literal strings (empty if none can be derived)
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+    
+    literals = []
+    _collect_literals(parsed, literals)
+    return literals
+
+
+def trigrams(text: str) -> Set[str]:
+    """Get the set of case-folded trigrams in text."""
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Inverted trigram index over the text files of a ProjectIndex."""
+    
+    def __init__(self, project_index: ProjectIndex, max_file_size: int = 1024 * 1024):
+        """
+        Initialize trigram index. Files are indexed on first search.
+        
+        Args:
+            project_index: File index to follow
+            max_file_size: Larger files are not indexed and always searched
+        """
+        self.project_index = project_index
+        self.max_file_size = max_file_size
+        
+        self._lock = threading.Lock()
+        # Separate lock: change notifications arrive under the project index lock
+        self._dirty_lock = threading.Lock()
+        self._postings = {}
+        self._file_trigrams = {}
+        self._unindexed = set()
+        self._dirty = set()
+        self._built = False
+        
+        project_index.add_change_listener(self._mark_dirty)
+    
+    def _mark_dirty(self, rel_path: str):
+        with self._dirty_lock:
+            self._dirty.add(rel_path)
+    
+    def sync(self):
+        """Index new and changed files."""
+        self.project_index.refresh()
+        
+        # Catch files edited in place outside the project tools
+        with self._lock:
+            indexed = list(self._file_trigrams) + list(self._unindexed)
+        self.project_index.verify_files(indexed)
+        
+        with self._lock:
+            with self._dirty_lock:
+                paths = list(self._dirty)
+                self._dirty.clear()
+            
+            if not self._built:
+                paths = [entry['path'] for entry in self.project_index.iter_files(include_ignored=False)]
+                self._built = True
+            
+            for rel_path in paths:
+                self._index_file(rel_path)
+    
+    def _index_file(self, rel_path: str):
+        """(Re)index one file, removing stale postings first."""
+        for gram in self._file_trigrams.pop(rel_path, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(rel_path)
+                if not posting:
+                    del self._postings[gram]
+        self._unindexed.discard(rel_path)
+        
+        entry = self.project_index.get_file(rel_path, refresh=False)
+        if entry is None or entry['ignored']:
+            return
+        
+        if entry['size'] > self.max_file_size:
+            self._unindexed.add(rel_path)
+            return
+        
+        try:
+            with open(self.project_index.full_path(rel_path), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return
+        
+        if b'\0' in data[:8192]:
+            # Binary file, leave it to the regex scan
+            self._unindexed.add(rel_path)
+            return
+        
+        # Match what the line-by-line text mode scan sees
+        text = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+        grams = frozenset(trigrams(text))
+        self._file_trigrams[rel_path] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(rel_path)
+    
+    def candidates(self, pattern: str, flags: int = 0) -> Optional[Set[str]]:
+        """
+        Get the files that may contain a match for a regex.
+        
+        Args:
+            pattern: Regex pattern
+            flags: Regex flags
+        
+        Returns:
+            Set of relative paths to confirm with the regex, or None when
+            the pattern has no literal text to narrow by
+        """
+        grams = set()
+        for literal in required_literals(pattern, flags):
+            grams.update(trigrams(literal))
+        
+        if not grams:
+            return None
+        
+        self.sync()
+        
+        with self._lock:
+            result = None
+            # Intersect the rarest trigrams first
+            for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+                posting = self._postings.get(gram, set())
+                result = set(posting) if result is None else result & posting
+                if not result:
+                    break
+            return (result or set()) | self._unindexed
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get index size counters."""
+        with self._lock, self._dirty_lock:
+            return {
+                'files': len(self._file_trigrams),
+                'unindexed_files': len(self._unindexed),
+                'trigrams': len(self._postings),
+                'pending': len(self._dirty)
+            }
@@ -1,11 +1,10 @@
 """
 Session Manager - Handles Claude CLI session limits and scheduling.
 """
-import schedule
-import time
 from datetime import datetime, timedelta, time as dt_time
 from typing import Optional, Dict, Any, Callable
 from database import Database
+from scheduler_core import CheckpointScheduler
 import dateutil.parser
 
 
@@ -25,6 +24,7 @@ class SessionManager:
         self.db = db
         self.scheduled_tasks = {}
         self.resume_callback = None
+        self.scheduler = None
     
     def check_for_limit(self, claude_response: Dict[str, Any]) -> bool:
         """
@@ -72,7 +72,7 @@ class SessionManager:
             'context': additional_context or {}
         }
         
-        # Save checkpoint to database
+        # Save checkpoint to database (wakes a running CheckpointScheduler)
         self.db.save_checkpoint(
             task_id=task_id,
             conversation_id=conversation_id,
@@ -82,7 +82,6 @@ class SessionManager:
             checkpoint_data=checkpoint_data
         )
         
-        # Schedule with schedule library
         schedule_time = resume_time.strftime("%H:%M")
         
         print(f"⏰ Task {task_id} scheduled to resume at {schedule_time} ({reset_time_str})")
@@ -114,45 +113,32 @@ class SessionManager:
     
     def run_scheduler(self, check_interval: int = 60):
         """
-        Run the scheduler loop. Checks for scheduled tasks periodically.
+        Run the scheduler loop. Sleeps until the next checkpoint is due and
+        resumes it on time; blocks until interrupted or stop_scheduler().
         
         Args:
-            check_interval: How often to check for scheduled tasks (seconds)
+            check_interval: How often to reload checkpoints saved by other
+                processes (seconds); checkpoints saved by this process wake
+                the scheduler immediately
         """
         print("📅 Scheduler started")
-        print(f"   Checking every {check_interval} seconds")
+        print(f"   Reloading checkpoints every {check_interval} seconds")
         
-        while True:
-            try:
-                # Check database for tasks that should run now
-                current_time = datetime.now()
-                scheduled_checkpoints = self.db.get_scheduled_checkpoints(current_time)
-                
-                for checkpoint in scheduled_checkpoints:
-                    task_id = checkpoint['task_id']
-                    print(f"\n⏰ Time to resume task {task_id}")
-                    
-                    # Call resume callback if set
-                    if self.resume_callback:
-                        try:
-                            self.resume_callback(checkpoint)
-                        except Exception as e:
-                            print(f"❌ Error resuming task {task_id}: {e}")
-                    
-                    # Delete checkpoint after processing
-                    self.db.delete_checkpoint(checkpoint['id'])
-                
-                # Also run any scheduled jobs
-                schedule.run_pending()
-                
-                time.sleep(check_interval)
-                
-            except KeyboardInterrupt:
-                print("\n⏹️  Scheduler stopped by user")
-                break
-            except Exception as e:
-                print(f"⚠️  Scheduler error: {e}")
-                time.sleep(check_interval)
+        self.scheduler = CheckpointScheduler(self.db, self._resume_due, resync_interval=check_interval)
+        try:
+            self.scheduler.run()
+        except KeyboardInterrupt:
+            print("\n⏹️  Scheduler stopped by user")
+    
+    def stop_scheduler(self):
+        """Stop a running scheduler loop."""
+        if self.scheduler:
+            self.scheduler.stop()
+    
+    def _resume_due(self, checkpoint: Dict[str, Any]):
+        """Hand a due checkpoint to the resume callback."""
+        if self.resume_callback:
+            self.resume_callback(checkpoint)
     
     def set_resume_callback(self, callback: Callable):
         """
@@ -264,7 +250,8 @@ class SchedulerDaemon:
         
         Args:
             db_path: Path to database
-            check_interval: Check interval in seconds
+            check_interval: Seconds between reloads of checkpoints saved by
+                other processes
         """
         self.db_path = db_path
         self.check_interval = check_interval
@@ -287,7 +274,7 @@ class SchedulerDaemon:
         
         print("🚀 Starting Agent7 Scheduler Daemon")
         print(f"   Database: {self.db_path}")
-        print(f"   Check interval: {self.check_interval}s")
+        print(f"   Resync interval: {self.check_interval}s")
         
         try:
             self.session_manager.run_scheduler(self.check_interval)
@@ -296,8 +283,8 @@ class SchedulerDaemon:
     
     def stop(self):
         """Stop the scheduler daemon."""
-        # This will be handled by KeyboardInterrupt
-        pass
+        if self.session_manager:
+            self.session_manager.stop_scheduler()
 
 
 if __name__ == '__main__':
@@ -6,6 +6,7 @@ const socket = io();
 // State
 let currentProjectId = null;
 let executionActive = false;
+const joinedTasks = new Set();  // Tasks whose output room this client joined
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
@@ -14,9 +15,7 @@ document.addEventListener('DOMContentLoaded', function() {
     refreshTasks();
     refreshStats();
     
-    // Refresh periodically
-    setInterval(updateStatus, 5000);
-    setInterval(refreshStats, 10000);
+    // No polling: the server pushes status, stats and file changes
 });
 
 // WebSocket event handlers
@@ -32,20 +31,44 @@ socket.on('disconnect', function() {
 });
 
 socket.on('output', function(msg) {
-    addOutput(msg.data);
+    if (msg.stream) {
+        appendOutput(msg.data);
+    } else if (msg.task_id && joinedTasks.size > 1) {
+        // Several tasks running: label whose output this is
+        addOutput(`[#${msg.task_id}] ${msg.data}`);
+    } else {
+        addOutput(msg.data);
+    }
 });
 
 socket.on('task_status', function(data) {
     console.log('Task status update:', data);
     refreshTasks();
-    refreshStats();
 });
 
 socket.on('task_created', function(data) {
     console.log('Task created:', data);
     addOutput(`\n✅ Task created: #${data.task_id} - ${data.title}\n`);
     refreshTasks();
-    refreshStats();
+});
+
+socket.on('status_update', function(changes) {
+    applyStatus(changes);
+});
+
+socket.on('stats_update', function(stats) {
+    applyStats(stats);
+});
+
+socket.on('llm_status', function(data) {
+    applyStatus({local_llm_available: data.available});
+});
+
+let filesRefreshTimer = null;
+socket.on('files_changed', function() {
+    // A task can write many files at once; refresh the list once per burst
+    clearTimeout(filesRefreshTimer);
+    filesRefreshTimer = setTimeout(refreshFiles, 300);
 });
 
 socket.on('chat_action', function(data) {
@@ -56,11 +79,11 @@ socket.on('chat_action', function(data) {
     }
 });
 
-socket.on('execution_complete', function() {
-    executionActive = false;
-    document.getElementById('execStatus').textContent = 'Idle';
+socket.on('execution_complete', function(data) {
+    if (data && data.task_id) {
+        leaveTask(data.task_id);
+    }
     refreshTasks();
-    refreshStats();
 });
 
 // API Functions
@@ -68,9 +91,15 @@ socket.on('execution_complete', function() {
 async function updateStatus() {
     try {
         const response = await fetch('/api/status');
-        const status = await response.json();
-        
-        // Update LM Studio status
+        applyStatus(await response.json());
+    } catch (error) {
+        console.error('Error updating status:', error);
+    }
+}
+
+function applyStatus(status) {
+    // Full snapshots and pushed deltas both only carry the fields to update
+    if ('local_llm_available' in status) {
         const llmStatus = document.getElementById('llmStatus');
         if (status.local_llm_available) {
             llmStatus.textContent = '✅ Online';
@@ -79,8 +108,9 @@ async function updateStatus() {
             llmStatus.textContent = '❌ Offline';
             llmStatus.style.color = '#f56565';
         }
-        
-        // Update project status
+    }
+    
+    if ('current_project_dir' in status) {
         const projectStatus = document.getElementById('projectStatus');
         if (status.current_project_dir) {
             projectStatus.textContent = status.current_project_dir;
@@ -90,12 +120,13 @@ async function updateStatus() {
         } else {
             projectStatus.textContent = 'None';
         }
-        
-        // Update execution status
+    }
+    
+    if ('execution_active' in status) {
         const execStatus = document.getElementById('execStatus');
         executionActive = status.execution_active;
         if (executionActive) {
-            execStatus.textContent = 'Running';
+            execStatus.textContent = status.active_jobs > 1 ? `Running (${status.active_jobs})` : 'Running';
             execStatus.style.color = '#ed8936';
             execStatus.classList.add('executing');
         } else {
@@ -103,9 +134,6 @@ async function updateStatus() {
             execStatus.style.color = '#48bb78';
             execStatus.classList.remove('executing');
         }
-        
-    } catch (error) {
-        console.error('Error updating status:', error);
     }
 }
 
@@ -187,24 +215,28 @@ async function createTask() {
     }
 }
 
-async function refreshTasks() {
+async function refreshTasks(cursor = null) {
     try {
-        let url = '/api/tasks';
+        const params = new URLSearchParams();
         if (currentProjectId) {
-            url += `?project_id=${currentProjectId}`;
+            params.set('project_id', currentProjectId);
+        }
+        if (cursor) {
+            params.set('cursor', cursor);
         }
         
-        const response = await fetch(url);
+        const response = await fetch(`/api/tasks?${params}`);
         const tasks = await response.json();
+        const nextCursor = response.headers.get('X-Next-Cursor');
         
         const tasksList = document.getElementById('tasksList');
         
-        if (tasks.length === 0) {
+        if (tasks.length === 0 && !cursor) {
             tasksList.innerHTML = '<div style="padding: 20px; text-align: center; color: #999;">No tasks yet. Create one!</div>';
             return;
         }
         
-        tasksList.innerHTML = tasks.map(task => `
+        const html = tasks.map(task => `
             <div class="task-item ${task.task_type} ${task.status}" data-task-id="${task.id}">
                 <div class="task-header">
                     <span class="task-title">${task.title}</span>
@@ -214,9 +246,13 @@ async function refreshTasks() {
                     Status: ${getStatusEmoji(task.status)} ${task.status} | Priority: ${task.priority}
                 </div>
                 <div class="task-actions">
-                    <button onclick="executeTask(${task.id})" class="btn btn-primary btn-small" ${task.status === 'in_progress' || executionActive ? 'disabled' : ''}>
+                    <button onclick="executeTask(${task.id})" class="btn btn-primary btn-small" ${task.status === 'in_progress' ? 'disabled' : ''}>
                         ▶️ Execute
                     </button>
+                    ${task.status === 'in_progress' ? `
+                    <button onclick="cancelTask(${task.id})" class="btn btn-small" title="Stop execution">
+                        ⏹️ Cancel
+                    </button>` : ''}
                     <button onclick="viewTaskDetails(${task.id})" class="btn btn-small">
                         📋 Details
                     </button>
@@ -230,22 +266,46 @@ async function refreshTasks() {
             </div>
         `).join('');
         
+        const loadMore = nextCursor
+            ? `<button id="loadMoreTasks" onclick="refreshTasks('${nextCursor}')" class="btn btn-small">⬇️ Load more</button>`
+            : '';
+        
+        if (cursor) {
+            // Appending the next page
+            const previousButton = document.getElementById('loadMoreTasks');
+            if (previousButton) {
+                previousButton.remove();
+            }
+            tasksList.insertAdjacentHTML('beforeend', html + loadMore);
+        } else {
+            tasksList.innerHTML = html + loadMore;
+        }
+        
     } catch (error) {
         console.error('Error refreshing tasks:', error);
     }
 }
 
-async function executeTask(taskId) {
-    if (executionActive) {
-        alert('Another task is already executing');
-        return;
+function joinTask(taskId) {
+    joinedTasks.add(taskId);
+    socket.emit('join_task', {task_id: taskId});
+}
+
+function leaveTask(taskId) {
+    if (joinedTasks.delete(taskId)) {
+        socket.emit('leave_task', {task_id: taskId});
     }
-    
+}
+
+async function executeTask(taskId) {
     if (!currentProjectId) {
         alert('Please select a project first');
         return;
     }
     
+    // Join the output room first so no early output is missed
+    joinTask(taskId);
+    
     try {
         const response = await fetch(`/api/execute/${taskId}`, {
             method: 'POST'
@@ -254,26 +314,73 @@ async function executeTask(taskId) {
         const result = await response.json();
         
         if (response.ok) {
-            executionActive = true;
-            document.getElementById('execStatus').textContent = 'Running';
             addOutput(`\n${'='.repeat(60)}\n`);
-            addOutput(`🚀 Executing task ${taskId}\n`);
+            addOutput(`🚀 Executing task ${taskId} (job #${result.job_id})\n`);
             addOutput(`${'='.repeat(60)}\n\n`);
         } else {
+            leaveTask(taskId);
             alert('Error: ' + result.error);
         }
     } catch (error) {
+        leaveTask(taskId);
         console.error('Error executing task:', error);
         alert('Failed to execute task');
     }
 }
 
-async function viewTaskDetails(taskId) {
+async function cancelTask(taskId) {
     try {
-        const response = await fetch(`/api/tasks/${taskId}`);
-        const data = await response.json();
+        const response = await fetch(`/api/task/${taskId}/cancel`, {method: 'POST'});
+        const result = await response.json();
         
         if (response.ok) {
+            addOutput(`\n⏹️  Cancelling task #${taskId}...\n`);
+        } else {
+            alert('Error: ' + result.error);
+        }
+    } catch (error) {
+        console.error('Error cancelling task:', error);
+    }
+}
+
+async function fetchTaskDetails(taskId) {
+    // Conversations and results come in pages; follow the cursors to the end
+    const response = await fetch(`/api/tasks/${taskId}`);
+    const data = await response.json();
+    if (!response.ok) {
+        return null;
+    }
+    
+    let cursors = data.next_cursors;
+    while (cursors.conversations || cursors.results) {
+        const params = new URLSearchParams();
+        for (const [list, cursor] of Object.entries(cursors)) {
+            if (cursor) {
+                params.set(`${list}_cursor`, cursor);
+            }
+        }
+        const page = await (await fetch(`/api/tasks/${taskId}?${params}`)).json();
+        if (!page.next_cursors) {
+            break;
+        }
+        for (const list of ['conversations', 'results']) {
+            if (cursors[list]) {
+                data[list].push(...page[list]);
+            }
+        }
+        cursors = {
+            conversations: cursors.conversations && page.next_cursors.conversations,
+            results: cursors.results && page.next_cursors.results
+        };
+    }
+    return data;
+}
+
+async function viewTaskDetails(taskId) {
+    try {
+        const data = await fetchTaskDetails(taskId);
+        
+        if (data) {
             // Show task details in output
             addOutput(`\n${'='.repeat(60)}\n`);
             addOutput(`📋 Task Details: ${data.task.title}\n`);
@@ -357,18 +464,19 @@ async function deleteTask(taskId) {
 async function refreshStats() {
     try {
         const response = await fetch('/api/stats');
-        const stats = await response.json();
-        
-        document.getElementById('statTotal').textContent = stats.total_tasks;
-        document.getElementById('statPending').textContent = stats.pending;
-        document.getElementById('statCompleted').textContent = stats.completed;
-        document.getElementById('statFailed').textContent = stats.failed;
-        
+        applyStats(await response.json());
     } catch (error) {
         console.error('Error refreshing stats:', error);
     }
 }
 
+function applyStats(stats) {
+    document.getElementById('statTotal').textContent = stats.total_tasks;
+    document.getElementById('statPending').textContent = stats.pending;
+    document.getElementById('statCompleted').textContent = stats.completed;
+    document.getElementById('statFailed').textContent = stats.failed;
+}
+
 async function refreshFiles() {
     try {
         const response = await fetch('/api/files');
@@ -410,6 +518,19 @@ function addOutput(text) {
     output.scrollTop = output.scrollHeight;
 }
 
+function appendOutput(text) {
+    // Streamed tokens extend the current line instead of creating a new one
+    const output = document.getElementById('output');
+    let line = output.lastElementChild;
+    if (!line || !line.classList.contains('streaming')) {
+        line = document.createElement('div');
+        line.className = 'output-line streaming';
+        output.appendChild(line);
+    }
+    line.textContent += text;
+    output.scrollTop = output.scrollHeight;
+}
+
 function clearOutput() {
     const output = document.getElementById('output');
     output.innerHTML = '<div class="output-line">Output cleared.</div>';
@@ -487,6 +608,7 @@ async function sendChatMessage() {
                         
                         // If task was executed, notify and refresh
                         if (action.executed) {
+                            joinTask(action.task_id);
                             addOutput(`\n💬 ${action.message}\n`);
                             refreshTasks();
                         } else if (action.execute) {
@@ -0,0 +1,349 @@
+"""
+Symbol Index - Cached AST symbol table for Python files.
+
+Parses each Python file once with ast and keeps its definitions (with
+nested qualnames), imports and name references. Files are re-parsed
+only when ProjectIndex reports a change and their content hash differs,
+so definition, reference and outline lookups need no tree scans.
+"""
+import ast
+import bisect
+import difflib
+import hashlib
+import re
+import threading
+from typing import List, Dict, Any, Optional
+
+from project_index import ProjectIndex
+
+
+class _SymbolCollector(ast.NodeVisitor):
+    """Collects definitions, imports and references from one module."""
+    
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.scope = []
+        self.definitions = []
+        self.imports = []
+        self.references = []
+    
+    def _line(self, line_num: int) -> str:
+        if 0 < line_num <= len(self.lines):
+            return self.lines[line_num - 1].rstrip()
+        return ''
+    
+    def _define(self, node, definition_type: str, is_async: bool = False):
+        parent = self.scope[-1] if self.scope else None
+        self.definitions.append({
+            'name': node.name,
+            'qualname': '.'.join([name for name, _ in self.scope] + [node.name]),
+            'type': definition_type,
+            'async': is_async,
+            'method': definition_type == 'function' and parent is not None and parent[1] == 'class',
+            'line': node.lineno,
+            'end_line': getattr(node, 'end_lineno', node.lineno),
+            'depth': len(self.scope),
+            'content': self._line(node.lineno)
+        })
+        
+        self.scope.append((node.name, definition_type))
+        self.generic_visit(node)
+        self.scope.pop()
+    
+    def _reference(self, name: str, line_num: int, column: int, kind: str):
+        self.references.append({
+            'name': name,
+            'line': line_num,
+            'column': column,
+            'kind': kind,
+            'content': self._line(line_num)
+        })
+    
+    def visit_ClassDef(self, node):
+        self._define(node, 'class')
+    
+    def visit_FunctionDef(self, node):
+        self._define(node, 'function')
+    
+    def visit_AsyncFunctionDef(self, node):
+        self._define(node, 'function', is_async=True)
+    
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append({
+                'module': alias.name,
+                'name': None,
+                'asname': alias.asname,
+                'line': node.lineno
+            })
+    
+    def visit_ImportFrom(self, node):
+        module = '.' * node.level + (node.module or '')
+        for alias in node.names:
+            self.imports.append({
+                'module': module,
+                'name': alias.name,
+                'asname': alias.asname,
+                'line': node.lineno
+            })
+            self._reference(alias.name, node.lineno, node.col_offset, 'import')
+    
+    def visit_Name(self, node):
+        kind = 'use' if isinstance(node.ctx, ast.Load) else 'assign'
+        self._reference(node.id, node.lineno, node.col_offset, kind)
+    
+    def visit_Attribute(self, node):
+        line_num = getattr(node, 'end_lineno', node.lineno)
+        column = max(getattr(node, 'end_col_offset', 0) - len(node.attr), 0)
+        self._reference(node.attr, line_num, column, 'attribute')
+        self.generic_visit(node)
+
+
+# Fallback for files that don't parse (e.g. half-written LLM output)
+_DEF_PATTERN = re.compile(r'^(\s*)(async\s+)?(def|class)\s+(\w+)')
+
+
+def _scan_definitions(lines: List[str]) -> List[Dict[str, Any]]:
+    definitions = []
+    for line_num, line in enumerate(lines, 1):
+        match = _DEF_PATTERN.match(line)
+        if match:
+            definitions.append({
+                'name': match.group(4),
+                'qualname': match.group(4),
+                'type': 'class' if match.group(3) == 'class' else 'function',
+                'async': bool(match.group(2)),
+                'method': False,
+                'line': line_num,
+                'end_line': line_num,
+                'depth': 0,
+                'content': line.rstrip()
+            })
+    return definitions
+
+
+class SymbolIndex:
+    """Per-file cached symbol table over the Python files of a ProjectIndex."""
+    
+    def __init__(self, project_index: ProjectIndex):
+        """
+        Initialize symbol index. Files are parsed on first lookup.
+        
+        Args:
+            project_index: File index to follow
+        """
+        self.project_index = project_index
+        
+        self._lock = threading.Lock()
+        # Separate lock: change notifications arrive under the project index lock
+        self._dirty_lock = threading.Lock()
+        self._files = {}
+        self._dirty = set()
+        self._built = False
+        
+        self._by_name = {}
+        self._by_qualname = {}
+        self._references = {}
+        self._sorted_names = []
+        
+        project_index.add_change_listener(self._mark_dirty)
+    
+    def _mark_dirty(self, rel_path: str):
+        if rel_path.endswith('.py'):
+            with self._dirty_lock:
+                self._dirty.add(rel_path)
+    
+    def sync(self):
+        """Re-parse new and changed Python files."""
+        self.project_index.refresh()
+        
+        # Catch files edited in place outside the project tools
+        with self._lock:
+            indexed = list(self._files)
+        self.project_index.verify_files(indexed)
+        
+        with self._lock:
+            with self._dirty_lock:
+                paths = list(self._dirty)
+                self._dirty.clear()
+            
+            if not self._built:
+                paths = [entry['path'] for entry in self.project_index.iter_files(['.py'])]
+                self._built = True
+            
+            for rel_path in paths:
+                self._index_file(rel_path)
+    
+    def _index_file(self, rel_path: str):
+        """Parse one file if its content changed."""
+        entry = self.project_index.get_file(rel_path, refresh=False)
+        if entry is None:
+            self._remove_record(rel_path)
+            return
+        
+        try:
+            with open(self.project_index.full_path(rel_path), 'rb') as f:
+                data = f.read()
+        except OSError:
+            self._remove_record(rel_path)
+            return
+        
+        digest = hashlib.sha1(data).hexdigest()
+        previous = self._files.get(rel_path)
+        if previous is not None and previous['hash'] == digest:
+            return  # Touched but unchanged
+        
+        source = data.decode('utf-8', errors='ignore')
+        lines = source.splitlines()
+        record = {'hash': digest, 'error': None}
+        
+        try:
+            tree = ast.parse(source, filename=rel_path)
+            collector = _SymbolCollector(lines)
+            collector.visit(tree)
+            record['definitions'] = collector.definitions
+            record['imports'] = collector.imports
+            record['references'] = collector.references
+        except (SyntaxError, ValueError) as e:
+            record['definitions'] = _scan_definitions(lines)
+            record['imports'] = []
+            record['references'] = []
+            record['error'] = str(e)
+        
+        for item in record['definitions'] + record['references']:
+            item['file'] = rel_path
+        
+        self._remove_record(rel_path)
+        self._add_record(rel_path, record)
+    
+    def _add_record(self, rel_path: str, record: Dict[str, Any]):
+        self._files[rel_path] = record
+        
+        for definition in record['definitions']:
+            name = definition['name']
+            if name not in self._by_name:
+                self._by_name[name] = []
+                bisect.insort(self._sorted_names, name)
+            self._by_name[name].append(definition)
+            self._by_qualname.setdefault(definition['qualname'], []).append(definition)
+        
+        for reference in record['references']:
+            self._references.setdefault(reference['name'], []).append(reference)
+    
+    def _remove_record(self, rel_path: str):
+        record = self._files.pop(rel_path, None)
+        if record is None:
+            return
+        
+        for definition in record['definitions']:
+            name = definition['name']
+            remaining = [d for d in self._by_name.get(name, []) if d['file'] != rel_path]
+            if remaining:
+                self._by_name[name] = remaining
+            elif name in self._by_name:
+                del self._by_name[name]
+                position = bisect.bisect_left(self._sorted_names, name)
+                if position < len(self._sorted_names) and self._sorted_names[position] == name:
+                    del self._sorted_names[position]
+            
+            qualname = definition['qualname']
+            remaining = [d for d in self._by_qualname.get(qualname, []) if d['file'] != rel_path]
+            if remaining:
+                self._by_qualname[qualname] = remaining
+            else:
+                self._by_qualname.pop(qualname, None)
+        
+        for name in {reference['name'] for reference in record['references']}:
+            remaining = [r for r in self._references.get(name, []) if r['file'] != rel_path]
+            if remaining:
+                self._references[name] = remaining
+            else:
+                self._references.pop(name, None)
+    
+    @staticmethod
+    def _sorted(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return sorted((dict(item) for item in items), key=lambda item: (item['file'], item['line']))
+    
+    def find_definitions(self, name: str, match: str = 'exact') -> List[Dict[str, Any]]:
+        """
+        Look up definitions by name.
+        
+        Args:
+            name: Symbol name, or dotted qualname like "Game.update"
+            match: 'exact', 'prefix' or 'fuzzy'
+        
+        Returns:
+            Definition dicts sorted by file and line
+        """
+        self.sync()
+        
+        with self._lock:
+            if match == 'prefix':
+                start = bisect.bisect_left(self._sorted_names, name)
+                found = []
+                for candidate in self._sorted_names[start:]:
+                    if not candidate.startswith(name):
+                        break
+                    found.extend(self._by_name[candidate])
+                return self._sorted(found)
+            
+            if match == 'fuzzy':
+                found = []
+                for candidate in difflib.get_close_matches(name, self._sorted_names, n=10, cutoff=0.6):
+                    found.extend(self._by_name[candidate])
+                return self._sorted(found)
+            
+            if '.' in name:
+                return self._sorted(self._by_qualname.get(name, []))
+            return self._sorted(self._by_name.get(name, []))
+    
+    def suggest(self, name: str, limit: int = 5) -> List[str]:
+        """Get defined names similar to name."""
+        self.sync()
+        with self._lock:
+            return difflib.get_close_matches(name.split('.')[-1], self._sorted_names, n=limit, cutoff=0.6)
+    
+    def find_references(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Look up references (uses, assignments, attributes and imports) of a name.
+        
+        Args:
+            name: Symbol name (a dotted qualname is matched on its last part)
+        
+        Returns:
+            Reference dicts sorted by file and line
+        """
+        self.sync()
+        with self._lock:
+            return self._sorted(self._references.get(name.split('.')[-1], []))
+    
+    def get_outline(self, rel_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the definitions and imports of one file.
+        
+        Args:
+            rel_path: Path relative to the project root
+        
+        Returns:
+            Dict with 'definitions', 'imports' and 'error', or None if the
+            file is not an indexed Python file
+        """
+        self.sync()
+        with self._lock:
+            record = self._files.get(rel_path)
+            if record is None:
+                return None
+            return {
+                'definitions': [dict(d) for d in record['definitions']],
+                'imports': [dict(i) for i in record['imports']],
+                'error': record['error']
+            }
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get index size counters."""
+        with self._lock:
+            return {
+                'files': len(self._files),
+                'names': len(self._sorted_names),
+                'referenced_names': len(self._references)
+            }
@@ -1,8 +1,8 @@
 """
 Task orchestration engine for managing planning, coding, and testing workflows.
 """
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Dict, Any, List
 from database import Database
 from claude_client import ClaudeClient
@@ -12,6 +12,10 @@ from session_manager import SessionManager
 from test_runner import TestRunner
 
 
+# Implicit workflow order for tasks that declare no dependencies
+WORKFLOW_STAGES = {'planning': 0, 'coding': 1, 'testing': 2}
+
+
 class TaskOrchestrator:
     """Orchestrates tasks using Claude CLI and/or local LLM."""
     
@@ -307,51 +311,173 @@ class TaskOrchestrator:
             print(f"❌ Unknown task type: {task_type}")
             return False
     
-    def execute_workflow(self, project_id: int, language: str = "python") -> Dict[str, Any]:
+    def plan_workflow(self, tasks: List[Dict]) -> Dict[str, Any]:
+        """
+        Arrange pending tasks into waves that can run concurrently.
+        
+        Declared dependencies (task_dependencies) decide the order. A task
+        without declared dependencies keeps the classic stage order and
+        waits for the pending tasks of earlier stages (planning, then
+        coding, then testing). Dependencies outside the workflow must
+        already be completed.
+        
+        Args:
+            tasks: Pending tasks of the workflow
+        
+        Returns:
+            Dict with 'waves' (lists of tasks, each wave depending only on
+            earlier ones), 'depends_on' (task ID -> IDs in the workflow)
+            and 'blocked' (task ID -> reason it can't run)
+        """
+        by_id = {task['id']: task for task in tasks}
+        graph = self.db.get_dependency_graph(list(by_id))
+        
+        depends_on = {}
+        blocked = {}
+        for task in tasks:
+            declared = graph[task['id']]
+            if declared:
+                unmet = [d for d in declared if d['id'] not in by_id and d['status'] != 'completed']
+                if unmet:
+                    blocked[task['id']] = "Waiting on task " + ", ".join(
+                        f"#{d['id']} ({d['status']})" for d in unmet
+                    )
+                depends_on[task['id']] = {d['id'] for d in declared if d['id'] in by_id}
+            else:
+                stage = WORKFLOW_STAGES.get(task['task_type'], len(WORKFLOW_STAGES))
+                depends_on[task['id']] = {
+                    other['id'] for other in tasks
+                    if WORKFLOW_STAGES.get(other['task_type'], len(WORKFLOW_STAGES)) < stage
+                }
+        
+        # Kahn's algorithm, one wave per round
+        remaining = dict(depends_on)
+        waves = []
+        while remaining:
+            ready = [task_id for task_id, deps in remaining.items()
+                     if not deps & remaining.keys()]
+            if not ready:
+                for task_id in remaining:
+                    blocked.setdefault(task_id, "Dependency cycle")
+                break
+            ready.sort(key=lambda task_id: (-by_id[task_id]['priority'], task_id))
+            waves.append([by_id[task_id] for task_id in ready])
+            for task_id in ready:
+                del remaining[task_id]
+        
+        return {'waves': waves, 'depends_on': depends_on, 'blocked': blocked}
+    
+    def execute_workflow(self, project_id: int, language: str = "python",
+                         max_concurrency: int = 2,
+                         failure_policy: str = 'fail_fast') -> Dict[str, Any]:
         """
-        Execute a complete workflow: planning -> coding -> testing.
+        Execute a project's pending tasks in dependency order.
+        
+        Tasks run in topological waves; the tasks of a wave don't depend on
+        each other and run concurrently, up to max_concurrency at a time.
         
         Args:
             project_id: Project ID
             language: Programming language
-            
+            max_concurrency: Tasks executed at the same time
+            failure_policy: 'fail_fast' stops scheduling new tasks after a
+                failure; 'continue' only skips tasks that depend on a
+                failed task
+        
         Returns:
             Dict with workflow results
         """
+        if failure_policy not in ('fail_fast', 'continue'):
+            raise ValueError(f"Unknown failure policy: {failure_policy}")
+        
         tasks = self.db.list_tasks(project_id=project_id, status='pending')
+        plan = self.plan_workflow(tasks)
         
         results = {
             'total': len(tasks),
             'completed': 0,
             'failed': 0,
+            'skipped': 0,
+            'waves': len(plan['waves']),
             'task_results': []
         }
         
-        # Sort tasks by type: planning first, then coding, then testing
-        type_order = {'planning': 0, 'coding': 1, 'testing': 2}
-        tasks.sort(key=lambda t: (type_order.get(t['task_type'], 99), t['priority']))
-        
-        for task in tasks:
-            print(f"\n{'='*60}")
-            success = self.execute_task(task['id'], language)
-            
-            results['task_results'].append({
+        def record(task, outcome, error=None):
+            entry = {
                 'task_id': task['id'],
                 'title': task['title'],
                 'type': task['task_type'],
-                'success': success
-            })
-            
-            if success:
-                results['completed'] += 1
-            else:
-                results['failed'] += 1
-            
-            # Small delay between tasks
-            time.sleep(1)
+                'success': outcome == 'completed',
+                'outcome': outcome
+            }
+            if error:
+                entry['error'] = error
+            results['task_results'].append(entry)
+            results[outcome] += 1
+        
+        by_id = {task['id']: task for task in tasks}
+        for task_id, reason in plan['blocked'].items():
+            print(f"⏸️  Skipping task #{task_id}: {reason}")
+            record(by_id[task_id], 'skipped', reason)
+        
+        unsuccessful = set(plan['blocked'])
+        stop = False
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency),
+                                thread_name_prefix="agent7-workflow") as pool:
+            for number, wave in enumerate(plan['waves'], 1):
+                runnable = []
+                for task in wave:
+                    if task['id'] in unsuccessful:
+                        continue
+                    failed_deps = plan['depends_on'][task['id']] & unsuccessful
+                    if stop or failed_deps:
+                        reason = ("Workflow stopped after a failure" if stop else
+                                  "Depends on unsuccessful task " +
+                                  ", ".join(f"#{d}" for d in sorted(failed_deps)))
+                        print(f"⏭️  Skipping task #{task['id']}: {reason}")
+                        record(task, 'skipped', reason)
+                        unsuccessful.add(task['id'])
+                    else:
+                        runnable.append(task)
+                
+                if not runnable:
+                    continue
+                
+                print(f"\n{'='*60}")
+                print(f"🌊 Wave {number}/{len(plan['waves'])}: {len(runnable)} task(s)")
+                futures = {pool.submit(self.execute_task, task['id'], language): task
+                           for task in runnable}
+                
+                for future in as_completed(futures):
+                    task = futures[future]
+                    if future.cancelled():
+                        record(task, 'skipped', "Workflow stopped after a failure")
+                        unsuccessful.add(task['id'])
+                        continue
+                    try:
+                        success = future.result()
+                        error = None
+                    except Exception as e:
+                        success = False
+                        error = str(e)
+                        print(f"❌ Task #{task['id']} crashed: {e}")
+                        self.db.update_task_status(task['id'], 'failed')
+                    
+                    if success:
+                        record(task, 'completed')
+                    else:
+                        record(task, 'failed', error)
+                        unsuccessful.add(task['id'])
+                        if failure_policy == 'fail_fast':
+                            stop = True
+                            # Tasks of this wave that haven't started yet
+                            for other in futures:
+                                other.cancel()
         
         print(f"\n{'='*60}")
-        print(f"✨ Workflow complete: {results['completed']}/{results['total']} tasks successful")
+        print(f"✨ Workflow complete: {results['completed']}/{results['total']} tasks successful"
+              + (f", {results['skipped']} skipped" if results['skipped'] else ""))
         
         return results
     
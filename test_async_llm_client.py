@@ -0,0 +1,116 @@
+"""
+Test AsyncLocalLLMClient against a fake LM Studio server (no LM Studio needed).
+"""
+import asyncio
+import time
+from async_llm_client import AsyncLocalLLMClient
+from test_local_llm_client import start_fake_server
+
+
+def test_async_send_message():
+    """Test a regular completion through the async client."""
+    print("\n=== Test: async send_message ===")
+    
+    server, base_url = start_fake_server()
+    
+    async def run():
+        async with AsyncLocalLLMClient(base_url) as client:
+            assert await client.check_availability()
+            result = await client.send_message("hello", system_prompt="be brief")
+            assert result['metadata']['success'], result
+            assert result['response'] == "echo: hello"
+            assert await client.simple_prompt("again") == "echo: again"
+    
+    try:
+        asyncio.run(run())
+        print("✅ Async completion works")
+    finally:
+        server.shutdown()
+
+
+def test_async_streaming():
+    """Test streamed deltas with an async callback."""
+    print("\n=== Test: async streaming ===")
+    
+    server, base_url = start_fake_server()
+    
+    async def run():
+        deltas = []
+        
+        async def on_delta(delta):
+            deltas.append(delta)
+        
+        async with AsyncLocalLLMClient(base_url) as client:
+            result = await client.send_message("one two three", stream_callback=on_delta)
+        
+        assert result['metadata']['streamed']
+        assert ''.join(deltas) == result['response']
+        assert len(deltas) == 4
+    
+    try:
+        asyncio.run(run())
+        print("✅ Async streaming works")
+    finally:
+        server.shutdown()
+
+
+def test_concurrency_limit():
+    """Test that max_concurrency bounds in-flight requests."""
+    print("\n=== Test: concurrency limit ===")
+    
+    server, base_url = start_fake_server()
+    
+    async def run():
+        async with AsyncLocalLLMClient(base_url, max_concurrency=2) as client:
+            results = await asyncio.gather(*[
+                client.send_message(f"slow {i}") for i in range(6)
+            ])
+        assert all(r['metadata']['success'] for r in results)
+        assert [r['response'] for r in results] == [f"echo: slow {i}" for i in range(6)]
+    
+    try:
+        asyncio.run(run())
+        print(f"   Max in flight: {server.max_in_flight}")
+        assert server.max_in_flight == 2, f"Expected 2, got {server.max_in_flight}"
+        print("✅ Concurrency limited to 2")
+    finally:
+        server.shutdown()
+
+
+def test_cancellation():
+    """Test that a pending request can be cancelled and times out cleanly."""
+    print("\n=== Test: cancellation ===")
+    
+    server, base_url = start_fake_server()
+    
+    async def run():
+        async with AsyncLocalLLMClient(base_url) as client:
+            task = asyncio.create_task(client.send_message("slow request"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+                assert False, "Task should have been cancelled"
+            except asyncio.CancelledError:
+                pass
+            
+            result = await client.send_message("slow timeout", timeout=0.05)
+            assert not result['metadata']['success']
+            assert result['error'] == 'Request timed out'
+    
+    try:
+        start = time.time()
+        asyncio.run(run())
+        print(f"✅ Cancelled and timed out in {time.time() - start:.2f}s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    print("Testing AsyncLocalLLMClient\n" + "=" * 50)
+    test_async_send_message()
+    test_async_streaming()
+    test_concurrency_limit()
+    test_cancellation()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
@@ -0,0 +1,186 @@
+"""
+Test the single-pass streaming block parser.
+"""
+from block_parser import BlockParser, parse_blocks
+from edit_blocks import extract_edit_blocks
+
+
+TOOLS = ['read_file', 'list_files', 'get_project_structure']
+
+RESPONSE = """Let me look around first.
+
+TOOL: list_files(relative_path="src", extensions=[".py"])
+
+```json
+{"name": "read_file",
+ "arguments": {"filepath": "src/app.py"}}
+```
+
+File: src/app.py
+```python
+def main():
+    print("read_file(x) inside a file is not a tool call")
+```
+
+Edit: src/util.py
+<<<<<<< SEARCH
+def helper():
+    return 1
+=======
+def helper():
+    return 2
+>>>>>>> REPLACE
+
+```diff
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,2 +1,2 @@
+ def main():
+-    pass
++    return 0
+```
+Done.
+"""
+
+
+def test_single_pass_blocks():
+    """Test file, edit and tool blocks found in one pass."""
+    print("\n=== Test: Single-pass blocks ===")
+    
+    blocks = parse_blocks(RESPONSE, TOOLS)
+    types = [block['type'] for block in blocks]
+    assert types == ['tool', 'tool', 'file', 'edit', 'edit'], types
+    
+    explicit, json_call, file_block, search_replace, diff = blocks
+    assert explicit['pattern'] == 'explicit' and explicit['tool'] == 'list_files'
+    assert explicit['args_str'] == 'relative_path="src", extensions=[".py"]'
+    assert json_call['pattern'] == 'json'
+    assert json_call['args_dict'] == {'filepath': 'src/app.py'}, "JSON may span lines"
+    assert file_block['filepath'] == 'src/app.py'
+    assert file_block['content'].startswith('def main():')
+    
+    edits = extract_edit_blocks('\n'.join([search_replace['text'], diff['text']]))
+    assert [edit['filepath'] for edit in edits] == ['src/util.py', 'src/app.py']
+    assert edits[0]['hunks'][0]['new'] == ['def helper():', '    return 2']
+    assert edits[1]['hunks'][0]['old'] == ['def main():', '    pass']
+    print("✅ Tool calls, file block and both edit formats found")
+    
+    # A bare path above a later block wins over an earlier header, as in extract_edit_blocks
+    mixed = """Edit: a.py
+<<<<<<< SEARCH
+x = 1
+=======
+x = 2
+>>>>>>> REPLACE
+
+b.py
+<<<<<<< SEARCH
+y = 1
+=======
+y = 2
+>>>>>>> REPLACE
+
+<<<<<<< SEARCH
+z = 1
+=======
+z = 2
+>>>>>>> REPLACE
+"""
+    texts = [block['text'] for block in parse_blocks(mixed)]
+    edits = extract_edit_blocks('\n'.join(texts))
+    expected = [(b['filepath'], len(b['hunks'])) for b in extract_edit_blocks(mixed)]
+    assert expected == [('a.py', 1), ('b.py', 2)]
+    assert [(e['filepath'], len(e['hunks'])) for e in edits] == expected, texts
+    print("✅ Both parsers attribute edits to the same file")
+
+
+def test_streaming_emits_early():
+    """Test that blocks are emitted as soon as they close."""
+    print("\n=== Test: Streaming ===")
+    
+    parser = BlockParser(TOOLS)
+    emitted = []
+    closed_at = {}
+    for offset in range(0, len(RESPONSE), 7):
+        for block in parser.feed(RESPONSE[offset:offset + 7]):
+            emitted.append(block)
+            closed_at[len(emitted) - 1] = offset + 7
+    emitted.extend(parser.close())
+    
+    assert emitted == parse_blocks(RESPONSE, TOOLS), "Chunking must not change the result"
+    assert emitted == parser.blocks
+    
+    # The TOOL: call is ready long before the response ends
+    assert closed_at[0] <= RESPONSE.index('```json') + 7
+    assert closed_at[2] <= RESPONSE.index('Edit: src/util.py') + 7
+    print("✅ First tool call emitted after", closed_at[0], "of", len(RESPONSE), "chars")
+
+
+def test_file_block_forms():
+    """Test header styles, comment paths and unterminated fences."""
+    print("\n=== Test: File block forms ===")
+    
+    text = """**Create file: index.html**
+```html
+<h1>Hi</h1>
+```
+
+Create `main.py`:
+```python
+print("hi")
+```
+
+```python
+# utils.py
+X = 1
+```
+
+```python
+# main.py
+print("duplicate of an earlier block")
+```
+
+File: last.txt
+```
+no closing fence"""
+    blocks = parse_blocks(text)
+    assert [b['filepath'] for b in blocks] == ['index.html', 'main.py', 'utils.py', 'last.txt']
+    assert blocks[2]['content'] == 'X = 1', "Comment path is not part of the content"
+    assert blocks[3]['content'] == 'no closing fence'
+    print("✅ All header forms recognized, duplicate comment block skipped")
+    
+    # Headers inside markdown headings and lists
+    for header in ("### File: main.py", "1. File: main.py", "## Create `main.py`:",
+                   "- **File: main.py**"):
+        blocks = parse_blocks(f"{header}\n```python\nprint('hi')\n```\n")
+        assert [b['filepath'] for b in blocks] == ['main.py'], header
+    print("✅ Heading and list prefixes accepted")
+
+
+def test_tool_call_context():
+    """Test natural-language and function-call detection."""
+    print("\n=== Test: Tool call context ===")
+    
+    blocks = parse_blocks("I need to use read_file on src/main.py to understand the code", TOOLS)
+    assert blocks[0]['pattern'] == 'natural_language'
+    assert blocks[0]['context'].startswith('I need to use read_file on src/main')
+    
+    # Bare calls only count in code-like output, which may come later
+    parser = BlockParser(TOOLS)
+    assert parser.feed('read_file("a.py")\n') == []
+    blocks = parser.feed('USE: list_files(".")\n')
+    assert [b['tool'] for b in blocks] == ['read_file', 'list_files']
+    
+    assert parse_blocks('read_file("a.py")', TOOLS) == []
+    assert parse_blocks('unknown_tool("a.py")\n```', TOOLS) == []
+    print("✅ Natural language and function calls detected")
+
+
+if __name__ == '__main__':
+    print("Testing block parser\n" + "=" * 50)
+    test_single_pass_blocks()
+    test_streaming_emits_early()
+    test_file_block_forms()
+    test_tool_call_context()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
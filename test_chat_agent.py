@@ -1,11 +1,24 @@
 """
 Test Chat Agent
 """
+import json
 import tempfile
 import os
 from database import Database
 from local_llm_client import LocalLLMClient
-from chat_agent import ChatAgent
+from chat_agent import ChatAgent, REPLY_SCHEMA, validate
+
+
+class ScriptedLLM:
+    """Returns canned responses and records the requests it receives."""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+    
+    def send_message(self, prompt, **kwargs):
+        self.requests.append(kwargs)
+        return {'response': self.responses.pop(0), 'metadata': {'success': True}}
 
 
 def test_chat_agent_initialization():
@@ -199,6 +212,61 @@ Should I execute this task for you?"""
             os.remove(temp_db)
 
 
+def test_structured_output():
+    """Test schema-constrained replies are validated and run in one shot."""
+    print("\n=== Test: Structured Output ===")
+    
+    temp_db = tempfile.mktemp(suffix=".db")
+    
+    try:
+        db = Database(temp_db)
+        project_id = db.create_project("demo", "/tmp/demo")
+        reply = {
+            'reply': "I'll set up a planning task.",
+            'actions': [
+                {'action': 'create_task', 'title': 'Plan Pong', 'type': 'planning',
+                 'description': 'Write PLAN.md', 'priority': 1},
+                {'action': 'execute_task', 'task_id': 'first'},
+                {'action': 'list_tasks', 'filter': 'all'}
+            ]
+        }
+        llm = ScriptedLLM([json.dumps(reply), "Sure, CREATE_TASK:\n```json\n"
+                           '{"action": "list_tasks", "filter": "all"}\n```'])
+        agent = ChatAgent(llm, db)
+        
+        prompt = agent.get_system_prompt()
+        assert '"actions"' in prompt and '```json' not in prompt, "Only the JSON object format"
+        prompt = ChatAgent(llm, db, structured_output=False).get_system_prompt()
+        assert '```json' in prompt and '"actions"' not in prompt, "Only the fenced command format"
+        print("✅ System prompt asks for one command format")
+        
+        result = agent.send_message("Make a Pong game", project_id=project_id)
+        assert llm.requests[0]['response_format']['json_schema']['schema'] == REPLY_SCHEMA
+        assert result['metadata']['structured']
+        assert result['response'] == "I'll set up a planning task."
+        created, invalid, listed = result['actions']
+        assert created['success'] and db.get_task(created['task_id'])['project_id'] == project_id
+        assert not invalid['success'] and 'task_id: expected integer' in invalid['error']
+        assert listed['success']
+        print("✅ Valid actions executed, malformed one rejected with a reason")
+        
+        # Servers without response_format support answer in text
+        result = agent.send_message("What tasks do we have?")
+        assert not result['metadata']['structured']
+        assert result['actions'][0]['action'] == 'list_tasks'
+        print("✅ Text replies still parsed")
+        
+        assert validate({'reply': 'hi', 'actions': []}, REPLY_SCHEMA) == []
+        assert validate({'reply': 'hi', 'actions': [{'action': 'list_tasks'}]}, REPLY_SCHEMA)
+        assert validate({'reply': 1, 'actions': [], 'extra': True}, REPLY_SCHEMA) == [
+            '$.reply: expected string', '$.extra: unexpected property']
+        print("✅ Schema validation")
+    
+    finally:
+        if os.path.exists(temp_db):
+            os.remove(temp_db)
+
+
 if __name__ == '__main__':
     print("Testing Chat Agent")
     print("="*60)
@@ -209,6 +277,7 @@ if __name__ == '__main__':
         test_clean_response()
         test_conversation_history()
         test_fallback_parsing()
+        test_structured_output()
         
         print("\n" + "="*60)
         print("✅ All tests passed!")
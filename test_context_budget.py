@@ -0,0 +1,114 @@
+"""
+Test ContextBudgeter history trimming.
+"""
+from context_budget import ContextBudgeter, TOOL_RESULTS_HEADER, estimate_tokens
+
+
+def tool_message(body):
+    return {'role': 'user', 'content': f"\n\n{TOOL_RESULTS_HEADER}\n\n{body}"}
+
+
+def test_within_budget_untouched():
+    """Test that history under budget is sent unchanged."""
+    print("\n=== Test: within budget ===")
+    
+    budgeter = ContextBudgeter(max_context_tokens=1000)
+    history = [
+        {'role': 'assistant', 'content': 'I will read main.py'},
+        {'role': 'user', 'content': 'ok'}
+    ]
+    fitted, report = budgeter.fit(history, system_prompt='sys', prompt='next')
+    
+    assert fitted == history
+    assert report['saved_tokens'] == 0
+    assert report['actions'] == []
+    print("✅ History unchanged")
+
+
+def test_duplicate_prompt_dropped():
+    """Test that a trailing history entry repeated by the prompt is dropped."""
+    print("\n=== Test: duplicate prompt ===")
+    
+    budgeter = ContextBudgeter(max_context_tokens=100000)
+    results = tool_message("📄 main.py\n" + "x = 1\n" * 50)
+    prompt = results['content'] + "\nBased on these results, continue with your task."
+    
+    fitted, report = budgeter.fit([{'role': 'assistant', 'content': 'TOOL: read_file("main.py")'}, results],
+                                  prompt=prompt)
+    
+    assert len(fitted) == 1
+    assert 'dropped_duplicate_prompt' in report['actions']
+    assert report['saved_tokens'] > 0
+    print(f"✅ Saved {report['saved_tokens']} tokens")
+    
+    # Only the executor's repeated tool results, never other turns
+    for last, repeated in (({'role': 'assistant', 'content': 'Continue'}, "Continue please"),
+                           ({'role': 'user', 'content': 'Continue'}, "Continue please"),
+                           (results, "  " + prompt)):
+        fitted, report = budgeter.fit([last], prompt=repeated)
+        assert fitted == [last] and report['actions'] == [], last['content'][:20]
+    print("✅ Other messages the prompt starts with are kept")
+
+
+def test_stale_tool_results_summarized():
+    """Test that old tool results shrink before anything is dropped."""
+    print("\n=== Test: stale tool results ===")
+    
+    budgeter = ContextBudgeter(max_context_tokens=500, stale_tool_result_tokens=20)
+    history = [
+        {'role': 'assistant', 'content': 'TOOL: read_file("a.py")'},
+        tool_message("a.py\n" + "a = 1\n" * 300),
+        {'role': 'assistant', 'content': 'TOOL: read_file("b.py")'},
+        tool_message("b.py\n" + "b = 2\n" * 100),
+        {'role': 'assistant', 'content': 'Now writing files'}
+    ]
+    fitted, report = budgeter.fit(history, prompt='continue')
+    
+    assert len(fitted) == len(history)
+    assert 'tokens trimmed' in fitted[1]['content']
+    assert fitted[3] == history[3], "Most recent tool result should stay intact"
+    assert report['fitted_tokens'] <= report['budget']
+    assert report['saved_tokens'] == report['original_tokens'] - report['fitted_tokens']
+    print(f"✅ Saved {report['saved_tokens']} tokens, kept all messages")
+
+
+def test_oldest_dropped_last_resort():
+    """Test that the oldest messages are dropped when trimming is not enough."""
+    print("\n=== Test: drop oldest ===")
+    
+    budgeter = ContextBudgeter(max_context_tokens=200, max_message_tokens=40)
+    history = [{'role': 'user', 'content': f"message {i} " + "word " * 60} for i in range(6)]
+    fitted, report = budgeter.fit(history, prompt='go')
+    
+    assert fitted, "Latest message should survive"
+    assert fitted[-1]['content'].startswith('message 5')
+    assert 'dropped_message' in report['actions']
+    assert report['fitted_tokens'] <= report['budget']
+    assert history[0]['content'].startswith('message 0'), "Input must not be modified"
+    print(f"✅ Kept {len(fitted)} of {len(history)} messages")
+
+
+def test_custom_tokenizer():
+    """Test that a pluggable tokenizer drives the budget."""
+    print("\n=== Test: custom tokenizer ===")
+    
+    word_count = lambda text: len(text.split())
+    budgeter = ContextBudgeter(max_context_tokens=50, tokenizer=word_count)
+    history = [{'role': 'user', 'content': 'one two three'}]
+    
+    assert budgeter.count_tokens('one two three') == 3
+    assert estimate_tokens('abcdefgh') == 2
+    fitted, report = budgeter.fit(history)
+    assert report['original_tokens'] == 3 + ContextBudgeter.MESSAGE_OVERHEAD
+    print("✅ Custom tokenizer used")
+
+
+if __name__ == '__main__':
+    print("Testing ContextBudgeter\n" + "=" * 50)
+    test_within_budget_untouched()
+    test_duplicate_prompt_dropped()
+    test_stale_tool_results_summarized()
+    test_oldest_dropped_last_resort()
+    test_custom_tokenizer()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
@@ -0,0 +1,151 @@
+"""
+Test the schema migration runner and the indexes it creates.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+import database
+from database import Database
+
+
+def query_plan(db, sql, params=()):
+    with db.get_connection() as conn:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return ' '.join(row['detail'] for row in rows)
+
+
+def test_fresh_database():
+    """Test a new database is migrated to the latest version."""
+    print("\n=== Test: fresh database ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_db_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        latest = database.MIGRATIONS[-1][0]
+        assert db.get_schema_version() == latest
+        assert db.migrate() == [], "Migrations must only apply once"
+        
+        plans = [
+            query_plan(db, "SELECT * FROM conversations WHERE task_id = ? ORDER BY created_at ASC", (1,)),
+            query_plan(db, "SELECT * FROM checkpoints WHERE scheduled_for <= ? ORDER BY scheduled_for ASC",
+                       (datetime.now(),)),
+            query_plan(db, "SELECT * FROM tasks WHERE project_id = ? AND status = ? "
+                           "ORDER BY priority DESC, created_at ASC", (1, 'pending'))
+        ]
+        for plan in plans:
+            assert 'USING INDEX' in plan and 'TEMP B-TREE' not in plan, plan
+        print(f"✅ Schema version {latest}, hot queries use indexes")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_upgrade_existing_database():
+    """Test a database created before migrations existed is upgraded in place."""
+    print("\n=== Test: upgrade existing database ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_db_")
+    db_path = os.path.join(temp_dir, "agent7.db")
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("""CREATE TABLE projects (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL UNIQUE, description TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+        conn.execute("INSERT INTO projects (name) VALUES ('legacy')")
+        conn.execute("""CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        project_id INTEGER, title TEXT NOT NULL, description TEXT,
+                        task_type TEXT NOT NULL, status TEXT DEFAULT 'pending',
+                        priority INTEGER DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        completed_at TIMESTAMP)""")
+        conn.executemany("INSERT INTO tasks (project_id, title, task_type, status) VALUES (1, 'T', ?, ?)",
+                         [('coding', 'pending'), ('coding', 'completed'), ('testing', 'pending')])
+        conn.commit()
+        conn.close()
+        
+        db = Database(db_path)
+        assert db.get_schema_version() == database.MIGRATIONS[-1][0]
+        assert [p['name'] for p in db.list_projects()] == ['legacy']
+        assert db.get_task_stats(1)['by_status'] == {'pending': 2, 'completed': 1}
+        print("✅ Existing data kept, migrations applied, counters backfilled")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_task_stats_counters():
+    """Test trigger-maintained counters follow inserts, updates and deletes."""
+    print("\n=== Test: task stats counters ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_db_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        first = db.create_project("first")
+        second = db.create_project("second")
+        ids = [db.create_task(first, "T", "", task_type) for task_type in ('coding', 'coding', 'testing')]
+        db.create_task(second, "T", "", 'planning')
+        
+        db.update_task_status(ids[0], 'completed')
+        db.update_task_status(ids[0], 'completed')
+        with db.get_connection() as conn:
+            conn.execute("UPDATE tasks SET project_id = ? WHERE id = ?", (second, ids[1]))
+            conn.execute("DELETE FROM tasks WHERE id = ?", (ids[2],))
+            recount = conn.execute(
+                "SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+            zero_rows = conn.execute("SELECT COUNT(*) FROM task_stats WHERE count <= 0").fetchone()[0]
+        
+        stats = db.get_task_stats()
+        assert stats['by_status'] == {row[0]: row[1] for row in recount}
+        assert stats['total'] == 3
+        assert db.get_task_stats(first) == {'total': 1, 'by_status': {'completed': 1}, 'by_type': {'coding': 1}}
+        assert db.get_task_stats(second)['by_type'] == {'coding': 1, 'planning': 1}
+        assert zero_rows == 0
+        print(f"✅ Counters match a full recount: {stats}")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_failed_migration_rolls_back():
+    """Test a failing migration leaves no partial changes behind."""
+    print("\n=== Test: failed migration ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_db_")
+    original = list(database.MIGRATIONS)
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        version = db.get_schema_version()
+        database.MIGRATIONS.append((version + 1, "broken", [
+            "CREATE TABLE half_done (id INTEGER)",
+            "CREATE INDEX idx_missing ON no_such_table(id)"
+        ]))
+        
+        try:
+            db.migrate()
+            assert False, "Expected the migration to fail"
+        except sqlite3.OperationalError:
+            pass
+        
+        assert db.get_schema_version() == version
+        with db.get_connection() as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert 'half_done' not in tables
+        print("✅ Failed migration rolled back")
+        db.close()
+    finally:
+        database.MIGRATIONS[:] = original
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing Database migrations\n" + "=" * 50)
+    test_fresh_database()
+    test_upgrade_existing_database()
+    test_task_stats_counters()
+    test_failed_migration_rolls_back()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
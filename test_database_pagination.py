@@ -0,0 +1,115 @@
+"""
+Test keyset pagination, column projection and task aggregates.
+"""
+import os
+import shutil
+import tempfile
+from database import Database
+
+
+def create_db():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_db_")
+    db = Database(os.path.join(temp_dir, "agent7.db"))
+    project_id = db.create_project("demo")
+    return temp_dir, db, project_id
+
+
+def test_task_pages():
+    """Test paging through tasks returns every task once, in order."""
+    print("\n=== Test: task pages ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        # Equal priorities and timestamps force the id tie-breaker
+        for i in range(23):
+            db.create_task(project_id, f"Task {i}", "", "coding", priority=i % 3)
+        
+        expected = [t['id'] for t in db.list_tasks(project_id)]
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            page = db.list_tasks_page(project_id, limit=5, cursor=cursor, columns=['title'])
+            seen.extend(t['id'] for t in page['items'])
+            pages += 1
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        
+        assert seen == expected, (seen, expected)
+        assert pages == 5
+        assert set(page['items'][0]) == {'title', 'id', 'priority', 'created_at'}
+        print(f"✅ {len(seen)} tasks in {pages} pages")
+        
+        try:
+            db.list_tasks(columns=['title; DROP TABLE tasks'])
+            assert False, "Unknown columns must be rejected"
+        except ValueError:
+            pass
+        try:
+            db.list_tasks(cursor="not-a-cursor")
+            assert False, "Malformed cursors must be rejected"
+        except ValueError:
+            pass
+        print("✅ Bad columns and cursors rejected")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_history_pages():
+    """Test conversation and result pages keep metadata decoding."""
+    print("\n=== Test: history pages ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        task_id = db.create_task(project_id, "Task", "", "coding")
+        for i in range(7):
+            db.save_conversation(task_id, "local_llm", f"prompt {i}", "reply", {'n': i})
+            db.save_result(task_id, "code", f"result {i}")
+        
+        first = db.get_conversations_page(task_id, limit=4)
+        rest = db.get_conversations_page(task_id, limit=4, cursor=first['next_cursor'])
+        assert [c['metadata']['n'] for c in first['items'] + rest['items']] == list(range(7))
+        assert rest['next_cursor'] is None
+        
+        results = db.get_results(task_id, limit=3, columns=['content'])
+        assert [r['content'] for r in results] == ["result 0", "result 1", "result 2"]
+        assert 'metadata' not in results[0]
+        print("✅ Conversations and results paged")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_task_stats():
+    """Test aggregate counts match the task list."""
+    print("\n=== Test: task stats ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        other_id = db.create_project("other")
+        for status, task_type in [('pending', 'coding'), ('pending', 'testing'),
+                                  ('completed', 'coding'), ('failed', 'planning')]:
+            task_id = db.create_task(project_id, "T", "", task_type)
+            db.update_task_status(task_id, status)
+        db.create_task(other_id, "Other", "", "coding")
+        
+        stats = db.get_task_stats()
+        assert stats['total'] == 5
+        assert stats['by_status'] == {'pending': 3, 'completed': 1, 'failed': 1}
+        assert stats['by_type'] == {'coding': 3, 'testing': 1, 'planning': 1}
+        assert db.get_task_stats(project_id)['total'] == 4
+        print(f"✅ {stats}")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing Database pagination\n" + "=" * 50)
+    test_task_pages()
+    test_history_pages()
+    test_task_stats()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
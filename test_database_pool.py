@@ -0,0 +1,128 @@
+"""
+Test the pooled, WAL-mode Database connections.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from database import Database
+
+
+def create_db():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_db_")
+    return temp_dir, Database(os.path.join(temp_dir, "agent7.db"))
+
+
+def test_wal_and_pragmas():
+    """Test WAL mode and per-connection pragmas are applied."""
+    print("\n=== Test: WAL and pragmas ===")
+    
+    temp_dir, db = create_db()
+    try:
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        print("✅ WAL mode with synchronous=NORMAL")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_connections_reused():
+    """Test connections are returned to the pool and shared when nested."""
+    print("\n=== Test: connection reuse ===")
+    
+    temp_dir, db = create_db()
+    try:
+        with db.get_connection() as first:
+            with db.get_connection() as nested:
+                assert nested is first
+        with db.get_connection() as second:
+            assert second is first
+        print("✅ Pooled connection reused")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_nested_rollback():
+    """Test an error rolls back the whole outer transaction."""
+    print("\n=== Test: nested rollback ===")
+    
+    temp_dir, db = create_db()
+    try:
+        try:
+            with db.get_connection():
+                db.create_project("outer")
+                with db.get_connection():
+                    db.create_project("inner")
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        
+        assert db.list_projects() == []
+        db.create_project("kept")
+        assert [p['name'] for p in db.list_projects()] == ["kept"]
+        print("✅ Nested writes rolled back together")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_reader_does_not_block_writer():
+    """Test a long read transaction doesn't stall writes from another thread."""
+    print("\n=== Test: concurrent reader and writer ===")
+    
+    temp_dir, db = create_db()
+    try:
+        project_id = db.create_project("demo")
+        reading = threading.Event()
+        done = threading.Event()
+        
+        def reader():
+            with db.get_connection() as conn:
+                conn.execute("BEGIN")
+                conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+                reading.set()
+                done.wait(5)
+        
+        thread = threading.Thread(target=reader)
+        thread.start()
+        reading.wait(5)
+        
+        start = time.monotonic()
+        db.create_task(project_id, "Write", "while reading", "code")
+        elapsed = time.monotonic() - start
+        done.set()
+        thread.join()
+        
+        assert elapsed < 1.0, f"Writer waited {elapsed:.2f}s"
+        print(f"✅ Write committed in {elapsed * 1000:.1f}ms during a read")
+        
+        def writer(index):
+            for i in range(20):
+                db.create_task(project_id, f"T{index}-{i}", "", "code")
+        
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(db.list_tasks(project_id)) == 161
+        print("✅ 160 writes from 8 threads without lock errors")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing Database connection pool\n" + "=" * 50)
+    test_wal_and_pragmas()
+    test_connections_reused()
+    test_nested_rollback()
+    test_reader_does_not_block_writer()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
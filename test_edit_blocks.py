@@ -0,0 +1,220 @@
+"""
+Test SEARCH/REPLACE and unified-diff edit blocks.
+"""
+import os
+import shutil
+import tempfile
+from edit_blocks import extract_edit_blocks, apply_hunks, looks_like_edit
+from file_operations import FileOperations
+
+
+SOURCE = "\n".join(
+    [f"def f{i}():\n    return {i}\n" for i in range(200)]
+)
+
+
+def test_search_replace_blocks():
+    """Test SEARCH/REPLACE parsing and exact, whitespace and fuzzy matches."""
+    print("\n=== Test: SEARCH/REPLACE ===")
+    
+    output = """I'll fix two functions.
+
+Edit: lib.py
+```python
+<<<<<<< SEARCH
+def f3():
+    return 3
+=======
+def f3():
+    return 33
+>>>>>>> REPLACE
+```
+
+And one more:
+
+lib.py
+<<<<<<< SEARCH
+def f150():
+      return 150
+=======
+def f150():
+    return 1500
+>>>>>>> REPLACE
+"""
+    blocks = extract_edit_blocks(output)
+    assert len(blocks) == 1 and blocks[0]['filepath'] == 'lib.py'
+    assert len(blocks[0]['hunks']) == 2
+    
+    result = apply_hunks(SOURCE, blocks[0]['hunks'])
+    assert result['success'] and result['applied'] == 2
+    assert result['fuzzy'] == 1, "Second hunk only matches ignoring indentation"
+    assert "def f3():\n    return 33\n" in result['content']
+    assert "def f150():\n    return 1500\n" in result['content']
+    assert result['content'].endswith("return 199\n")
+    print("✅ Two hunks applied, one by whitespace-insensitive match")
+    
+    drifted = [{'old': ["    return 41  # answer", "", "def f42():", "    return 42"],
+                'new': ["    return 41  # answer", "", "def f42():", "    return 0"], 'hint': None}]
+    result = apply_hunks(SOURCE, drifted)
+    assert result['success'] and result['fuzzy'] == 1
+    assert "def f42():\n    return 0\n" in result['content']
+    print("✅ Drifted context applied fuzzily")
+    
+    # A bare path above a later block wins over an earlier header
+    mixed = """Edit: a.py
+<<<<<<< SEARCH
+x = 1
+=======
+x = 2
+>>>>>>> REPLACE
+
+b.py
+<<<<<<< SEARCH
+y = 1
+=======
+y = 2
+>>>>>>> REPLACE
+
+<<<<<<< SEARCH
+z = 1
+=======
+z = 2
+>>>>>>> REPLACE
+"""
+    blocks = extract_edit_blocks(mixed)
+    assert [(b['filepath'], len(b['hunks'])) for b in blocks] == [('a.py', 1), ('b.py', 2)], blocks
+    print("✅ Bare path after an Edit: header starts a new file")
+
+
+def test_unified_diff():
+    """Test unified diffs with stale line numbers and new files."""
+    print("\n=== Test: unified diff ===")
+    
+    output = """```diff
+--- a/lib.py
++++ b/lib.py
+@@ -1,2 +1,3 @@
++import os
+ def f0():
+     return 0
+@@ -300,3 +301,3 @@
+ def f100():
+-    return 100
++    return -100
+```
+
+```diff
+--- /dev/null
++++ b/notes.txt
+@@ -0,0 +1,2 @@
++first
++second
+```"""
+    blocks = extract_edit_blocks(output)
+    assert [b['filepath'] for b in blocks] == ['lib.py', 'notes.txt']
+    assert blocks[1]['operation'] == 'create'
+    assert looks_like_edit(output)
+    
+    result = apply_hunks(SOURCE, blocks[0]['hunks'])
+    assert result['success']
+    assert result['content'].startswith("import os\ndef f0():")
+    assert "def f100():\n    return -100\n" in result['content']
+    assert apply_hunks("", blocks[1]['hunks'])['content'] == "first\nsecond\n"
+    print("✅ Hunks located despite wrong line numbers, new file created")
+
+
+def test_conflicts_and_ambiguity():
+    """Test unmatched and ambiguous hunks are reported and nothing changes."""
+    print("\n=== Test: conflicts ===")
+    
+    hunks = [
+        {'old': ["def f1():", "    return 1"], 'new': ["def f1():", "    return 11"], 'hint': None},
+        {'old': ["class Missing:", "    pass"], 'new': ["class Found:", "    pass"], 'hint': None},
+        {'old': ["    return 5"], 'new': ["    return 55"], 'hint': None}
+    ]
+    result = apply_hunks(SOURCE, hunks)
+    assert not result['success'] and result['content'] == SOURCE
+    assert [c['hunk'] for c in result['conflicts']] == [2]
+    
+    ambiguous = [{'old': ["    return 7"], 'new': ["    return 8"], 'hint': None}]
+    result = apply_hunks(SOURCE + "x = 1\n    return 7\n", ambiguous)
+    assert result['conflicts'][0]['reason'].startswith("Matches 2")
+    print("✅ Missing and ambiguous hunks reported")
+    
+    # Near-misses in the lines being changed never rewrite similar lines
+    content = "def add(x):\n    return x + 1\n\nMAX_RETRIES = 3\nTIMEOUT = 30\n"
+    for old, new in ((["    return x + 2"], ["    return x + 3"]),
+                     (["MAX_RETRIES = 5"], ["MAX_RETRIES = 10"]),
+                     (["MAX_RETRIES = 3", "TIMEOUT = 60"], ["MAX_RETRIES = 3", "TIMEOUT = 90"])):
+        result = apply_hunks(content, [{'old': old, 'new': new, 'hint': None}])
+        assert not result['success'] and result['content'] == content, old
+        assert result['conflicts'][0]['closest']['text'], "Closest text is reported"
+    print("✅ Similar but different lines reported as conflicts")
+
+
+def test_parse_and_execute_edits():
+    """Test edits go through FileOperations with dry runs and conflict reports."""
+    print("\n=== Test: FileOperations edits ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_edits_")
+    try:
+        with open(os.path.join(temp_dir, "lib.py"), 'w') as f:
+            f.write(SOURCE)
+        with open(os.path.join(temp_dir, "other.py"), 'w') as f:
+            f.write("a = 1\n")
+        
+        output = """Edit: lib.py
+<<<<<<< SEARCH
+def f7():
+    return 7
+=======
+def f7():
+    return 77
+>>>>>>> REPLACE
+
+Edit: other.py
+<<<<<<< SEARCH
+b = 2
+=======
+b = 3
+>>>>>>> REPLACE
+
+File: new.py
+```python
+print("new")
+```
+"""
+        file_ops = FileOperations()
+        preview = file_ops.parse_and_execute(output, temp_dir, dry_run=True)
+        assert {op['filepath']: op['success'] for op in preview} == {
+            'new.py': True, 'lib.py': True, 'other.py': False
+        }
+        with open(os.path.join(temp_dir, "lib.py")) as f:
+            assert f.read() == SOURCE, "Dry run must not write"
+        
+        operations = file_ops.parse_and_execute(output, temp_dir)
+        by_path = {op['filepath']: op for op in operations}
+        assert by_path['lib.py']['success'] and by_path['lib.py']['operation'] == 'edit'
+        assert not by_path['other.py']['success'] and by_path['other.py']['conflicts']
+        with open(os.path.join(temp_dir, "lib.py")) as f:
+            assert "return 77" in f.read()
+        with open(os.path.join(temp_dir, "other.py")) as f:
+            assert f.read() == "a = 1\n"
+        assert os.path.exists(os.path.join(temp_dir, "new.py"))
+        
+        summary = file_ops.format_operations_summary(operations)
+        assert "edit: 1 hunk(s)" in summary and "could not be applied" in summary
+        print("✅ Valid edits written, conflicting file untouched")
+        print(summary)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing edit blocks\n" + "=" * 50)
+    test_search_replace_blocks()
+    test_unified_diff()
+    test_conflicts_and_ambiguity()
+    test_parse_and_execute_edits()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
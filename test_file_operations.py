@@ -1,6 +1,10 @@
 """
 Test file operations module.
 """
+import os
+import shutil
+import tempfile
+from database import Database
 from file_operations import FileOperations
 
 
@@ -113,11 +117,80 @@ Hello, this is a test file!
     print(f"\n{summary}")
 
 
+def test_write_batch():
+    """Test batched writes are atomic, recorded once and notify listeners."""
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_files_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        task_id = db.create_task(db.create_project("demo"), "T", "", "coding")
+        project_dir = os.path.join(temp_dir, "project")
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, "app.py"), 'w') as f:
+            f.write("old")
+        with open(os.path.join(project_dir, "old.txt"), 'w') as f:
+            f.write("remove me")
+        
+        file_ops = FileOperations(db)
+        changed = []
+        file_ops.add_write_listener(changed.append)
+        
+        batch = file_ops.write_batch(project_dir, task_id)
+        batch.write("app.py", "new", 'modify')
+        batch.write("pkg/util.py", "x = 1")
+        batch.delete("old.txt")
+        
+        # Nothing is visible before commit
+        with open(os.path.join(project_dir, "app.py")) as f:
+            assert f.read() == "old"
+        assert not os.path.exists(os.path.join(project_dir, "pkg", "util.py"))
+        assert changed == []
+        
+        results = batch.commit()
+        assert [r['action'] for r in results] == ['modified', 'created', 'deleted']
+        assert all(r['success'] for r in results)
+        with open(os.path.join(project_dir, "app.py")) as f:
+            assert f.read() == "new"
+        assert not os.path.exists(os.path.join(project_dir, "old.txt"))
+        assert len(changed) == 3
+        
+        leftovers = [name for _, _, files in os.walk(project_dir) for name in files if name.endswith('.tmp')]
+        assert leftovers == [], leftovers
+        
+        recorded = [(m['filepath'], m['action']) for m in db.get_file_modifications(task_id)]
+        assert sorted(recorded) == [("app.py", "modified"), ("old.txt", "deleted"), ("pkg/util.py", "created")]
+        print("✅ Batch committed atomically with one DB transaction")
+        
+        # A failed batch leaves targets and directory untouched
+        try:
+            with file_ops.write_batch(project_dir, task_id) as batch:
+                batch.write("app.py", "half-written")
+                raise RuntimeError("response parsing failed")
+        except RuntimeError:
+            pass
+        with open(os.path.join(project_dir, "app.py")) as f:
+            assert f.read() == "new"
+        assert sorted(os.listdir(project_dir)) == ["app.py", "pkg"]
+        print("✅ Aborted batch discarded its temporary files")
+        
+        result = file_ops.modify_file("app.py", "newer", project_dir, task_id)
+        assert result['success'] and result['backed_up']
+        with open(os.path.join(project_dir, "app.py.bak")) as f:
+            assert f.read() == "new"
+        assert len(db.get_file_modifications(task_id)) == 4, "Backups aren't recorded"
+        print("✅ modify_file wrote backup and new content atomically")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
 if __name__ == '__main__':
     print("Testing File Operations Module\n" + "="*50)
     test_parse_file_blocks()
     print()
     test_dry_run()
+    print()
+    test_write_batch()
     print("\n" + "="*50)
     print("✅ All tests passed!")
 
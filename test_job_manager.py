@@ -0,0 +1,275 @@
+"""
+Test JobManager concurrent execution, cancellation and the durable job queue.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from database import Database
+from local_llm_client import LocalLLMClient
+from job_manager import JobManager
+from lm_studio_executor import LMStudioExecutor
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def create_env(run_job, max_workers=2, **options):
+    temp_dir = tempfile.mkdtemp(prefix="agent7_jobs_")
+    project_dir = os.path.join(temp_dir, "project")
+    os.makedirs(project_dir)
+    db = Database(os.path.join(temp_dir, "agent7.db"))
+    project_id = db.create_project("demo")
+    manager = JobManager(db, LocalLLMClient('http://localhost:1234/v1'), run_job,
+                         max_workers=max_workers, poll_interval=0.05, **options)
+    return temp_dir, project_dir, db, project_id, manager
+
+
+def job_status(db, job_id):
+    return db.get_job(job_id)['status']
+
+
+def test_jobs_run_concurrently():
+    """Test jobs run side by side and share the project's tools."""
+    print("\n=== Test: concurrent jobs ===")
+    
+    executors = []
+    
+    def run_job(job, executor, cancel_event):
+        executors.append(executor)
+        executor.tool_executor._get_pool()
+        time.sleep(0.3)
+    
+    temp_dir, project_dir, db, project_id, manager = create_env(run_job)
+    try:
+        tasks = [db.create_task(project_id, f"T{i}", "", "coding") for i in range(2)]
+        
+        start = time.monotonic()
+        jobs = [manager.submit(task_id, project_dir)['job_id'] for task_id in tasks]
+        assert wait_for(lambda: all(job_status(db, j) == 'completed' for j in jobs))
+        elapsed = time.monotonic() - start
+        
+        assert elapsed < 0.55, f"Jobs ran one after another ({elapsed:.2f}s)"
+        assert executors[0] is not executors[1]
+        assert executors[0].project_tools is executors[1].project_tools
+        assert manager.active_job_ids() == []
+        print(f"✅ 2 x 0.3s jobs finished in {elapsed:.2f}s with shared project tools")
+        
+        # Finished jobs release their tool pools and index listeners
+        assert all(e.tool_executor._pool is None for e in executors)
+        listeners = executors[0].project_tools.index._change_listeners
+        assert not any(getattr(l, '__self__', None) in [e.tool_executor for e in executors]
+                       for l in listeners)
+        print("✅ Executors closed after their jobs")
+    finally:
+        manager.shutdown()
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_duplicate_and_failures():
+    """Test a task can't be queued twice and errors are recorded on the job."""
+    print("\n=== Test: duplicates and failures ===")
+    
+    release = threading.Event()
+    
+    def run_job(job, executor, cancel_event):
+        release.wait(5)
+        raise RuntimeError("model crashed")
+    
+    temp_dir, project_dir, db, project_id, manager = create_env(run_job, max_attempts=1)
+    try:
+        task_id = db.create_task(project_id, "T", "", "coding")
+        first = manager.submit(task_id, project_dir)
+        second = manager.submit(task_id, project_dir)
+        assert first['success'] and not second['success']
+        assert second['job_id'] == first['job_id']
+        
+        release.set()
+        assert wait_for(lambda: job_status(db, first['job_id']) == 'failed')
+        assert db.get_job(first['job_id'])['error'] == "model crashed"
+        assert manager.submit(task_id, project_dir)['success'], "Finished tasks can run again"
+        print("✅ Duplicate rejected, failure recorded")
+    finally:
+        manager.shutdown()
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_cancel_running_and_queued():
+    """Test cancelling a running job and a job still waiting for a worker."""
+    print("\n=== Test: cancellation ===")
+    
+    started = []
+    
+    def run_job(job, executor, cancel_event):
+        started.append(job['id'])
+        cancel_event.wait(5)
+    
+    temp_dir, project_dir, db, project_id, manager = create_env(run_job, max_workers=1)
+    try:
+        running = manager.submit(db.create_task(project_id, "A", "", "coding"), project_dir)['job_id']
+        queued = manager.submit(db.create_task(project_id, "B", "", "coding"), project_dir)['job_id']
+        assert wait_for(lambda: job_status(db, running) == 'running')
+        assert job_status(db, queued) == 'queued'
+        
+        assert manager.cancel(queued)['status'] == 'cancelled'
+        assert manager.cancel(running)['status'] == 'cancelling'
+        assert wait_for(lambda: job_status(db, running) == 'cancelled')
+        time.sleep(0.05)
+        
+        assert started == [running], "Cancelled queued job must never start"
+        assert job_status(db, queued) == 'cancelled'
+        assert not manager.cancel(running)['success']
+        print("✅ Running and queued jobs cancelled")
+    finally:
+        manager.shutdown()
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_executor_honours_cancel_event():
+    """Test LMStudioExecutor stops before contacting the model once cancelled."""
+    print("\n=== Test: executor cancellation ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_jobs_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        executor = LMStudioExecutor(LocalLLMClient('http://localhost:1234/v1'), db, temp_dir)
+        event = threading.Event()
+        event.set()
+        updates = []
+        
+        result = executor.execute_task(1, "Write hello.py", callback=updates.append, cancel_event=event)
+        assert result['status'] == 'CANCELLED' and not result['success']
+        assert updates[-1]['status'] == 'cancelled'
+        print("✅ Executor returned CANCELLED")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_retry_with_backoff():
+    """Test failed attempts are retried after a growing delay."""
+    print("\n=== Test: retries ===")
+    
+    attempts = []
+    
+    def run_job(job, executor, cancel_event):
+        attempts.append((job['attempts'], time.monotonic()))
+        if job['attempts'] < 3:
+            raise RuntimeError(f"attempt {job['attempts']} failed")
+    
+    temp_dir, project_dir, db, project_id, manager = create_env(run_job, retry_delay=0.1)
+    try:
+        job_id = manager.submit(db.create_task(project_id, "T", "", "coding"), project_dir)['job_id']
+        assert wait_for(lambda: job_status(db, job_id) == 'completed')
+        
+        assert [n for n, _ in attempts] == [1, 2, 3]
+        first_gap = attempts[1][1] - attempts[0][1]
+        second_gap = attempts[2][1] - attempts[1][1]
+        assert first_gap >= 0.1 and second_gap >= 0.2, (first_gap, second_gap)
+        assert db.get_job(job_id)['attempts'] == 3
+        print(f"✅ Succeeded on attempt 3 after {first_gap:.2f}s and {second_gap:.2f}s backoff")
+    finally:
+        manager.shutdown()
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_queue_priority_and_atomic_claims():
+    """Test claims follow priority and no job is claimed twice."""
+    print("\n=== Test: queue claims ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_jobs_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        project_id = db.create_project("demo")
+        low = db.create_job(db.create_task(project_id, "Low", "", "coding"), temp_dir, priority=1)
+        high = db.create_job(db.create_task(project_id, "High", "", "coding"), temp_dir, priority=5)
+        later = db.create_job(db.create_task(project_id, "Later", "", "coding"), temp_dir,
+                              priority=9, delay=60)
+        
+        assert db.claim_job("w1", 30)['id'] == high
+        assert db.claim_job("w1", 30)['id'] == low
+        assert db.claim_job("w1", 30) is None, "Delayed jobs are not claimable yet"
+        assert job_status(db, later) == 'queued'
+        print("✅ Higher priority claimed first, delayed job held back")
+        
+        for i in range(40):
+            db.create_job(db.create_task(project_id, f"T{i}", "", "coding"), temp_dir)
+        claimed = []
+        
+        def worker(name):
+            while True:
+                job = db.claim_job(name, 30)
+                if job is None:
+                    return
+                claimed.append(job['id'])
+        
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(claimed) == 40 and len(set(claimed)) == 40
+        print("✅ 4 threads claimed 40 jobs exactly once")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_expired_lease_is_reclaimed():
+    """Test a job whose worker stopped heartbeating is run again."""
+    print("\n=== Test: lease expiry ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_jobs_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        project_id = db.create_project("demo")
+        task_id = db.create_task(project_id, "T", "", "coding")
+        job_id = db.create_job(task_id, temp_dir, max_attempts=2)
+        
+        # A worker claims the job and dies without heartbeating
+        assert db.claim_job("crashed", 0.05)['id'] == job_id
+        db.update_task_status(task_id, 'in_progress')
+        assert db.claim_job("other", 30) is None
+        time.sleep(0.1)
+        
+        job = db.claim_job("other", 30)
+        assert job['id'] == job_id and job['lease_owner'] == "other" and job['attempts'] == 2
+        assert not db.heartbeat_job(job_id, "crashed", 30)['owned']
+        assert not db.finish_job(job_id, "crashed", 'completed'), "Stale workers can't finish"
+        assert db.heartbeat_job(job_id, "other", 0.05)['owned']
+        print("✅ Expired lease reclaimed by another worker")
+        
+        # Expiring on the last attempt fails the job
+        time.sleep(0.1)
+        assert db.claim_job("third", 30) is None
+        assert job_status(db, job_id) == 'failed'
+        assert db.get_task(task_id)['status'] == 'failed', "Task isn't left in progress"
+        print("✅ Job and task failed after the last attempt expired")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing JobManager\n" + "=" * 50)
+    test_jobs_run_concurrently()
+    test_duplicate_and_failures()
+    test_cancel_running_and_queued()
+    test_executor_honours_cancel_event()
+    test_retry_with_backoff()
+    test_queue_priority_and_atomic_claims()
+    test_expired_lease_is_reclaimed()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
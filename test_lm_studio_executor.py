@@ -7,6 +7,7 @@ import shutil
 from database import Database
 from local_llm_client import LocalLLMClient
 from lm_studio_executor import LMStudioExecutor
+from context_budget import ContextBudgeter
 
 
 def test_basic_execution():
@@ -135,6 +136,61 @@ def test_conversation_history():
             os.remove(temp_db)
 
 
+def test_unchanged_notice_needs_its_result():
+    """Test "unchanged" notices fall back to the full result once it's trimmed."""
+    print("\n=== Test: Unchanged notices ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_test_")
+    temp_db = tempfile.mktemp(suffix=".db")
+    
+    try:
+        with open(os.path.join(temp_dir, "README.md"), 'w') as f:
+            f.write("# Project\n" + "Some documentation line.\n" * 100)
+        with open(os.path.join(temp_dir, "main.py"), 'w') as f:
+            f.write("print('hi')\n")
+        
+        def run_turn(executor, call):
+            executor.conversation_history.append({'role': 'assistant', 'content': call})
+            result = executor.tool_executor.parse_and_execute(call)[0]
+            formatted = executor.tool_executor.format_tool_result(result)
+            output = "\n\n=== Tool Results ===\n\n" + formatted + "\n\n"
+            executor.conversation_history.append({'role': 'user', 'content': output})
+            return result, formatted, output
+        
+        for max_context_tokens, expanded in ((16384, False), (1200, True)):
+            executor = LMStudioExecutor(
+                LocalLLMClient('http://localhost:1234/v1'), Database(temp_db), temp_dir,
+                context_budget=ContextBudgeter(max_context_tokens=max_context_tokens)
+            )
+            executor.tool_executor.reset_memo()
+            
+            executor.tool_executor.set_iteration(1)
+            _, full, _ = run_turn(executor, 'TOOL: read_file(filepath="README.md")')
+            executor.tool_executor.set_iteration(2)
+            run_turn(executor, 'TOOL: read_file(filepath="main.py")')
+            executor.tool_executor.set_iteration(3)
+            repeat, notice, output = run_turn(executor, 'TOOL: read_file(filepath="README.md")')
+            assert repeat['unchanged_since'] == 1
+            
+            prompt, history = executor._fit_with_references(
+                "system", output + "Continue.", 512, [(notice, full)]
+            )
+            if expanded:
+                # The README result was shrunk as a stale tool result
+                assert full in prompt and notice not in prompt
+                assert full in executor.conversation_history[-1]['content']
+            else:
+                assert notice in prompt and any(full in m['content'] for m in history)
+            executor.close()
+        
+        print("✅ Notices kept while their result is in history, expanded otherwise")
+        
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        if os.path.exists(temp_db):
+            os.remove(temp_db)
+
+
 if __name__ == '__main__':
     print("Testing LM Studio Executor")
     print("="*50)
@@ -144,6 +200,7 @@ if __name__ == '__main__':
     print()
     
     try:
+        test_unchanged_notice_needs_its_result()
         test_conversation_history()
         test_basic_execution()
         
@@ -0,0 +1,339 @@
+"""
+Test LocalLLMClient against a fake LM Studio server (no LM Studio needed).
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from local_llm_client import LocalLLMClient
+
+
+class FakeLMStudioHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible endpoint that echoes the last user message."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.endswith('/models'):
+            self._send_json(200, {'data': [{'id': 'fake-model'}]})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.requests_seen.append(payload)
+
+        prompt = payload['messages'][-1]['content']
+        reply = f"echo: {prompt}"
+        
+        if prompt.startswith('busy'):
+            self._send_json(503, {'error': 'model is loading'})
+            return
+        
+        if payload.get('response_format') and prompt.startswith('legacy'):
+            self._send_json(400, {'error': "'response_format' is not supported"})
+            return
+        
+        if payload.get('tools'):
+            if prompt.startswith('legacy'):
+                self._send_json(400, {'error': 'tools are not supported'})
+                return
+            if prompt.startswith('call'):
+                self._send_tool_call(payload)
+                return
+        
+        if prompt.startswith('slow'):
+            # Track how many slow requests overlap to test concurrency limits
+            with self.server.lock:
+                self.server.in_flight += 1
+                self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+            time.sleep(0.3)
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+        if not payload.get('stream'):
+            self._send_json(200, {
+                'model': 'fake-model',
+                'choices': [{'message': {'role': 'assistant', 'content': reply},
+                             'finish_reason': 'stop'}],
+                'usage': {'completion_tokens': len(reply.split())}
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        for word in reply.split(' '):
+            chunk = {'model': 'fake-model',
+                     'choices': [{'delta': {'content': word + ' '}, 'finish_reason': None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        done = {'model': 'fake-model', 'choices': [{'delta': {}, 'finish_reason': 'stop'}]}
+        self.wfile.write(f"data: {json.dumps(done)}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+    def _send_tool_call(self, payload):
+        """Reply with a read_file tool call, split into fragments when streaming."""
+        arguments = json.dumps({'filepath': 'src/main.py', 'start_line': 1})
+        if not payload.get('stream'):
+            call = {'id': 'call_1', 'type': 'function',
+                    'function': {'name': 'read_file', 'arguments': arguments}}
+            self._send_json(200, {
+                'model': 'fake-model',
+                'choices': [{'message': {'role': 'assistant', 'content': None, 'tool_calls': [call]},
+                             'finish_reason': 'tool_calls'}]
+            })
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        fragments = [{'index': 0, 'id': 'call_1', 'function': {'name': 'read_file', 'arguments': ''}}]
+        fragments += [{'index': 0, 'function': {'arguments': arguments[i:i + 10]}}
+                      for i in range(0, len(arguments), 10)]
+        for fragment in fragments:
+            chunk = {'choices': [{'delta': {'tool_calls': [fragment]}, 'finish_reason': None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_fake_server():
+    """Start a fake LM Studio server on a free port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLMStudioHandler)
+    server.requests_seen = []
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_send_message():
+    """Test a regular (non-streaming) completion."""
+    print("\n=== Test: send_message ===")
+
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url)
+        result = client.send_message("hello there", system_prompt="be brief")
+
+        assert result['metadata']['success'], result
+        assert result['response'] == "echo: hello there"
+        assert server.requests_seen[-1]['stream'] is False
+        assert server.requests_seen[-1]['messages'][0]['role'] == 'system'
+        print("✅ Non-streaming completion works")
+    finally:
+        server.shutdown()
+
+
+def test_streaming_callback():
+    """Test that stream_callback receives deltas as they arrive."""
+    print("\n=== Test: streaming callback ===")
+
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url)
+        deltas = []
+        result = client.send_message("one two three", stream_callback=deltas.append)
+
+        assert result['metadata']['success'], result
+        assert result['metadata']['streamed']
+        assert result['metadata']['finish_reason'] == 'stop'
+        assert len(deltas) == 4, f"Expected 4 deltas, got {deltas}"
+        assert ''.join(deltas) == result['response']
+        assert result['response'].strip() == "echo: one two three"
+        print(f"✅ Received {len(deltas)} deltas")
+    finally:
+        server.shutdown()
+
+
+def test_streaming_abort():
+    """Test that returning False from the callback stops the generation."""
+    print("\n=== Test: streaming abort ===")
+
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url)
+        deltas = []
+
+        def stop_after_two(delta):
+            deltas.append(delta)
+            return len(deltas) < 2
+
+        result = client.send_message("a b c d e f", stream_callback=stop_after_two)
+
+        assert result['metadata']['finish_reason'] == 'aborted'
+        assert len(deltas) == 2
+        assert result['response'] == ''.join(deltas)
+        print("✅ Generation aborted after 2 deltas")
+    finally:
+        server.shutdown()
+
+
+def test_check_availability():
+    """Test availability check against the fake server."""
+    print("\n=== Test: check_availability ===")
+
+    server, base_url = start_fake_server()
+    try:
+        assert LocalLLMClient(base_url).check_availability()
+        print("✅ Fake server reported as available")
+    finally:
+        server.shutdown()
+
+    assert not LocalLLMClient("http://127.0.0.1:9/v1").check_availability()
+    print("✅ Closed port reported as unavailable")
+
+
+def test_connection_reuse():
+    """Test that repeated requests share one pooled keep-alive connection."""
+    print("\n=== Test: connection reuse ===")
+    
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url, pool_size=2)
+        for i in range(5):
+            assert client.send_message(f"ping {i}")['metadata']['success']
+        assert client.check_availability()
+        
+        stats = client.get_connection_stats()
+        print(f"   Stats: {stats}")
+        assert stats['requests'] == 6
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 5
+        print("✅ One connection served all requests")
+        
+        client.close()
+    finally:
+        server.shutdown()
+
+
+def test_keep_alive_disabled():
+    """Test that keep_alive=False opens a connection per request."""
+    print("\n=== Test: keep-alive disabled ===")
+    
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url, keep_alive=False)
+        for i in range(3):
+            assert client.send_message(f"ping {i}")['metadata']['success']
+        
+        stats = client.get_connection_stats()
+        assert stats['connections_opened'] == 3
+        assert stats['connections_reused'] == 0
+        print("✅ Each request used its own connection")
+    finally:
+        server.shutdown()
+
+
+def test_native_tool_calls():
+    """Test tool definitions are sent and tool_calls parsed, streamed or not."""
+    print("\n=== Test: native tool calls ===")
+    
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url)
+        tools = [{'type': 'function', 'function': {'name': 'read_file', 'parameters': {'type': 'object'}}}]
+        expected = [{'id': 'call_1', 'name': 'read_file',
+                     'arguments': {'filepath': 'src/main.py', 'start_line': 1}}]
+        
+        result = client.send_message("call a tool", tools=tools)
+        assert result['metadata']['success'], result
+        assert server.requests_seen[-1]['tools'] == tools
+        assert result['tool_calls'] == expected and result['response'] == ''
+        
+        result = client.send_message("call a tool", tools=tools, stream_callback=lambda delta: None)
+        assert result['tool_calls'] == expected, "Streamed fragments are joined"
+        
+        result = client.send_message("plain answer", tools=tools)
+        assert 'tool_calls' not in result and result['response'] == "echo: plain answer"
+        print("✅ Tool calls parsed from both response modes")
+    finally:
+        server.shutdown()
+
+
+def test_tools_fallback():
+    """Test a server rejecting tools gets the request again without them."""
+    print("\n=== Test: tools fallback ===")
+    
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url)
+        tools = [{'type': 'function', 'function': {'name': 'read_file', 'parameters': {'type': 'object'}}}]
+        
+        result = client.send_message("legacy model", tools=tools)
+        assert result['metadata']['success'] and result['response'] == "echo: legacy model"
+        assert 'tools' in server.requests_seen[-2] and 'tools' not in server.requests_seen[-1]
+        assert not client.tools_supported
+        
+        client.send_message("call again", tools=tools)
+        assert 'tools' not in server.requests_seen[-1], "Unsupported tools are not sent again"
+        print("✅ Retried without tools and remembered")
+        
+        # Other failures say nothing about tool support
+        client = LocalLLMClient(base_url)
+        seen = len(server.requests_seen)
+        result = client.send_message("busy server", tools=tools)
+        assert not result['metadata']['success'] and client.tools_supported
+        assert len(server.requests_seen) == seen + 1, "No retry without tools"
+        print("✅ Unrelated errors keep tools enabled")
+    finally:
+        server.shutdown()
+
+
+def test_response_format_fallback():
+    """Test structured output is only dropped when the server rejects it."""
+    print("\n=== Test: response_format fallback ===")
+    
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url)
+        response_format = {'type': 'json_schema', 'json_schema': {'name': 'reply', 'schema': {'type': 'object'}}}
+        
+        result = client.send_message("busy server", response_format=response_format)
+        assert not result['metadata']['success'] and client.response_format_supported
+        
+        result = client.send_message("legacy model", response_format=response_format)
+        assert result['metadata']['success'] and result['response'] == "echo: legacy model"
+        assert 'response_format' not in server.requests_seen[-1]
+        assert not client.response_format_supported
+        print("✅ Rejected response_format retried without it and remembered")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    print("Testing LocalLLMClient\n" + "=" * 50)
+    test_send_message()
+    test_streaming_callback()
+    test_streaming_abort()
+    test_check_availability()
+    test_connection_reuse()
+    test_keep_alive_disabled()
+    test_native_tool_calls()
+    test_tools_fallback()
+    test_response_format_fallback()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
@@ -0,0 +1,105 @@
+"""
+Test the incremental project file index.
+"""
+import os
+import shutil
+import tempfile
+from project_index import ProjectIndex
+from project_tools import ProjectTools
+from file_operations import FileOperations
+
+
+def create_project():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_index_")
+    os.makedirs(os.path.join(temp_dir, "src", "pkg"))
+    os.makedirs(os.path.join(temp_dir, "node_modules", "dep"))
+    for rel_path, content in [
+        ("main.py", "def main():\n    pass\n"),
+        ("src/app.js", "console.log('hi')\n"),
+        ("src/pkg/util.py", "class Util:\n    pass\n"),
+        ("node_modules/dep/index.js", "module.exports = {}\n")
+    ]:
+        with open(os.path.join(temp_dir, rel_path), "w") as f:
+            f.write(content)
+    return temp_dir
+
+
+def test_initial_scan():
+    """Test the first scan honours ignore patterns and buckets extensions."""
+    print("\n=== Test: initial scan ===")
+    
+    temp_dir = create_project()
+    try:
+        index = ProjectIndex(temp_dir, ['node_modules'])
+        paths = [entry['path'] for entry in index.iter_files()]
+        
+        assert paths == sorted(['main.py', os.path.join('src', 'app.js'), os.path.join('src', 'pkg', 'util.py')])
+        assert [e['name'] for e in index.iter_files(['.py'])] == ['main.py', 'util.py']
+        assert not index.has_dir('node_modules')
+        assert index.get_file('main.py')['size'] == len("def main():\n    pass\n")
+        print(f"✅ Indexed {index.get_stats()}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_incremental_refresh():
+    """Test that created, deleted and moved files are picked up."""
+    print("\n=== Test: incremental refresh ===")
+    
+    temp_dir = create_project()
+    try:
+        index = ProjectIndex(temp_dir, ['node_modules'], refresh_interval=0)
+        assert index.get_stats()['files'] == 0
+        index.refresh()
+        
+        os.makedirs(os.path.join(temp_dir, "src", "new"))
+        with open(os.path.join(temp_dir, "src", "new", "extra.py"), "w") as f:
+            f.write("x = 1\n")
+        os.remove(os.path.join(temp_dir, "main.py"))
+        shutil.rmtree(os.path.join(temp_dir, "src", "pkg"))
+        
+        paths = [entry['path'] for entry in index.iter_files()]
+        assert paths == [os.path.join('src', 'app.js'), os.path.join('src', 'new', 'extra.py')], paths
+        assert not index.has_dir(os.path.join('src', 'pkg'))
+        print("✅ Changes detected from directory mtimes")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_write_listener():
+    """Test that FileOperations pushes writes into the index."""
+    print("\n=== Test: write listener ===")
+    
+    temp_dir = create_project()
+    try:
+        # Long refresh interval: only the listener can update the index
+        tools = ProjectTools(temp_dir)
+        tools.index.refresh_interval = 3600
+        file_ops = FileOperations()
+        file_ops.add_write_listener(tools.notify_file_changed)
+        
+        assert tools.find_files("main.py")['total'] == 1
+        
+        file_ops.create_file("lib/helpers.py", "def helper():\n    return 1\n", temp_dir)
+        file_ops.modify_file("main.py", "def main():\n    return 42\n", temp_dir)
+        
+        found = tools.find_definitions("helper")
+        assert found['total'] == 1 and found['matches'][0]['file'] == os.path.join('lib', 'helpers.py')
+        assert tools.index.get_file('main.py')['size'] == len("def main():\n    return 42\n")
+        assert tools.find_files("*.bak")['total'] == 1
+        
+        file_ops.delete_file("main.py", temp_dir)
+        assert tools.index.get_file('main.py') is None
+        assert [m['name'] for m in tools.find_files("main.*")['matches']] == ['main.py.bak']
+        print("✅ Index updated from write notifications")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing ProjectIndex\n" + "=" * 50)
+    test_initial_scan()
+    test_incremental_refresh()
+    test_write_listener()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
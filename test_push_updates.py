@@ -0,0 +1,119 @@
+"""
+Test the availability monitor and the dashboard's pushed updates.
+"""
+import os
+import shutil
+import tempfile
+import time
+from availability_monitor import AvailabilityMonitor
+from database import Database
+import web_server
+
+
+def test_monitor_caches_and_reports_changes():
+    """Test the monitor checks in the background and calls back on change only."""
+    print("\n=== Test: availability monitor ===")
+    
+    calls = []
+    changes = []
+    responses = iter([True, True, False, False])
+    
+    def check():
+        calls.append(time.monotonic())
+        return next(responses, False)
+    
+    monitor = AvailabilityMonitor(check, interval=0.05, on_change=changes.append)
+    monitor.start()
+    try:
+        deadline = time.monotonic() + 2
+        while len(calls) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        monitor.stop()
+    
+    assert changes == [True, False], changes
+    checked = len(calls)
+    for _ in range(10):
+        assert monitor.available is False
+    assert len(calls) == checked, "Reading availability must not re-check"
+    print(f"✅ {checked} checks, changes pushed: {changes}")
+    
+    def broken():
+        raise ConnectionError("refused")
+    
+    assert AvailabilityMonitor(broken).available is False
+    print("✅ Failing checks count as unavailable")
+
+
+def test_socket_snapshot_and_pushes():
+    """Test a client gets a snapshot on connect and stats pushes after writes."""
+    print("\n=== Test: socket pushes ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_web_")
+    saved = dict(web_server.state)
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        web_server.state['db'] = db
+        web_server.state['llm_monitor'] = AvailabilityMonitor(lambda: True)
+        web_server.state['current_project_id'] = db.create_project("demo")
+        
+        client = web_server.socketio.test_client(web_server.app)
+        received = {event['name']: event['args'][0] for event in client.get_received()}
+        assert received['status_update']['local_llm_available'] is True
+        assert received['stats_update']['total_tasks'] == 0
+        
+        http = web_server.app.test_client()
+        http.post('/api/tasks', json={'title': 'T', 'description': 'D', 'task_type': 'coding'})
+        pushed = [event for event in client.get_received() if event['name'] == 'stats_update']
+        assert pushed and pushed[-1]['args'][0]['pending'] == 1
+        
+        assert http.get('/api/status').get_json()['total_tasks'] == 1
+        client.disconnect()
+        print("✅ Snapshot on connect, stats pushed after task creation")
+        db.close()
+    finally:
+        web_server.state.clear()
+        web_server.state.update(saved)
+        shutil.rmtree(temp_dir)
+
+
+def test_late_join_replays_output():
+    """Test a client joining a running task's room gets the output it missed."""
+    print("\n=== Test: output replay ===")
+    
+    saved = dict(web_server.state)
+    try:
+        web_server.state['db'] = None
+        client = web_server.socketio.test_client(web_server.app)
+        client.get_received()
+        
+        web_server.emit_task_output(7, "🚀 Starting task\n")
+        web_server.emit_task_output(7, "def ", stream=True)
+        for _ in range(web_server.OUTPUT_REPLAY_EVENTS):
+            web_server.emit_task_output(7, "x", stream=True)
+        assert client.get_received() == [], "Not in the room yet"
+        
+        client.emit('join_task', {'task_id': 7})
+        replayed = [event['args'][0]['data'] for event in client.get_received()]
+        streamed = "def " + "x" * web_server.OUTPUT_REPLAY_EVENTS
+        assert replayed == ["🚀 Starting task\n", streamed], "Deltas merged, start kept"
+        
+        web_server.emit_task_output(7, "main")
+        client.emit('join_task', {'task_id': 7})
+        live = [event['args'][0]['data'] for event in client.get_received()]
+        assert live == ["main"], "Joining again doesn't replay twice"
+        client.disconnect()
+        print("✅ Early output replayed once on join")
+    finally:
+        web_server.output_replay.pop(7, None)
+        web_server.state.clear()
+        web_server.state.update(saved)
+
+
+if __name__ == '__main__':
+    print("Testing push updates\n" + "=" * 50)
+    test_monitor_caches_and_reports_changes()
+    test_socket_snapshot_and_pushes()
+    test_late_join_replays_output()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
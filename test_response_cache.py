@@ -0,0 +1,118 @@
+"""
+Test the LLM response cache.
+"""
+import os
+import tempfile
+import time
+from response_cache import ResponseCache
+from local_llm_client import LocalLLMClient
+from test_local_llm_client import start_fake_server
+
+
+def test_key_is_content_addressed():
+    """Test that keys depend on every request field."""
+    print("\n=== Test: cache keys ===")
+    
+    messages = [{'role': 'user', 'content': 'hi'}]
+    key = ResponseCache.make_key('m', messages, 0.2, 100)
+    
+    assert key == ResponseCache.make_key('m', [dict(messages[0])], 0.2, 100)
+    assert key != ResponseCache.make_key('other', messages, 0.2, 100)
+    assert key != ResponseCache.make_key('m', messages, 0.3, 100)
+    assert key != ResponseCache.make_key('m', messages, 0.2, 200)
+    assert key != ResponseCache.make_key('m', [{'role': 'user', 'content': 'hey'}], 0.2, 100)
+    print("✅ Keys change with model, messages, temperature and max_tokens")
+
+
+def test_memory_lru_eviction():
+    """Test in-memory LRU eviction."""
+    print("\n=== Test: LRU eviction ===")
+    
+    cache = ResponseCache(db_path=None, max_memory_entries=2)
+    cache.set('a', {'response': 'A', 'metadata': {}})
+    cache.set('b', {'response': 'B', 'metadata': {}})
+    assert cache.get('a')['response'] == 'A'  # 'a' is now most recent
+    cache.set('c', {'response': 'C', 'metadata': {}})
+    
+    assert cache.get('b') is None, "Least recently used entry should be evicted"
+    assert cache.get('a')['response'] == 'A'
+    assert cache.get('c')['response'] == 'C'
+    
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['memory_hits'] == 3
+    assert stats['misses'] == 1
+    print(f"✅ LRU eviction works ({stats})")
+
+
+def test_persistent_tier_and_ttl():
+    """Test the SQLite tier survives a new instance and honours TTL."""
+    print("\n=== Test: persistent tier ===")
+    
+    db_path = tempfile.mktemp(suffix=".db")
+    try:
+        cache = ResponseCache(db_path, ttl_seconds=60)
+        cache.set('k', {'response': 'stored', 'metadata': {'success': True}})
+        
+        fresh = ResponseCache(db_path, ttl_seconds=60)
+        assert fresh.get('k')['response'] == 'stored'
+        assert fresh.get_stats()['disk_hits'] == 1
+        assert fresh.get('k')['response'] == 'stored'
+        assert fresh.get_stats()['memory_hits'] == 1
+        print("✅ Disk hit promoted to memory")
+        
+        expired = ResponseCache(db_path, ttl_seconds=0.01)
+        time.sleep(0.05)
+        assert expired.get('k') is None
+        assert expired.get_stats()['expired'] == 1
+        print("✅ Expired entries are dropped")
+        
+        small = ResponseCache(db_path, max_disk_entries=2)
+        for i in range(5):
+            small.set(f"key{i}", {'response': str(i), 'metadata': {}})
+        reopened = ResponseCache(db_path)
+        assert reopened.get('key0') is None
+        assert reopened.get('key4')['response'] == '4'
+        print("✅ Disk tier trimmed to max_disk_entries")
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+def test_client_uses_cache_when_opted_in():
+    """Test that only use_cache=True calls are served from the cache."""
+    print("\n=== Test: client cache opt-in ===")
+    
+    server, base_url = start_fake_server()
+    try:
+        client = LocalLLMClient(base_url, cache=ResponseCache(db_path=None))
+        
+        first = client.send_message("validate", temperature=0.2, use_cache=True)
+        second = client.send_message("validate", temperature=0.2, use_cache=True)
+        assert first['response'] == second['response']
+        assert second['metadata'].get('cached')
+        assert len(server.requests_seen) == 1, "Second call should be a cache hit"
+        
+        client.send_message("validate", temperature=0.2)
+        assert len(server.requests_seen) == 2, "Calls without use_cache bypass the cache"
+        
+        client.send_message("validate", temperature=0.1, use_cache=True)
+        assert len(server.requests_seen) == 3, "Different temperature is a different key"
+        
+        client.send_message("validate", temperature=0.5, use_cache=True)
+        client.send_message("validate", temperature=0.5, use_cache=True)
+        assert len(server.requests_seen) == 5, "Sampled calls are never cached"
+        
+        print(f"✅ Cache stats: {client.cache.get_stats()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    print("Testing ResponseCache\n" + "=" * 50)
+    test_key_is_content_addressed()
+    test_memory_lru_eviction()
+    test_persistent_tier_and_ttl()
+    test_client_uses_cache_when_opted_in()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
@@ -0,0 +1,160 @@
+"""
+Test the heap-based checkpoint scheduler.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from database import Database
+from scheduler_core import CheckpointScheduler
+from session_manager import SessionManager
+
+
+def save(db, task_id, delay):
+    return db.save_checkpoint(task_id, "conv", "/tmp", "continue",
+                              datetime.now() + timedelta(seconds=delay), {'n': task_id})
+
+
+def test_fires_on_time_and_wakes_for_new_checkpoints():
+    """Test checkpoints fire at their time, including ones added while idle."""
+    print("\n=== Test: precise firing ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_sched_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        fired = []
+        done = threading.Event()
+        
+        def on_due(checkpoint):
+            fired.append((checkpoint['task_id'], time.time(), checkpoint['checkpoint_data']))
+            if len(fired) == 3:
+                done.set()
+        
+        late = save(db, 2, 0.4)
+        scheduler = CheckpointScheduler(db, on_due, resync_interval=3600, log=lambda msg: None)
+        scheduler.start()
+        try:
+            time.sleep(0.05)
+            # Saved while the scheduler sleeps until the 0.4s checkpoint
+            due = datetime.now() + timedelta(seconds=0.15)
+            db.save_checkpoint(1, "conv", "/tmp", "continue", due, {'n': 1})
+            cancelled = save(db, 9, 0.25)
+            db.delete_checkpoint(cancelled)
+            save(db, 3, 0.5)
+            
+            assert done.wait(3), fired
+        finally:
+            scheduler.stop()
+        
+        assert [task_id for task_id, _, _ in fired] == [1, 2, 3]
+        lateness = fired[0][1] - due.timestamp()
+        assert 0 <= lateness < 0.1, f"Fired {lateness:.3f}s late"
+        assert fired[0][2] == {'n': 1}
+        assert db.get_checkpoint(late) is None, "Fired checkpoints are deleted"
+        assert scheduler.pending_count() == 0
+        print(f"✅ Fired in order, {lateness * 1000:.0f}ms after the deadline")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_resync_sees_other_processes_and_stop_is_prompt():
+    """Test checkpoints saved elsewhere are picked up on resync."""
+    print("\n=== Test: resync ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_sched_")
+    try:
+        path = os.path.join(temp_dir, "agent7.db")
+        db = Database(path)
+        other = Database(path)
+        fired = threading.Event()
+        
+        scheduler = CheckpointScheduler(db, lambda checkpoint: fired.set(),
+                                        resync_interval=0.2, log=lambda msg: None)
+        scheduler.start()
+        try:
+            save(other, 1, 0)
+            assert fired.wait(2), "Resync must find checkpoints from other connections"
+        finally:
+            start = time.monotonic()
+            scheduler.stop()
+            assert time.monotonic() - start < 0.5, "stop() must wake the scheduler"
+        print("✅ Other process' checkpoint fired after resync")
+        other.close()
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_notify_during_resync_is_kept():
+    """Test a checkpoint notified while the table is being read isn't lost."""
+    print("\n=== Test: resync race ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_sched_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        scheduler = CheckpointScheduler(db, lambda checkpoint: None, log=lambda msg: None)
+        read_schedule = db.get_checkpoint_schedule
+        
+        def racing_read():
+            schedule = read_schedule()
+            # Saved after the read, before the heap is replaced
+            save(db, 2, 60)
+            return schedule
+        
+        db.add_checkpoint_listener(scheduler.notify)
+        save(db, 1, 60)
+        db.get_checkpoint_schedule = racing_read
+        scheduler.resync()
+        assert scheduler.pending_count() == 2, "Notified checkpoint survives the resync"
+        
+        db.get_checkpoint_schedule = read_schedule
+        scheduler.resync()
+        assert scheduler.pending_count() == 2
+        print("✅ Notify during resync merged into the schedule")
+        db.remove_checkpoint_listener(scheduler.notify)
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_session_manager_uses_scheduler():
+    """Test SessionManager.run_scheduler resumes tasks through its callback."""
+    print("\n=== Test: session manager ===")
+    
+    temp_dir = tempfile.mkdtemp(prefix="agent7_sched_")
+    try:
+        db = Database(os.path.join(temp_dir, "agent7.db"))
+        manager = SessionManager(db)
+        resumed = []
+        manager.set_resume_callback(lambda checkpoint: resumed.append(checkpoint['task_id']))
+        
+        thread = threading.Thread(target=manager.run_scheduler, args=(3600,), daemon=True)
+        thread.start()
+        time.sleep(0.05)
+        save(db, 7, 0.05)
+        
+        deadline = time.monotonic() + 2
+        while not resumed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        manager.stop_scheduler()
+        thread.join(2)
+        
+        assert resumed == [7] and not thread.is_alive()
+        assert manager.get_pending_checkpoints() == []
+        print("✅ Task resumed and scheduler stopped")
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing scheduler core\n" + "=" * 50)
+    test_fires_on_time_and_wakes_for_new_checkpoints()
+    test_resync_sees_other_processes_and_stop_is_prompt()
+    test_notify_during_resync_is_kept()
+    test_session_manager_uses_scheduler()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
@@ -0,0 +1,151 @@
+"""
+Test the trigram search index behind search_in_files.
+"""
+import os
+import re
+import shutil
+import tempfile
+from search_index import required_literals
+from project_tools import ProjectTools
+from file_operations import FileOperations
+
+
+def create_project():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_search_")
+    os.makedirs(os.path.join(temp_dir, "src"))
+    files = {
+        "src/game.py": "class Game:\n    def update_score(self):\n        self.score += 1\n",
+        "src/paddle.py": "class Paddle:\n    def move(self):\n        pass\n",
+        "src/score.py": "def update_score(game):\n    return game.score\n\ndef reset_score(game):\n    game.score = 0\n",
+        "notes.txt": "Remember to update_score after every hit\r\n",
+        "data.bin": "\0\0binary update_score\0"
+    }
+    for rel_path, content in files.items():
+        with open(os.path.join(temp_dir, rel_path), "w", newline='') as f:
+            f.write(content)
+    return temp_dir
+
+
+def brute_force(temp_dir, pattern, flags):
+    """Reference search that scans every file."""
+    regex = re.compile(pattern, flags)
+    found = set()
+    for root, _, files in os.walk(temp_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                for line_num, line in enumerate(f, 1):
+                    if regex.search(line):
+                        found.add((os.path.relpath(path, temp_dir), line_num))
+    return found
+
+
+def test_required_literals():
+    """Test literal extraction from regex patterns."""
+    print("\n=== Test: required literals ===")
+    
+    assert required_literals("def main") == ["def main"]
+    assert required_literals(r"class\s+Game") == ["class", "Game"]
+    assert required_literals(r"(foo)+bar") == ["foo", "bar"]
+    assert required_literals(r"foo|bar") == []
+    assert required_literals(r"x?y*") == []
+    assert required_literals("[unclosed") == []
+    print("✅ Literals extracted")
+
+
+def test_candidates_narrowed():
+    """Test that only files containing the literal are candidates."""
+    print("\n=== Test: candidate narrowing ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        candidates = tools.search_index.candidates("reset_score", re.IGNORECASE)
+        
+        assert candidates == {os.path.join('src', 'score.py'), 'data.bin'}, candidates
+        assert tools.search_index.candidates(r"\w+", 0) is None
+        print(f"✅ Candidates: {sorted(candidates)}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_matches_brute_force():
+    """Test indexed search returns the same matches as a full scan."""
+    print("\n=== Test: same results as full scan ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        for pattern, case_sensitive in [
+            ("update_score", False),
+            (r"score\s*\+= 1$", True),
+            ("GAME", False),
+            ("GAME", True),
+            (r"def (move|reset)", False),
+            (r"hit$", False)
+        ]:
+            flags = 0 if case_sensitive else re.IGNORECASE
+            result = tools.search_in_files(pattern, case_sensitive=case_sensitive, max_results=100)
+            found = {(m['file'], m['line']) for m in result['matches']}
+            assert found == brute_force(temp_dir, pattern, flags), pattern
+        print("✅ Indexed search matches full scan")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_index_follows_writes():
+    """Test that writes through FileOperations reach the index."""
+    print("\n=== Test: writes update the index ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        tools.index.refresh_interval = 3600
+        file_ops = FileOperations()
+        file_ops.add_write_listener(tools.notify_file_changed)
+        
+        assert tools.search_in_files("spawn_ball")['total'] == 0
+        
+        file_ops.create_file("src/ball.py", "def spawn_ball():\n    pass\n", temp_dir)
+        file_ops.modify_file("src/paddle.py", "class Paddle:\n    pass\n", temp_dir)
+        
+        assert tools.search_in_files("spawn_ball")['matches'][0]['file'] == os.path.join('src', 'ball.py')
+        assert tools.search_in_files("def move", extensions=['.py'])['total'] == 0
+        print("✅ New and modified files searchable")
+        
+        # Rewritten in place without telling the index
+        with open(os.path.join(temp_dir, "src", "score.py"), 'a') as f:
+            f.write("\ndef spawn_bonus():\n    pass\n")
+        assert tools.search_in_files("spawn_bonus")['total'] == 1
+        print("✅ Outside edit found")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_ranked_results():
+    """Test ranked search puts the most relevant file first."""
+    print("\n=== Test: ranked search ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        result = tools.search_in_files("score", extensions=['.py'], rank=True)
+        
+        assert result['ranked']
+        assert result['matches'][0]['file'] == os.path.join('src', 'score.py')
+        scores = [m['score'] for m in result['matches']]
+        assert scores == sorted(scores, reverse=True)
+        print(f"✅ Top file: {result['matches'][0]['file']}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing TrigramIndex\n" + "=" * 50)
+    test_required_literals()
+    test_candidates_narrowed()
+    test_matches_brute_force()
+    test_index_follows_writes()
+    test_ranked_results()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
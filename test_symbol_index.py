@@ -0,0 +1,164 @@
+"""
+Test the AST symbol index and the tools built on it.
+"""
+import os
+import shutil
+import tempfile
+from project_tools import ProjectTools
+from tool_executor import ToolExecutor
+from file_operations import FileOperations
+
+
+GAME_PY = '''import pygame
+from paddle import Paddle
+
+
+class Game:
+    def __init__(self):
+        self.paddle = Paddle()
+
+    def update_score(self):
+        self.score += 1
+
+    async def load_assets(self):
+        def inner():
+            pass
+        return inner
+
+
+def update_display(game):
+    game.update_score()
+'''
+
+PADDLE_PY = '''class Paddle:
+    def move(self, dy):
+        pass
+'''
+
+
+def create_project():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_symbols_")
+    with open(os.path.join(temp_dir, "game.py"), "w") as f:
+        f.write(GAME_PY)
+    with open(os.path.join(temp_dir, "paddle.py"), "w") as f:
+        f.write(PADDLE_PY)
+    with open(os.path.join(temp_dir, "broken.py"), "w") as f:
+        f.write("def half_written(:\n    pass\n")
+    return temp_dir
+
+
+def test_definitions():
+    """Test exact, qualname, prefix and fuzzy definition lookups."""
+    print("\n=== Test: definitions ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        
+        result = tools.find_definitions("load_assets", definition_type="function")
+        assert result['total'] == 1
+        assert result['matches'][0]['qualname'] == "Game.load_assets"
+        
+        assert tools.find_definitions("Game.update_score")['matches'][0]['line'] == 9
+        assert tools.find_definitions("inner")['matches'][0]['qualname'] == "Game.load_assets.inner"
+        assert tools.find_definitions("half_written")['total'] == 1, "Syntax errors fall back to a line scan"
+        
+        prefix = tools.find_definitions("update_", match="prefix")
+        assert sorted(m['qualname'] for m in prefix['matches']) == ["Game.update_score", "update_display"]
+        
+        assert tools.find_definitions("Paddel", match="fuzzy")['matches'][0]['type'] == 'class'
+        assert "Paddle" in tools.find_definitions("Paddel")['suggestions']
+        print("✅ Definition lookups work")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_references_and_outline():
+    """Test find_references and get_file_outline."""
+    print("\n=== Test: references and outline ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        
+        refs = tools.find_references("Paddle")
+        kinds = sorted((m['file'], m['kind']) for m in refs['matches'])
+        assert kinds == [("game.py", "import"), ("game.py", "use")], kinds
+        
+        calls = tools.find_references("update_score")
+        assert [m['line'] for m in calls['matches']] == [19]
+        
+        outline = tools.get_file_outline("game.py")
+        assert outline['success']
+        assert [(s['name'], s['type'], s['depth']) for s in outline['symbols']] == [
+            ("Game", "class", 0),
+            ("__init__", "method", 1),
+            ("update_score", "method", 1),
+            ("load_assets", "method", 1),
+            ("inner", "function", 2),
+            ("update_display", "function", 0)
+        ]
+        assert outline['symbols'][3]['async']
+        assert [i['module'] for i in outline['imports']] == ["pygame", "paddle"]
+        assert 'parse_error' in tools.get_file_outline("broken.py")
+        assert not tools.get_file_outline("missing.py")['success']
+        print("✅ References and outline work")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_reparse_on_write():
+    """Test that only changed files are re-parsed after a write."""
+    print("\n=== Test: invalidation ===")
+    
+    temp_dir = create_project()
+    try:
+        tools = ProjectTools(temp_dir)
+        tools.index.refresh_interval = 3600
+        file_ops = FileOperations()
+        file_ops.add_write_listener(tools.notify_file_changed)
+        
+        assert tools.find_definitions("move")['total'] == 1
+        paddle_record = tools.symbol_index._files['paddle.py']
+        
+        file_ops.modify_file("game.py", GAME_PY.replace("update_score", "add_point"), temp_dir)
+        
+        assert tools.find_definitions("update_score")['total'] == 0
+        assert tools.find_definitions("Game.add_point")['total'] == 1
+        assert tools.symbol_index._files['paddle.py'] is paddle_record
+        print("✅ Changed file re-parsed, others kept")
+        
+        # Rewritten in place without telling the index
+        with open(os.path.join(temp_dir, "paddle.py"), 'a') as f:
+            f.write("\n    def stop(self):\n        pass\n")
+        assert tools.find_definitions("Paddle.stop")['total'] == 1
+        print("✅ Outside edit re-parsed")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_executor_tools():
+    """Test the new tools through ToolExecutor."""
+    print("\n=== Test: executor integration ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir)
+        results = executor.parse_and_execute('TOOL: get_file_outline(filepath="game.py")')
+        
+        assert results[0]['success']
+        formatted = executor.format_tool_result(results[0])
+        assert "async method load_assets" in formatted
+        print(formatted)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing SymbolIndex\n" + "=" * 50)
+    test_definitions()
+    test_references_and_outline()
+    test_reparse_on_write()
+    test_executor_tools()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
@@ -0,0 +1,257 @@
+"""
+Test ToolExecutor batch execution (concurrency, dedupe, timeouts).
+"""
+import os
+import shutil
+import tempfile
+import time
+from tool_executor import ToolExecutor
+from file_operations import FileOperations
+
+
+def create_project():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_tools_")
+    os.makedirs(os.path.join(temp_dir, "src"))
+    with open(os.path.join(temp_dir, "README.md"), "w") as f:
+        f.write("# Test\n")
+    with open(os.path.join(temp_dir, "src", "main.py"), "w") as f:
+        f.write("def main():\n    pass\n")
+    return temp_dir
+
+
+def add_slow_tool(executor):
+    """Register a tool that sleeps for the requested time."""
+    def slow_tool(seconds=0.3, label=""):
+        time.sleep(float(seconds))
+        return {'success': True, 'label': label}
+    executor.tools_available['slow_tool'] = slow_tool
+
+
+def test_dedupe_and_order():
+    """Test identical requests run once and results keep request order."""
+    print("\n=== Test: dedupe and order ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir)
+        text = (
+            'TOOL: read_file(filepath="README.md")\n'
+            'TOOL: list_files(relative_path="src")\n'
+            'TOOL: read_file(filepath="./README.md")\n'
+        )
+        results = executor.parse_and_execute(text)
+        
+        assert [r['tool'] for r in results] == ['read_file', 'list_files'], results
+        assert all(r['success'] for r in results)
+        print(f"✅ {len(results)} unique tools executed in order")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_tools_run_concurrently():
+    """Test a multi-tool turn takes about as long as its slowest tool."""
+    print("\n=== Test: concurrent execution ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir, max_workers=4)
+        add_slow_tool(executor)
+        text = '\n'.join(f'TOOL: slow_tool(seconds=0.3, label="{i}")' for i in range(4))
+        
+        start = time.monotonic()
+        results = executor.parse_and_execute(text)
+        elapsed = time.monotonic() - start
+        
+        assert [r['label'] for r in results] == ['0', '1', '2', '3']
+        assert elapsed < 0.9, f"Expected concurrent execution, took {elapsed:.2f}s"
+        print(f"✅ 4 x 0.3s tools finished in {elapsed:.2f}s")
+        
+        executor.max_workers = 1
+        start = time.monotonic()
+        executor.parse_and_execute(text)
+        assert time.monotonic() - start >= 1.2
+        print("✅ max_workers=1 runs tools in sequence")
+        executor.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_tool_timeout():
+    """Test a slow tool is reported as timed out without blocking the others."""
+    print("\n=== Test: per-tool timeout ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir, tool_timeout=0.2)
+        add_slow_tool(executor)
+        text = 'TOOL: slow_tool(seconds=1.0, label="slow")\nTOOL: read_file(filepath="README.md")'
+        
+        start = time.monotonic()
+        results = executor.parse_and_execute(text)
+        elapsed = time.monotonic() - start
+        
+        assert results[0]['timed_out'] and not results[0]['success']
+        assert results[1]['success']
+        assert elapsed < 0.8, f"Timeout not applied, took {elapsed:.2f}s"
+        print(f"✅ Slow tool timed out after {elapsed:.2f}s")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_memo_repeated_calls():
+    """Test repeated calls in a task return an 'unchanged since' notice."""
+    print("\n=== Test: memoized repeats ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir)
+        text = 'TOOL: read_file(filepath="README.md")'
+        
+        # Memo is off until a task starts
+        assert 'unchanged_since' not in executor.parse_and_execute(text)[0]
+        
+        executor.reset_memo()
+        executor.set_iteration(1)
+        first = executor.parse_and_execute(text)[0]
+        executor.set_iteration(2)
+        repeat = executor.parse_and_execute('TOOL: read_file(filepath="./README.md")')[0]
+        
+        assert 'content' in first
+        assert repeat['unchanged_since'] == 1 and 'content' not in repeat
+        formatted = executor.format_tool_result(repeat)
+        assert 'unchanged since iteration 1' in formatted
+        assert repeat['earlier_result']['content'] == first['content']
+        print(f"✅ {formatted}")
+        
+        # Rewritten in place without a notification: the re-stat catches it
+        with open(os.path.join(temp_dir, "README.md"), 'a') as f:
+            f.write("More text\n")
+        executor.set_iteration(3)
+        reread = executor.parse_and_execute(text)[0]
+        assert 'unchanged_since' not in reread and "More text" in reread['content']
+        print("✅ Outside edit re-read despite the memo")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_memo_invalidated_per_path():
+    """Test writes only invalidate results that depend on the written path."""
+    print("\n=== Test: memo invalidation ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir)
+        file_ops = FileOperations()
+        file_ops.add_write_listener(executor.project_tools.notify_file_changed)
+        
+        calls = {
+            'readme': 'TOOL: read_file(filepath="README.md")',
+            'main': 'TOOL: read_file(filepath="src/main.py")',
+            'root': 'TOOL: list_files(relative_path=".")',
+            'src': 'TOOL: list_files(relative_path="src")',
+            'search': 'TOOL: search_in_files(pattern="main")'
+        }
+        
+        executor.reset_memo()
+        executor.set_iteration(1)
+        for text in calls.values():
+            executor.parse_and_execute(text)
+        
+        file_ops.modify_file("src/main.py", "def main():\n    return 1\n", temp_dir)
+        executor.set_iteration(2)
+        
+        results = {name: executor.parse_and_execute(text)[0] for name, text in calls.items()}
+        fresh = {name: 'unchanged_since' not in result for name, result in results.items()}
+        assert fresh == {'readme': False, 'main': True, 'root': True, 'src': True, 'search': True}, fresh
+        assert "return 1" in results['main']['content']
+        print(f"✅ Re-executed: {[name for name, ran in fresh.items() if ran]}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_speculative_stream():
+    """Test tool calls start while the response is still streaming."""
+    print("\n=== Test: speculative execution ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir)
+        add_slow_tool(executor)
+        stream = executor.tool_stream()
+        
+        deltas = [
+            'Checking. TOOL: slow_tool(seco', 'nds=0.3, label="a")\n',
+            'TOOL: read_file(filepath="README.md")\n',
+            'TOOL: slow_tool(seconds=0.3, label="a")\n',
+            'I need to use list_files to see the rest.'
+        ]
+        start = time.monotonic()
+        stream.feed(deltas[0])
+        assert stream.dispatched == 0, "Call is not complete yet"
+        for delta in deltas[1:]:
+            stream.feed(delta)
+        assert stream.dispatched == 2, "Closed TOOL: calls start immediately, once each"
+        
+        time.sleep(0.3)  # The model keeps generating
+        results = stream.finish(''.join(deltas))
+        elapsed = time.monotonic() - start
+        
+        assert [r['tool'] for r in results] == ['slow_tool', 'read_file', 'list_files']
+        assert all(r['success'] for r in results)
+        assert elapsed < 0.5, f"Tool work overlapped generation ({elapsed:.2f}s)"
+        print(f"✅ {len(results)} results, slow tool overlapped generation ({elapsed:.2f}s)")
+        
+        # A response that differs from the deltas is parsed in full
+        stream = executor.tool_stream()
+        stream.feed('TOOL: read_file(filepath="README.md")\n')
+        results = stream.finish('TOOL: read_file(filepath="README.md")\nTOOL: list_files(relative_path="src")')
+        assert [r['tool'] for r in results] == ['read_file', 'list_files']
+        print("✅ Non-streamed response handled")
+    finally:
+        executor.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_tool_definitions():
+    """Test JSON-schema definitions built from the tool signatures."""
+    print("\n=== Test: tool definitions ===")
+    
+    temp_dir = create_project()
+    try:
+        executor = ToolExecutor(temp_dir)
+        definitions = {d['function']['name']: d['function'] for d in executor.tool_definitions()}
+        assert set(definitions) == set(executor.tools_available)
+        
+        read_file = definitions['read_file']
+        assert read_file['description'] == "Read contents of a file."
+        assert read_file['parameters']['required'] == ['filepath']
+        assert read_file['parameters']['properties']['start_line']['type'] == 'integer'
+        list_files = definitions['list_files']['parameters']['properties']
+        assert list_files['extensions'] == {
+            'type': 'array', 'items': {'type': 'string'},
+            'description': "Filter by extensions (e.g., ['.py', '.js'])"
+        }
+        assert list_files['max_depth']['default'] == 3
+        
+        calls = [
+            {'id': '1', 'name': 'read_file', 'arguments': {'filepath': 'README.md'}},
+            {'id': '2', 'name': 'no_such_tool', 'arguments': {}}
+        ]
+        results = executor.execute_requests(executor.requests_from_tool_calls(calls))
+        assert len(results) == 1 and results[0]['success'] and 'content' in results[0]
+        print(f"✅ {len(definitions)} definitions, native call executed")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing ToolExecutor batches\n" + "=" * 50)
+    test_dedupe_and_order()
+    test_tools_run_concurrently()
+    test_tool_timeout()
+    test_memo_repeated_calls()
+    test_memo_invalidated_per_path()
+    test_speculative_stream()
+    test_tool_definitions()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
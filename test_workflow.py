@@ -0,0 +1,182 @@
+"""
+Test dependency-ordered, concurrent workflow execution.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from database import Database
+from task_orchestrator import TaskOrchestrator
+
+
+class RecordingOrchestrator(TaskOrchestrator):
+    """Orchestrator whose tasks sleep instead of calling a model."""
+    
+    def __init__(self, db, duration=0.2, failing=()):
+        super().__init__(db)
+        self.duration = duration
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.spans = {}
+    
+    def execute_task(self, task_id, language="python"):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        start = time.monotonic()
+        time.sleep(self.duration)
+        success = task_id not in self.failing
+        self.db.update_task_status(task_id, 'completed' if success else 'failed')
+        with self.lock:
+            self.running -= 1
+            self.spans[task_id] = (start, time.monotonic())
+        return success
+
+
+def create_db():
+    temp_dir = tempfile.mkdtemp(prefix="agent7_workflow_")
+    db = Database(os.path.join(temp_dir, "agent7.db"))
+    return temp_dir, db, db.create_project("demo")
+
+
+def test_dependencies_and_cycles():
+    """Test dependencies are stored and cycles are rejected."""
+    print("\n=== Test: task dependencies ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        a = db.create_task(project_id, "A", "", "coding")
+        b = db.create_task(project_id, "B", "", "coding", depends_on=[a])
+        c = db.create_task(project_id, "C", "", "coding")
+        db.add_task_dependency(c, b)
+        assert db.get_task_dependencies(b) == [a]
+        assert db.get_task_dependencies(c) == [b]
+        
+        for task_id, other in [(a, c), (a, a)]:
+            try:
+                db.add_task_dependency(task_id, other)
+                assert False, "Cycles must be rejected"
+            except ValueError:
+                pass
+        
+        db.remove_task_dependency(c, b)
+        db.add_task_dependency(a, c)
+        assert db.get_task_dependencies(a) == [c]
+        print("✅ Dependencies stored, cycles rejected")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_independent_tasks_run_in_parallel():
+    """Test a diamond runs in three waves with the middle tasks concurrent."""
+    print("\n=== Test: parallel waves ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        plan = db.create_task(project_id, "Plan", "", "planning")
+        coding = [db.create_task(project_id, f"Module {i}", "", "coding", depends_on=[plan])
+                  for i in range(3)]
+        tests = db.create_task(project_id, "Tests", "", "testing", depends_on=coding)
+        
+        orchestrator = RecordingOrchestrator(db)
+        start = time.monotonic()
+        results = orchestrator.execute_workflow(project_id, max_concurrency=3)
+        elapsed = time.monotonic() - start
+        
+        assert results['completed'] == 5 and results['waves'] == 3, results
+        assert orchestrator.peak == 3
+        assert elapsed < 0.9, f"Coding tasks ran serially ({elapsed:.2f}s)"
+        spans = orchestrator.spans
+        assert all(spans[plan][1] <= spans[c][0] for c in coding)
+        assert all(spans[c][1] <= spans[tests][0] for c in coding)
+        print(f"✅ 5 x 0.2s tasks in 3 waves took {elapsed:.2f}s")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_implicit_stages_and_concurrency_limit():
+    """Test tasks without dependencies keep stage order and respect the limit."""
+    print("\n=== Test: implicit stages ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        testing = db.create_task(project_id, "Tests", "", "testing", priority=9)
+        coding = [db.create_task(project_id, f"C{i}", "", "coding") for i in range(4)]
+        
+        orchestrator = RecordingOrchestrator(db, duration=0.05)
+        results = orchestrator.execute_workflow(project_id, max_concurrency=2)
+        
+        assert results['completed'] == 5 and results['waves'] == 2
+        assert orchestrator.peak == 2
+        assert all(orchestrator.spans[c][1] <= orchestrator.spans[testing][0] for c in coding)
+        print("✅ Coding before testing, at most 2 at a time")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_failure_policies():
+    """Test fail_fast stops the workflow and continue skips only dependents."""
+    print("\n=== Test: failure policies ===")
+    
+    for policy in ('fail_fast', 'continue'):
+        temp_dir, db, project_id = create_db()
+        try:
+            broken = db.create_task(project_id, "Broken", "", "coding")
+            other = db.create_task(project_id, "Other", "", "coding")
+            dependent = db.create_task(project_id, "Dependent", "", "coding", depends_on=[broken])
+            independent = db.create_task(project_id, "Independent", "", "coding", depends_on=[other])
+            
+            orchestrator = RecordingOrchestrator(db, duration=0.05, failing=[broken])
+            results = orchestrator.execute_workflow(project_id, max_concurrency=2,
+                                                    failure_policy=policy)
+            outcomes = {r['task_id']: r['outcome'] for r in results['task_results']}
+            
+            assert outcomes[broken] == 'failed' and outcomes[other] == 'completed'
+            assert outcomes[dependent] == 'skipped'
+            expected = 'skipped' if policy == 'fail_fast' else 'completed'
+            assert outcomes[independent] == expected, (policy, outcomes)
+            assert db.get_task(dependent)['status'] == 'pending'
+            print(f"✅ {policy}: {results['completed']} completed, {results['skipped']} skipped")
+        finally:
+            db.close()
+            shutil.rmtree(temp_dir)
+
+
+def test_unmet_external_dependency():
+    """Test a task waiting on a failed task outside the workflow is skipped."""
+    print("\n=== Test: unmet dependencies ===")
+    
+    temp_dir, db, project_id = create_db()
+    try:
+        failed = db.create_task(project_id, "Failed earlier", "", "coding")
+        db.update_task_status(failed, 'failed')
+        done = db.create_task(project_id, "Done earlier", "", "coding")
+        db.update_task_status(done, 'completed')
+        waiting = db.create_task(project_id, "Waiting", "", "coding", depends_on=[failed])
+        ready = db.create_task(project_id, "Ready", "", "coding", depends_on=[done])
+        
+        orchestrator = RecordingOrchestrator(db, duration=0.01)
+        results = orchestrator.execute_workflow(project_id, failure_policy='continue')
+        outcomes = {r['task_id']: r['outcome'] for r in results['task_results']}
+        assert outcomes == {waiting: 'skipped', ready: 'completed'}, outcomes
+        print("✅ Completed dependencies satisfied, failed ones block")
+    finally:
+        db.close()
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    print("Testing workflows\n" + "=" * 50)
+    test_dependencies_and_cycles()
+    test_independent_tasks_run_in_parallel()
+    test_implicit_stages_and_concurrency_limit()
+    test_failure_policies()
+    test_unmet_external_dependency()
+    print("\n" + "=" * 50)
+    print("✅ All tests passed!")
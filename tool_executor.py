@@ -7,10 +7,119 @@ Handles the flow:
 3. Tool is executed
 4. Results are returned to Claude
 """
+import inspect
+import os
 import re
 import json
-from typing import Dict, Any, Optional
+import typing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeout
+from typing import Dict, Any, Optional, List, Tuple
 from project_tools import ProjectTools
+from block_parser import BlockParser
+
+
+# Arguments holding project paths, normalized so "./src/" and "src" match
+PATH_ARGS = ('relative_path', 'filepath', 'path')
+
+# Tools whose result depends on a single file, and on a directory's contents
+FILE_SCOPED_TOOLS = ('read_file', 'get_file_info', 'get_file_outline')
+DIRECTORY_SCOPED_TOOLS = ('list_files',)
+
+
+# JSON-schema types for tool parameter annotations
+JSON_TYPES = {str: 'string', int: 'integer', float: 'number', bool: 'boolean',
+              list: 'array', dict: 'object'}
+
+
+def _json_schema(annotation) -> Dict[str, Any]:
+    """JSON schema for a parameter's type annotation."""
+    origin = typing.get_origin(annotation)
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if origin is typing.Union and len(args) == 1:
+        return _json_schema(args[0])  # Optional[X]
+    if origin in (list, List):
+        schema = {'type': 'array'}
+        if args:
+            schema['items'] = _json_schema(args[0])
+        return schema
+    if origin in (dict, Dict):
+        return {'type': 'object'}
+    if annotation in JSON_TYPES:
+        return {'type': JSON_TYPES[annotation]}
+    return {}
+
+
+def _docstring_parts(func) -> Tuple[str, Dict[str, str]]:
+    """Summary and per-argument descriptions from a Google-style docstring."""
+    doc = inspect.getdoc(func) or ''
+    summary = doc.split('\n\n')[0].replace('\n', ' ').strip()
+    descriptions = {}
+    current = None
+    in_args = False
+    for line in doc.split('\n'):
+        stripped = line.strip()
+        if stripped == 'Args:':
+            in_args = True
+            continue
+        if not in_args:
+            continue
+        if stripped.endswith(':') and not line.startswith(' '):
+            break  # Next section (Returns:)
+        match = re.match(r'^    (\w+)(?: \([^)]*\))?:\s*(.*)$', line)
+        if match:
+            current = match.group(1)
+            descriptions[current] = match.group(2)
+        elif current and stripped:
+            descriptions[current] += ' ' + stripped
+    return summary, descriptions
+
+
+def tool_schema(name: str, func) -> Dict[str, Any]:
+    """
+    Build an OpenAI-style function definition from a tool's signature.
+    
+    Args:
+        name: Tool name the model calls
+        func: Tool callable, with type hints and a Google-style docstring
+    
+    Returns:
+        Dict with 'type' 'function' and the function's name, description
+        and JSON-schema parameters
+    """
+    summary, descriptions = _docstring_parts(func)
+    try:
+        hints = typing.get_type_hints(func)
+    except Exception:
+        hints = {}
+    
+    properties = {}
+    required = []
+    for param in inspect.signature(func).parameters.values():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        schema = _json_schema(hints.get(param.name, param.annotation))
+        if param.name in descriptions:
+            schema['description'] = descriptions[param.name]
+        if param.default is param.empty:
+            required.append(param.name)
+        elif param.default is not None:
+            schema['default'] = param.default
+        properties[param.name] = schema
+    
+    return {
+        'type': 'function',
+        'function': {
+            'name': name,
+            'description': summary,
+            'parameters': {
+                'type': 'object',
+                'properties': properties,
+                'required': required
+            }
+        }
+    }
 
 
 class ToolExecutor:
@@ -18,14 +127,34 @@ class ToolExecutor:
     Executes tools requested by Claude for project exploration.
     """
     
-    def __init__(self, project_directory: str):
+    def __init__(
+        self,
+        project_directory: str,
+        project_tools: Optional[ProjectTools] = None,
+        max_workers: int = 4,
+        tool_timeout: Optional[float] = 30.0
+    ):
         """
         Initialize tool executor.
         
         Args:
             project_directory: Root directory of project
+            project_tools: Optional ProjectTools to share (and its file index)
+            max_workers: Tools run concurrently per turn (1 runs them in order)
+            tool_timeout: Seconds a single tool may run before its result is
+                replaced with a timeout error (None waits indefinitely)
         """
-        self.project_tools = ProjectTools(project_directory)
+        self.project_tools = project_tools or ProjectTools(project_directory)
+        self.max_workers = max_workers
+        self.tool_timeout = tool_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        # Per-task memo of tool results (disabled until reset_memo is called)
+        self._memo = None
+        self._memo_lock = threading.Lock()
+        self.iteration = 0
+        self.project_tools.index.add_change_listener(self._invalidate_path)
         self.tools_available = {
             'list_files': self.project_tools.list_files,
             'read_file': self.project_tools.read_file,
@@ -33,9 +162,41 @@ class ToolExecutor:
             'find_files': self.project_tools.find_files,
             'find_definitions': self.project_tools.find_definitions,
             'get_project_structure': self.project_tools.get_project_structure,
-            'get_file_info': self.project_tools.get_file_info
+            'get_file_info': self.project_tools.get_file_info,
+            'find_references': self.project_tools.find_references,
+            'get_file_outline': self.project_tools.get_file_outline
         }
     
+    def tool_definitions(self) -> List[Dict[str, Any]]:
+        """
+        Describe the available tools for native function calling.
+        
+        Returns:
+            OpenAI-style tool definitions generated from the tool signatures
+        """
+        return [tool_schema(name, func) for name, func in self.tools_available.items()]
+    
+    def requests_from_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Turn native tool calls from the LLM client into tool requests.
+        
+        Args:
+            tool_calls: Calls from LocalLLMClient.send_message
+        
+        Returns:
+            Requests for execute_requests (unknown tools are dropped)
+        """
+        requests = []
+        for call in tool_calls:
+            if call['name'] not in self.tools_available:
+                continue
+            if call.get('arguments') is not None:
+                requests.append({'tool': call['name'], 'args_dict': call['arguments'], 'pattern': 'native'})
+            else:
+                requests.append({'tool': call['name'], 'args_str': call.get('raw_arguments', ''),
+                                 'pattern': 'native'})
+        return requests
+    
     def detect_tool_requests(self, text: str) -> list[Dict[str, Any]]:
         """
         Detect tool requests in LM Studio's output.
@@ -52,76 +213,21 @@ class ToolExecutor:
         Returns:
             List of detected tool requests
         """
-        tool_requests = []
+        parser = BlockParser(self.tools_available)
+        return self.tool_requests(parser.parse(text))
+    
+    def tool_requests(self, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Select tool requests from BlockParser output.
         
-        # Pattern 0: JSON format (OpenAI function calling style)
-        # [{"name": "get_project_structure", "arguments": {"max_depth": 1}}]
-        import json
-        json_pattern = r'\[?\s*\{\s*"name"\s*:\s*"(\w+)"\s*,\s*"arguments"\s*:\s*(\{.*?\})\s*\}\s*\]?'
-        json_matches = re.findall(json_pattern, text, re.DOTALL)
+        Args:
+            blocks: Blocks from BlockParser.feed/close/parse
         
-        for tool_name, args_json in json_matches:
-            if tool_name in self.tools_available:
-                try:
-                    args_dict = json.loads(args_json)
-                    tool_requests.append({
-                        'tool': tool_name,
-                        'args_dict': args_dict,
-                        'pattern': 'json'
-                    })
-                except json.JSONDecodeError:
-                    pass
-        
-        # Pattern 1: Explicit TOOL: marker
-        # TOOL: list_files(relative_path="src", extensions=[".py"])
-        pattern1 = r'TOOL:\s*(\w+)\((.*?)\)'
-        matches1 = re.findall(pattern1, text, re.IGNORECASE)
-        
-        for tool_name, args_str in matches1:
-            if tool_name in self.tools_available:
-                tool_requests.append({
-                    'tool': tool_name,
-                    'args_str': args_str,
-                    'pattern': 'explicit'
-                })
-        
-        # Pattern 2: "I need to use TOOL_NAME"
-        # I need to use list_files on "src" directory
-        pattern2 = r'(?:I need to use|Let me use|I\'ll use|Using)\s+(\w+)'
-        matches2 = re.findall(pattern2, text, re.IGNORECASE)
-        
-        for tool_name in matches2:
-            if tool_name in self.tools_available:
-                # Extract context around the tool mention
-                context_match = re.search(
-                    rf'(?:I need to use|Let me use|I\'ll use|Using)\s+{tool_name}.*?[.\n]',
-                    text,
-                    re.IGNORECASE | re.DOTALL
-                )
-                context = context_match.group(0) if context_match else ""
-                
-                tool_requests.append({
-                    'tool': tool_name,
-                    'context': context,
-                    'pattern': 'natural_language'
-                })
-        
-        # Pattern 3: Function call syntax
-        # list_files("src", extensions=[".py"])
-        pattern3 = r'(\w+)\((.*?)\)'
-        matches3 = re.findall(pattern3, text)
-        
-        for tool_name, args_str in matches3:
-            if tool_name in self.tools_available:
-                # Check if it's in a code-like context
-                if any(marker in text for marker in ['```', 'TOOL:', 'USE:']):
-                    tool_requests.append({
-                        'tool': tool_name,
-                        'args_str': args_str,
-                        'pattern': 'function_call'
-                    })
-        
-        return tool_requests
+        Returns:
+            Tool requests in the shape execute_requests takes
+        """
+        return [{key: value for key, value in block.items() if key != 'type'}
+                for block in blocks if block['type'] == 'tool']
     
     def parse_tool_args(self, args_str: str) -> Dict[str, Any]:
         """
@@ -296,6 +402,127 @@ class ToolExecutor:
         
         return args
     
+    @staticmethod
+    def normalize_args(args: Optional[Dict[str, Any]]) -> str:
+        """
+        Build a canonical string for tool arguments.
+        
+        Args:
+            args: Tool arguments
+        
+        Returns:
+            JSON string with sorted keys and normalized path arguments
+        """
+        normalized = {}
+        for key, value in (args or {}).items():
+            if key in PATH_ARGS and isinstance(value, str):
+                value = os.path.normpath(value.strip())
+            normalized[key] = value
+        return json.dumps(normalized, sort_keys=True, default=str)
+    
+    def _resolve_request(self, request: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        """Turn a detected request into (tool name, args, context)."""
+        tool_name = request['tool']
+        
+        # Parse arguments
+        args = None
+        if 'args_dict' in request:
+            # JSON format - already parsed
+            args = request['args_dict']
+        elif 'args_str' in request:
+            # String format - needs parsing
+            args = self.parse_tool_args(request['args_str'])
+        elif 'context' in request:
+            # Natural language - extract from context
+            args = self.extract_args_from_context(tool_name, request['context'])
+        
+        return tool_name, args, request.get('context')
+    
+    def _request_key(self, request: Dict[str, Any]):
+        """Resolve a request into its call and the key identical requests share."""
+        tool_name, args, context = self._resolve_request(request)
+        key = (tool_name, self.normalize_args(args), context if not args else None)
+        return (tool_name, args, context), key
+    
+    def reset_memo(self):
+        """Start a fresh per-task memo of tool results (enables memoization)."""
+        with self._memo_lock:
+            self._memo = {}
+            self.iteration = 0
+    
+    def set_iteration(self, iteration: int):
+        """
+        Set the current task iteration, used in "unchanged since" notices.
+        
+        Args:
+            iteration: 1-based iteration number
+        """
+        self.iteration = iteration
+    
+    def _memo_scope(self, tool_name: str, args: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Get the project path a tool result depends on (None means the whole project)."""
+        if tool_name not in FILE_SCOPED_TOOLS and tool_name not in DIRECTORY_SCOPED_TOOLS:
+            return None
+        
+        path = next((args[key] for key in PATH_ARGS if isinstance((args or {}).get(key), str)), '.')
+        return self.project_tools.index.to_relative(
+            os.path.join(self.project_tools.project_directory, path)
+        )
+    
+    def _stat_scope(self, scope: Optional[str]) -> Optional[Tuple[int, int]]:
+        """Get the (mtime, size) of a memo scope, or None when it can't be stat'ed."""
+        if scope is None:
+            return None
+        try:
+            stat = os.stat(os.path.join(self.project_tools.project_directory, scope))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _invalidate_path(self, rel_path: str):
+        """Drop memoized results that a change to rel_path can affect."""
+        with self._memo_lock:
+            if not self._memo:
+                return
+            
+            for key, entry in list(self._memo.items()):
+                scope = entry['scope']
+                if entry['tool'] in FILE_SCOPED_TOOLS:
+                    stale = scope is None or scope == rel_path
+                elif entry['tool'] in DIRECTORY_SCOPED_TOOLS:
+                    stale = scope is None or scope == '.' or rel_path.startswith(scope + os.sep)
+                else:
+                    stale = True
+                
+                if stale:
+                    del self._memo[key]
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='tool'
+                )
+            return self._pool
+    
+    def close(self):
+        """Stop tracking the project index and shut down the tool worker pool."""
+        self.project_tools.index.remove_change_listener(self._invalidate_path)
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+    
+    def tool_stream(self) -> 'ToolStream':
+        """
+        Start speculative execution for a response that is still streaming.
+        
+        Returns:
+            ToolStream to feed the response deltas to
+        """
+        return ToolStream(self)
+    
     def parse_and_execute(self, text: str) -> list[Dict[str, Any]]:
         """
         Parse tool requests from text and execute them.
@@ -306,27 +533,138 @@ class ToolExecutor:
         Returns:
             List of execution results
         """
-        tool_requests = self.detect_tool_requests(text)
-        results = []
+        return self.execute_requests(self.detect_tool_requests(text))
+    
+    def execute_requests(self, tool_requests: List[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        """
+        Execute detected tool requests, concurrently when there are several.
         
+        Identical requests (same tool and normalized arguments) run once.
+        Results come back in the order the requests were first made. While
+        a memo is active (see reset_memo), a request already answered in
+        this task returns a short 'unchanged_since' result instead, with
+        the full result it refers to under 'earlier_result'. The path a
+        memoized result depends on is re-stat'ed first, so a file
+        rewritten outside the project tools is read again.
+        
+        Args:
+            tool_requests: Requests from detect_tool_requests
+        
+        Returns:
+            List of execution results
+        """
+        calls = []
+        keys = []
         for request in tool_requests:
-            tool_name = request['tool']
-            
-            # Parse arguments
-            args = None
-            if 'args_dict' in request:
-                # JSON format - already parsed
-                args = request['args_dict']
-            elif 'args_str' in request:
-                # String format - needs parsing
-                args = self.parse_tool_args(request['args_str'])
-            elif 'context' in request:
-                # Natural language - extract from context
-                args = self.extract_args_from_context(tool_name, request['context'])
-            
-            # Execute
-            result = self.execute_tool(tool_name, args, request.get('context'))
-            results.append(result)
+            call, key = self._request_key(request)
+            if key in keys:
+                continue
+            keys.append(key)
+            calls.append(call)
+        
+        results = [None] * len(calls)
+        
+        with self._memo_lock:
+            memo = self._memo
+        
+        if memo is not None:
+            # Pick up edits made outside FileOperations before trusting the memo
+            self.project_tools.index.refresh()
+            
+            with self._memo_lock:
+                for i, key in enumerate(keys):
+                    entry = self._memo.get(key) if self._memo is not None else None
+                    if entry and entry['scope'] is not None and self._stat_scope(entry['scope']) != entry['stat']:
+                        # Rewritten since, and the index hasn't noticed yet
+                        del self._memo[key]
+                        entry = None
+                    if entry:
+                        tool_name, args, _ = calls[i]
+                        results[i] = {
+                            'success': True,
+                            'tool': tool_name,
+                            'args': args or {},
+                            'unchanged_since': entry['iteration'],
+                            'earlier_result': entry['result']
+                        }
+        
+        to_run = [i for i in range(len(calls)) if results[i] is None]
+        
+        if self.max_workers <= 1 or len(to_run) <= 1:
+            fresh = [self.execute_tool(*calls[i]) for i in to_run]
+        else:
+            fresh = self._execute_concurrently([calls[i] for i in to_run])
+        
+        for i, result in zip(to_run, fresh):
+            results[i] = result
+            
+            if memo is not None and result.get('success'):
+                tool_name, args, _ = calls[i]
+                scope = self._memo_scope(tool_name, args)
+                stat = self._stat_scope(scope)
+                with self._memo_lock:
+                    if self._memo is not None:
+                        self._memo[keys[i]] = {
+                            'tool': tool_name,
+                            'scope': scope,
+                            'stat': stat,
+                            'iteration': self.iteration,
+                            'result': result
+                        }
+        
+        return results
+    
+    def _execute_concurrently(self, calls: List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]) -> list[Dict[str, Any]]:
+        """Run calls on the worker pool, applying the per-tool timeout."""
+        results = [None] * len(calls)
+        started = {}
+        
+        def run(index, call):
+            started[index] = time.monotonic()
+            return self.execute_tool(*call)
+        
+        pool = self._get_pool()
+        pending = {pool.submit(run, i, call): i for i, call in enumerate(calls)}
+        
+        while pending:
+            now = time.monotonic()
+            
+            if self.tool_timeout is not None:
+                # Give up on tools that have been running too long
+                for future, index in list(pending.items()):
+                    if index in started and now - started[index] >= self.tool_timeout and not future.done():
+                        tool_name, args, _ = calls[index]
+                        results[index] = {
+                            'success': False,
+                            'error': f"Tool '{tool_name}' timed out after {self.tool_timeout}s",
+                            'tool': tool_name,
+                            'args': args or {},
+                            'timed_out': True
+                        }
+                        del pending[future]
+                
+                if not pending:
+                    break
+                
+                deadlines = [started[i] + self.tool_timeout for i in pending.values() if i in started]
+                wait_for = max(min(deadlines) - now, 0) if deadlines else self.tool_timeout
+                if len(deadlines) < len(pending):
+                    # Queued tools get their deadline once they start
+                    wait_for = min(wait_for, 0.1)
+            else:
+                wait_for = None
+            
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = {
+                        'success': False,
+                        'error': str(e),
+                        'tool': calls[index][0]
+                    }
         
         return results
     
@@ -345,6 +683,13 @@ class ToolExecutor:
         
         tool_name = result.get('tool', 'unknown')
         
+        if 'unchanged_since' in result:
+            args = ', '.join(f"{k}={v!r}" for k, v in result.get('args', {}).items())
+            return (
+                f"♻️  {tool_name}({args}): unchanged since iteration "
+                f"{result['unchanged_since']}, see the earlier result."
+            )
+        
         # Format based on tool type
         if tool_name == 'list_files':
             files = result.get('files', [])
@@ -408,6 +753,40 @@ class ToolExecutor:
             for match in matches:
                 output += f"  {match['type']} in {match['file']}:{match['line']}\n    {match['content']}\n\n"
             
+            if result.get('suggestions'):
+                output += f"Did you mean: {', '.join(result['suggestions'])}?\n"
+            
+            return output
+        
+        elif tool_name == 'find_references':
+            matches = result.get('matches', [])
+            total = result.get('total', 0)
+            output = f"🔗 Found {total} references to {result.get('name', '')}:\n\n"
+            
+            for match in matches[:20]:  # Limit display
+                output += f"  {match['file']}:{match['line']} ({match['kind']})\n    {match['content']}\n\n"
+            
+            if len(matches) > 20:
+                output += f"... and {len(matches) - 20} more references"
+            
+            return output
+        
+        elif tool_name == 'get_file_outline':
+            symbols = result.get('symbols', [])
+            imports = result.get('imports', [])
+            output = f"🧭 Outline of {result.get('filepath', '')} ({len(symbols)} symbols):\n\n"
+            
+            for symbol in symbols:
+                prefix = 'async ' if symbol['async'] else ''
+                output += f"{'  ' * (symbol['depth'] + 1)}{prefix}{symbol['type']} {symbol['name']} (lines {symbol['line']}-{symbol['end_line']})\n"
+            
+            if imports:
+                names = [i['module'] if not i['name'] else f"{i['module']}.{i['name']}" for i in imports]
+                output += f"\nImports: {', '.join(names)}\n"
+            
+            if result.get('parse_error'):
+                output += f"\n⚠️  File has a syntax error: {result['parse_error']}\n"
+            
             return output
         
         elif tool_name == 'get_file_info':
@@ -432,3 +811,119 @@ class ToolExecutor:
         """Get summary of available tools."""
         return self.project_tools.get_tools_description()
 
+
+class ToolStream:
+    """
+    Runs tool calls from a streaming response while it is still generating.
+    
+    Deltas are fed to a BlockParser. Each explicit TOOL: or JSON call is
+    submitted to the executor's worker pool as soon as it closes, so file
+    system work overlaps with generation. Natural-language and bare
+    function-call requests are only certain once the response is complete,
+    so they run in finish(). Results are buffered until finish() returns
+    them, in request order and deduplicated like execute_requests.
+    """
+    
+    # Patterns definite enough to run before the response ends
+    SPECULATIVE_PATTERNS = ('explicit', 'json')
+    
+    def __init__(self, executor: ToolExecutor):
+        """
+        Initialize stream. Use ToolExecutor.tool_stream() to create one.
+        
+        Args:
+            executor: Executor that runs the tools
+        """
+        self.executor = executor
+        self.parser = BlockParser(executor.tools_available)
+        self._parts = []
+        self._futures = {}  # Request key -> (future, start time holder)
+    
+    @property
+    def dispatched(self) -> int:
+        """Number of tool calls started before the response ended."""
+        return len(self._futures)
+    
+    def feed(self, delta: str):
+        """
+        Parse a response delta and start any tool call it completes.
+        
+        Args:
+            delta: Text generated since the last feed
+        """
+        self._parts.append(delta)
+        for block in self.parser.feed(delta):
+            if block['type'] == 'tool' and block['pattern'] in self.SPECULATIVE_PATTERNS:
+                self._dispatch(self.executor.tool_requests([block])[0])
+    
+    def _dispatch(self, request: Dict[str, Any]):
+        _, key = self.executor._request_key(request)
+        if key in self._futures:
+            return
+        started = []
+        
+        def run():
+            started.append(time.monotonic())
+            return self.executor.execute_requests([request])[0]
+        
+        self._futures[key] = (self.executor._get_pool().submit(run), started)
+    
+    def finish(self, text: Optional[str] = None) -> list[Dict[str, Any]]:
+        """
+        Complete the response and collect every tool result.
+        
+        Args:
+            text: The full response, if known. When it differs from the fed
+                deltas (e.g. a non-streamed fallback) it is parsed instead,
+                reusing calls that already ran.
+        
+        Returns:
+            Results in the order the requests were first made
+        """
+        self.parser.close()
+        blocks = self.parser.blocks
+        if text is not None and text != ''.join(self._parts):
+            blocks = BlockParser(self.executor.tools_available).parse(text)
+        
+        keys = []
+        remaining = []
+        for request in self.executor.tool_requests(blocks):
+            _, key = self.executor._request_key(request)
+            if key in keys:
+                continue
+            keys.append(key)
+            if key not in self._futures:
+                remaining.append(request)
+        
+        fresh = iter(self.executor.execute_requests(remaining))
+        results = []
+        for key in keys:
+            if key in self._futures:
+                results.append(self._result(key))
+            else:
+                results.append(next(fresh))
+        return results
+    
+    def _result(self, key) -> Dict[str, Any]:
+        """Wait for a speculative call, applying the executor's tool timeout."""
+        future, started = self._futures[key]
+        timeout = self.executor.tool_timeout
+        if timeout is not None and started:
+            timeout = max(started[0] + timeout - time.monotonic(), 0)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeout:
+            tool_name = key[0]
+            return {
+                'success': False,
+                'error': f"Tool '{tool_name}' timed out after {self.executor.tool_timeout}s",
+                'tool': tool_name,
+                'timed_out': True
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e), 'tool': key[0]}
+    
+    def cancel(self):
+        """Drop calls that have not started, e.g. when generation is aborted."""
+        for future, _ in self._futures.values():
+            future.cancel()
@@ -4,17 +4,25 @@ Flask web server for Agent7 UI.
 import os
 import json
 import threading
+from collections import deque
 from flask import Flask, render_template, request, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from werkzeug.utils import secure_filename
 from datetime import datetime
 
 # Import Agent7 modules
 from database import Database
 from local_llm_client import LocalLLMClient
+from response_cache import ResponseCache
 from test_runner import TestRunner
-from lm_studio_executor import LMStudioExecutor
+from job_manager import JobManager, execute_job_task
 from chat_agent import ChatAgent
+from availability_monitor import AvailabilityMonitor
+
+try:
+    import config  # Local settings, see config.example.py
+except ImportError:
+    config = None
 
 # Claude integration - Future feature (v3.0)
 # from claude_client import ClaudeClient
@@ -26,6 +34,33 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'agent7-secret-key-change-in-production'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# LM Studio connection
+LOCAL_LLM_URL = getattr(config, 'LOCAL_LLM_URL', 'http://localhost:1234/v1')
+LOCAL_LLM_POOL_SIZE = getattr(config, 'LOCAL_LLM_POOL_SIZE', 10)
+LOCAL_LLM_CONNECT_TIMEOUT = getattr(config, 'LOCAL_LLM_CONNECT_TIMEOUT', 5.0)
+
+# Seconds between LM Studio health checks
+LLM_CHECK_INTERVAL = 15.0
+
+# Cache deterministic LLM calls in this SQLite file (None: no cache)
+LLM_CACHE_PATH = getattr(config, 'LLM_CACHE_PATH', None)
+
+# Tasks executed side by side; match the parallel slots LM Studio serves
+MAX_PARALLEL_TASKS = 2
+
+# Paging for list endpoints
+TASK_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Columns the task list needs; details come from /api/tasks/<id>
+TASK_LIST_COLUMNS = ['id', 'project_id', 'title', 'task_type', 'status', 'priority',
+                     'created_at', 'updated_at', 'completed_at']
+
+# Output events kept per running task for clients that join its room late;
+# streamed token deltas are merged so one event holds a whole response
+OUTPUT_REPLAY_EVENTS = 2000
+output_replay = {}
+output_lock = threading.Lock()
+
 # Global state
 state = {
     'db': None,
@@ -37,18 +72,39 @@ state = {
     'test_runner': None,
     'current_project_dir': None,
     'current_project_id': None,
-    'execution_active': False
+    'execution_active': False,
+    'llm_monitor': None,
+    'jobs': None
 }
 
 
 def initialize_components():
     """Initialize all Agent7 components."""
     state['db'] = Database('agent7.db')
-    state['local_llm'] = LocalLLMClient('http://localhost:1234/v1')
+    state['local_llm'] = LocalLLMClient(
+        LOCAL_LLM_URL,
+        pool_size=LOCAL_LLM_POOL_SIZE,
+        connect_timeout=LOCAL_LLM_CONNECT_TIMEOUT,
+        cache=ResponseCache(LLM_CACHE_PATH) if LLM_CACHE_PATH else None
+    )
     state['test_runner'] = TestRunner(state['db'])
-    state['lm_executor'] = None  # Initialized per project
+    state['jobs'] = JobManager(
+        state['db'],
+        state['local_llm'],
+        run_task_job,
+        max_workers=MAX_PARALLEL_TASKS,
+        on_change=on_job_change
+    )
     state['chat_agent'] = ChatAgent(state['local_llm'], state['db'])
     
+    # One shared health check; clients get 'llm_status' pushes on change
+    state['llm_monitor'] = AvailabilityMonitor(
+        state['local_llm'].check_availability,
+        interval=LLM_CHECK_INTERVAL,
+        on_change=lambda available: socketio.emit('llm_status', {'available': available})
+    )
+    state['llm_monitor'].start()
+    
     # Legacy components (for reference, not used in v2.2)
     # state['claude'] = ClaudeClient()
     # state['brain'] = OrchestrationBrain(state['local_llm'])
@@ -56,6 +112,76 @@ def initialize_components():
     # state['orchestrator'] = TaskOrchestrator(...)
 
 
+# Push updates
+
+def build_status():
+    """Get the dashboard status without any blocking health check."""
+    monitor = state['llm_monitor']
+    task_stats = state['db'].get_task_stats() if state['db'] else {'total': 0, 'by_status': {}}
+    pending_checkpoints = state['session_manager'].get_pending_checkpoints() if state['session_manager'] else []
+    
+    return {
+        'local_llm_available': monitor.available if monitor else False,
+        'claude_available': True,  # Assume available if configured
+        'current_project_dir': state['current_project_dir'],
+        'current_project_id': state['current_project_id'],
+        'execution_active': state['execution_active'],
+        'active_jobs': len(state['jobs'].active_job_ids()) if state['jobs'] else 0,
+        'total_projects': len(state['db'].list_projects()) if state['db'] else 0,
+        'total_tasks': task_stats['total'],
+        'pending_tasks': task_stats['by_status'].get('pending', 0),
+        'scheduled_tasks': len(pending_checkpoints)
+    }
+
+
+def build_stats(project_id=None):
+    """Get task counts for the stats panel."""
+    counts = state['db'].get_task_stats(project_id)
+    by_status = counts['by_status']
+    by_type = counts['by_type']
+    
+    return {
+        'total_tasks': counts['total'],
+        'pending': by_status.get('pending', 0),
+        'in_progress': by_status.get('in_progress', 0),
+        'completed': by_status.get('completed', 0),
+        'failed': by_status.get('failed', 0),
+        'by_type': {
+            'planning': by_type.get('planning', 0),
+            'coding': by_type.get('coding', 0),
+            'testing': by_type.get('testing', 0)
+        }
+    }
+
+
+def push_status(**changes):
+    """Push changed status fields to all clients."""
+    socketio.emit('status_update', changes)
+
+
+def push_stats():
+    """Push task counts to all clients after a task write."""
+    if state['db']:
+        stats = build_stats()
+        socketio.emit('stats_update', stats)
+        push_status(total_tasks=stats['total_tasks'], pending_tasks=stats['pending'])
+
+
+def push_files_changed(path=None, project_dir=None):
+    """Tell clients the project's files changed (path is None for 'everything')."""
+    project_dir = project_dir or state['current_project_dir']
+    if path and project_dir:
+        path = os.path.relpath(path, project_dir)
+    socketio.emit('files_changed', {'path': path, 'project_dir': project_dir})
+
+
+def on_job_change(job):
+    """Push the number of running jobs when a job changes state."""
+    active = len(state['jobs'].active_job_ids()) if state['jobs'] else 0
+    state['execution_active'] = active > 0
+    push_status(execution_active=active > 0, active_jobs=active)
+
+
 # Routes
 
 @app.route('/')
@@ -66,26 +192,8 @@ def index():
 
 @app.route('/api/status')
 def get_status():
-    """Get system status."""
-    llm_available = False
-    if state['local_llm']:
-        llm_available = state['local_llm'].check_availability()
-    
-    projects = state['db'].list_projects() if state['db'] else []
-    tasks = state['db'].list_tasks() if state['db'] else []
-    pending_checkpoints = state['session_manager'].get_pending_checkpoints() if state['session_manager'] else []
-    
-    return jsonify({
-        'local_llm_available': llm_available,
-        'claude_available': True,  # Assume available if configured
-        'current_project_dir': state['current_project_dir'],
-        'current_project_id': state['current_project_id'],
-        'execution_active': state['execution_active'],
-        'total_projects': len(projects),
-        'total_tasks': len(tasks),
-        'pending_tasks': len([t for t in tasks if t['status'] == 'pending']),
-        'scheduled_tasks': len(pending_checkpoints)
-    })
+    """Get system status (LM Studio availability comes from the monitor's cache)."""
+    return jsonify(build_status())
 
 
 @app.route('/api/project/select', methods=['POST'])
@@ -113,6 +221,8 @@ def select_project():
         project_id = state['db'].create_project(project_name, f"Project at {project_dir}")
     
     state['current_project_id'] = project_id
+    push_status(current_project_dir=project_dir, current_project_id=project_id)
+    push_files_changed()
     
     return jsonify({
         'success': True,
@@ -156,12 +266,28 @@ def create_project():
 
 @app.route('/api/tasks')
 def list_tasks():
-    """List tasks."""
+    """
+    List tasks, one page at a time.
+    
+    Query args: project_id, status, limit, cursor (from the X-Next-Cursor
+    header of the previous page) and fields (comma-separated columns).
+    """
     project_id = request.args.get('project_id', type=int)
     status = request.args.get('status')
+    limit = min(request.args.get('limit', TASK_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    fields = request.args.get('fields')
+    columns = fields.split(',') if fields else TASK_LIST_COLUMNS
+    
+    try:
+        page = state['db'].list_tasks_page(project_id, status, max(limit, 1), cursor, columns)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    tasks = state['db'].list_tasks(project_id, status)
-    return jsonify(tasks)
+    response = jsonify(page['items'])
+    if page['next_cursor']:
+        response.headers['X-Next-Cursor'] = page['next_cursor']
+    return response
 
 
 @app.route('/api/tasks', methods=['POST'])
@@ -183,29 +309,46 @@ def create_task():
     
     task_id = state['db'].create_task(project_id, title, description, task_type, priority)
     task = state['db'].get_task(task_id)
+    push_stats()
     
     return jsonify(task)
 
 
 @app.route('/api/tasks/<int:task_id>')
 def get_task(task_id):
-    """Get task details."""
+    """
+    Get task details.
+    
+    Conversations and results are paged: pass limit, and
+    conversations_cursor / results_cursor from 'next_cursors' to continue.
+    """
     task = state['db'].get_task(task_id)
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
+    limit = min(request.args.get('limit', MAX_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    
     # Include conversations and results
-    conversations = state['db'].get_conversations(task_id)
-    results = state['db'].get_results(task_id)
+    try:
+        conversations = state['db'].get_conversations_page(
+            task_id, max(limit, 1), request.args.get('conversations_cursor'))
+        results = state['db'].get_results_page(
+            task_id, max(limit, 1), request.args.get('results_cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     file_mods = state['db'].get_file_modifications(task_id)
     test_execs = state['db'].get_test_executions(task_id)
     
     return jsonify({
         'task': task,
-        'conversations': conversations,
-        'results': results,
+        'conversations': conversations['items'],
+        'results': results['items'],
         'file_modifications': file_mods,
-        'test_executions': test_execs
+        'test_executions': test_execs,
+        'next_cursors': {
+            'conversations': conversations['next_cursor'],
+            'results': results['next_cursor']
+        }
     })
 
 
@@ -223,6 +366,7 @@ def delete_task(task_id):
             cursor = conn.cursor()
             cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
             conn.commit()
+        push_stats()
         
         return jsonify({'success': True, 'message': f'Task #{task_id} deleted'})
     except Exception as e:
@@ -239,6 +383,7 @@ def archive_task(task_id):
         
         # Update status to archived
         state['db'].update_task_status(task_id, 'archived')
+        push_stats()
         
         return jsonify({'success': True, 'message': f'Task #{task_id} archived'})
     except Exception as e:
@@ -247,10 +392,7 @@ def archive_task(task_id):
 
 @app.route('/api/execute/<int:task_id>', methods=['POST'])
 def execute_task(task_id):
-    """Execute a task."""
-    if state['execution_active']:
-        return jsonify({'error': 'Execution already in progress'}), 409
-    
+    """Queue a task for execution; several tasks may run at once."""
     task = state['db'].get_task(task_id)
     if not task:
         return jsonify({'error': 'Task not found'}), 404
@@ -258,141 +400,146 @@ def execute_task(task_id):
     if not state['current_project_dir']:
         return jsonify({'error': 'No project directory selected'}), 400
     
-    # Start execution in background thread
-    thread = threading.Thread(
-        target=execute_task_thread,
-        args=(task_id, state['current_project_dir'])
-    )
-    thread.daemon = True
-    thread.start()
+    result = state['jobs'].submit(task_id, state['current_project_dir'])
+    if not result['success']:
+        return jsonify(result), 409
     
-    return jsonify({'success': True, 'message': 'Execution started'})
+    return jsonify({'success': True, 'job_id': result['job_id'], 'message': 'Execution queued'})
+
+
+@app.route('/api/task/<int:task_id>/cancel', methods=['POST'])
+def cancel_task(task_id):
+    """Cancel the queued or running execution of a task."""
+    result = state['jobs'].cancel_task(task_id)
+    if not result['success']:
+        return jsonify(result), 409
+    return jsonify(result)
+
 
+@app.route('/api/jobs')
+def list_jobs():
+    """List recent execution jobs."""
+    return jsonify(state['db'].list_jobs(request.args.get('status'),
+                                         min(request.args.get('limit', 50, type=int), MAX_PAGE_SIZE)))
 
-def execute_task_thread(task_id, project_dir):
-    """Execute task in background thread."""
-    state['execution_active'] = True
+
+def emit_task_output(task_id, data, **extra):
+    """Send output to a task's room and keep it for clients that join later."""
+    event = dict(data=data, task_id=task_id, **extra)
+    with output_lock:
+        replay = output_replay.setdefault(task_id, deque(maxlen=OUTPUT_REPLAY_EVENTS))
+        if event.get('stream') and replay and replay[-1].get('stream'):
+            replay[-1] = dict(replay[-1], data=replay[-1]['data'] + data)
+        else:
+            replay.append(dict(event))
+        socketio.emit('output', event, to=f"task_{task_id}")
+
+
+def run_task_job(job, executor, cancel_event):
+    """
+    Execute one job on a JobManager worker thread.
+    
+    Output goes to the task's room (task_<id>) so several running tasks
+    don't interleave in every client. Clients joining while the job runs
+    get its output so far (see handle_join_task).
+    """
+    task_id = job['task_id']
+    project_dir = job['project_directory']
+    
+    with output_lock:
+        output_replay.pop(task_id, None)  # Output of an earlier run
+    
+    def emit_output(data, **extra):
+        emit_task_output(task_id, data, **extra)
+    
+    # Callback for progress updates
+    def progress_callback(update):
+        status = update.get('status')
+        message = update.get('message', '')
+        
+        if status == 'starting':
+            emit_output(f"⚙️  {message}\n")
+        elif status == 'executing':
+            emit_output(f"\n🤖 {message}\n")
+        elif status == 'token':
+            emit_output(update.get('delta', ''), stream=True)
+        elif status == 'response':
+            if update.get('streamed'):
+                emit_output("\n")
+            else:
+                response = update.get('response', '')
+                emit_output(f"\n{response}\n")
+        elif status == 'context':
+            emit_output(f"✂️  {message}\n")
+        elif status == 'tools':
+            emit_output(f"\n🔧 {message}\n")
+        elif status == 'tool_results':
+            results = update.get('results', '')
+            emit_output(f"\n{results}\n")
+        elif status == 'files':
+            summary = update.get('summary', '')
+            operations = update.get('operations', [])
+            if summary:
+                emit_output(f"\n📝 {message}\n{summary}\n")
+            else:
+                emit_output(f"\n📝 {message} ({len(operations)} operations)\n")
+        elif status == 'validation':
+            validation = update.get('validation', '')
+            emit_output(f"\n🧠 {message}\n{validation}\n")
+        elif status == 'testing':
+            emit_output("\n🧪 Running tests...\n")
+        elif status == 'test_results':
+            emit_output(update.get('summary', '') + "\n")
+        elif status == 'cancelled':
+            emit_output(f"\n⏹️  {message}\n")
     
     try:
         task = state['db'].get_task(task_id)
-        socketio.emit('output', {'data': f"🚀 Starting task: {task['title']}\n"})
-        socketio.emit('output', {'data': f"📁 Project: {project_dir}\n"})
-        
-        # Update task status
-        state['db'].update_task_status(task_id, 'in_progress')
+        attempt = f" (attempt {job['attempts']}/{job['max_attempts']})" if job['attempts'] > 1 else ""
+        emit_output(f"🚀 Starting task: {task['title']}{attempt}\n")
+        emit_output(f"📁 Project: {project_dir}\n")
         socketio.emit('task_status', {'task_id': task_id, 'status': 'in_progress'})
         
-        # Initialize LM Studio executor for this project
-        if not state['lm_executor'] or state['lm_executor'].project_directory != project_dir:
-            socketio.emit('output', {'data': "🔧 Initializing LM Studio executor...\n"})
-            state['lm_executor'] = LMStudioExecutor(
-                state['local_llm'],
-                state['db'],
-                project_dir
-            )
-        
-        # Callback for progress updates
-        def progress_callback(update):
-            status = update.get('status')
-            message = update.get('message', '')
-            
-            if status == 'starting':
-                socketio.emit('output', {'data': f"⚙️  {message}\n"})
-            elif status == 'executing':
-                socketio.emit('output', {'data': f"\n🤖 {message}\n"})
-            elif status == 'response':
-                response = update.get('response', '')
-                socketio.emit('output', {'data': f"\n{response}\n"})
-            elif status == 'tools':
-                socketio.emit('output', {'data': f"\n🔧 {message}\n"})
-            elif status == 'tool_results':
-                results = update.get('results', '')
-                socketio.emit('output', {'data': f"\n{results}\n"})
-            elif status == 'files':
-                summary = update.get('summary', '')
-                operations = update.get('operations', [])
-                if summary:
-                    socketio.emit('output', {'data': f"\n📝 {message}\n{summary}\n"})
-                else:
-                    socketio.emit('output', {'data': f"\n📝 {message} ({len(operations)} operations)\n"})
-            elif status == 'validation':
-                validation = update.get('validation', '')
-                socketio.emit('output', {'data': f"\n🧠 {message}\n{validation}\n"})
+        executor.file_ops.add_write_listener(lambda path: push_files_changed(path, project_dir))
         
         # Execute with LM Studio
-        socketio.emit('output', {'data': "🤖 Executing with LM Studio...\n\n"})
+        emit_output("🤖 Executing with LM Studio...\n\n")
         
-        result = state['lm_executor'].execute_task(
-            task_id=task_id,
-            task_description=task['description'],
-            task_type=task['task_type'],
-            max_iterations=3,
-            callback=progress_callback
+        result = execute_job_task(
+            state['db'],
+            job,
+            executor,
+            cancel_event,
+            callback=progress_callback,
+            test_runner=state['test_runner']
         )
         
-        # Get status and files
         status = result.get('status', 'UNKNOWN')
-        file_operations = result.get('file_operations', [])
-        files_modified = [op['filepath'] for op in file_operations if op.get('success')]
-        
-        # Save conversation
-        state['db'].save_conversation(
-            task_id,
-            'lm_studio',
-            result.get('response', ''),
-            result.get('response', ''),
-            {'iterations': result.get('iterations', 1)}
-        )
-        
-        # Execute tests if applicable
-        if task['task_type'] in ['coding', 'testing'] and files_modified:
-            socketio.emit('output', {'data': "\n🧪 Running tests...\n"})
-            
-            test_results = state['test_runner'].execute_pytest(project_dir)
-            test_summary = state['test_runner'].format_results_summary(test_results)
-            socketio.emit('output', {'data': test_summary + "\n"})
-        
-        socketio.emit('output', {'data': f"\n{'='*60}\n"})
-        socketio.emit('output', {'data': f"✅ Status: {status}\n"})
-        socketio.emit('output', {'data': f"📝 Files Created: {len(files_modified)}\n"})
-        socketio.emit('output', {'data': f"🔄 Iterations: {result.get('iterations', 1)}\n"})
-        
-        # Save result
-        state['db'].save_result(
-            task_id,
-            task['task_type'],
-            result.get('response', ''),
-            {
-                'status': status,
-                'files_modified': files_modified,
-                'iterations': result.get('iterations', 1),
-                'tool_results': len(result.get('tool_results', []))
-            }
-        )
+        emit_output(f"\n{'='*60}\n")
+        emit_output(f"✅ Status: {status}\n")
+        emit_output(f"📝 Files Created: {len(result['files_modified'])}\n")
+        emit_output(f"🔄 Iterations: {result.get('iterations', 1)}\n")
         
-        # Update task status
-        if status == 'COMPLETED':
-            state['db'].update_task_status(task_id, 'completed')
-            socketio.emit('output', {'data': "\n✅ Task completed successfully!\n"})
-            socketio.emit('task_status', {'task_id': task_id, 'status': 'completed'})
+        if status == 'CANCELLED':
+            emit_output("\n⏹️  Task cancelled\n")
+        elif status == 'COMPLETED':
+            emit_output("\n✅ Task completed successfully!\n")
         elif status == 'NEEDS_REVISION':
-            state['db'].update_task_status(task_id, 'pending')
-            socketio.emit('output', {'data': "\n⚠️  Task needs revision\n"})
-            socketio.emit('task_status', {'task_id': task_id, 'status': 'pending'})
+            emit_output("\n⚠️  Task needs revision\n")
         else:
-            state['db'].update_task_status(task_id, 'failed')
-            socketio.emit('output', {'data': "\n❌ Task failed\n"})
-            socketio.emit('task_status', {'task_id': task_id, 'status': 'failed'})
+            emit_output("\n❌ Task failed\n")
+        socketio.emit('task_status', {'task_id': task_id, 'status': result['task_status']})
     
     except Exception as e:
-        socketio.emit('output', {'data': f"\n❌ Error: {e}\n"})
-        state['db'].update_task_status(task_id, 'failed')
-        state['db'].save_result(task_id, 'error', str(e))
+        emit_output(f"\n❌ Error: {e}\n")
         socketio.emit('task_status', {'task_id': task_id, 'status': 'failed'})
+        raise  # JobManager retries or fails the job
     
     finally:
-        state['execution_active'] = False
-        socketio.emit('execution_complete', {})
+        push_stats()
+        socketio.emit('execution_complete', {'task_id': task_id, 'job_id': job['id']})
+        with output_lock:
+            output_replay.pop(task_id, None)
 
 
 @app.route('/api/files')
@@ -436,22 +583,7 @@ def get_stats():
     if not state['db']:
         return jsonify({'error': 'Database not initialized'}), 500
     
-    tasks = state['db'].list_tasks()
-    
-    stats = {
-        'total_tasks': len(tasks),
-        'pending': len([t for t in tasks if t['status'] == 'pending']),
-        'in_progress': len([t for t in tasks if t['status'] == 'in_progress']),
-        'completed': len([t for t in tasks if t['status'] == 'completed']),
-        'failed': len([t for t in tasks if t['status'] == 'failed']),
-        'by_type': {
-            'planning': len([t for t in tasks if t['task_type'] == 'planning']),
-            'coding': len([t for t in tasks if t['task_type'] == 'coding']),
-            'testing': len([t for t in tasks if t['task_type'] == 'testing'])
-        }
-    }
-    
-    return jsonify(stats)
+    return jsonify(build_stats(request.args.get('project_id', type=int)))
 
 
 @app.route('/api/chat', methods=['POST'])
@@ -467,7 +599,7 @@ def chat():
         return jsonify({'error': 'No message provided'}), 400
     
     # Get current project directory and ID
-    project_dir = state.get('current_project_directory')
+    project_dir = state.get('current_project_dir')
     project_id = state.get('current_project_id')
     
     # Send message to chat agent
@@ -482,6 +614,7 @@ def chat():
                 'task_id': action.get('task_id'),
                 'title': action.get('title')
             })
+            push_stats()
         
         # If execution was requested, actually execute the task
         if action.get('execute') and action.get('task_id'):
@@ -489,18 +622,15 @@ def chat():
             
             # Get task details
             task = state['db'].get_task(task_id)
-            if task and state.get('current_project_directory'):
-                # Execute in background thread
-                thread = threading.Thread(
-                    target=execute_task_thread,
-                    args=(task_id, task, state['current_project_directory'])
-                )
-                thread.daemon = True
-                thread.start()
-                
-                # Mark action as executed
-                action['executed'] = True
-                action['message'] = f"Task #{task_id} execution started"
+            if task and project_dir:
+                submitted = state['jobs'].submit(task_id, project_dir)
+                if submitted['success']:
+                    # Mark action as executed
+                    action['executed'] = True
+                    action['job_id'] = submitted['job_id']
+                    action['message'] = f"Task #{task_id} execution started"
+                else:
+                    action['message'] = submitted['error']
     
     return jsonify({
         'success': True,
@@ -524,6 +654,11 @@ def reset_chat():
 def handle_connect():
     """Handle client connection."""
     emit('connected', {'data': 'Connected to Agent7'})
+    
+    # Snapshot for this client; later changes arrive as pushes
+    if state['db']:
+        emit('status_update', build_status())
+        emit('stats_update', build_stats())
 
 
 @socketio.on('disconnect')
@@ -532,6 +667,26 @@ def handle_disconnect():
     pass
 
 
+@socketio.on('join_task')
+def handle_join_task(data):
+    """Subscribe this client to a task's execution output, replaying what it missed."""
+    task_id = int(data['task_id'])
+    room = f"task_{task_id}"
+    with output_lock:
+        if room in rooms():
+            return
+        join_room(room)
+        # Chat-started jobs may have produced output before the client joined
+        for event in output_replay.get(task_id, ()):
+            emit('output', event)
+
+
+@socketio.on('leave_task')
+def handle_leave_task(data):
+    """Stop receiving a task's execution output."""
+    leave_room(f"task_{int(data['task_id'])}")
+
+
 # Main entry point
 
 if __name__ == '__main__':
@@ -543,7 +698,7 @@ if __name__ == '__main__':
     print("✅ Components initialized")
     
     # Check LM Studio
-    if state['local_llm'] and state['local_llm'].check_availability():
+    if state['llm_monitor'] and state['llm_monitor'].available:
         print("✅ LM Studio connected")
     else:
         print("⚠️  LM Studio not available at http://localhost:1234")